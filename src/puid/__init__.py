@@ -1,2 +1,12 @@
 from puid.chars import Chars
 from puid.puid import Puid
+from puid.puid import generate
+
+
+def __getattr__(name):
+    # EntropyBuffer and its threading and queue imports are loaded on first use
+    if name == 'EntropyBuffer':
+        from puid.entropy_buffer import EntropyBuffer
+
+        return EntropyBuffer
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,153 @@
+"""
+asyncio support for `puid` generation
+
+`puid`s are generated in batches ahead of demand by an executor, so neither munching nor a slow entropy
+source blocks the event loop. Batches wait in a bounded queue, which stops prefetching until they are
+consumed. asyncio is imported on first use, since most `Puid`s are never used from an event loop.
+"""
+from collections import deque
+
+from puid.puid_error import PuidError
+
+# Number of puids generated per prefetched batch
+PREFETCH_SIZE = 1024
+
+# Maximum number of prefetched batches awaiting consumption
+PREFETCH_BATCHES = 4
+
+
+class AsyncEntropy:
+    """
+    Entropy function for an async entropy source
+
+    The muncher calls this synchronously from an executor thread, which waits while the async entropy
+    source runs on the event loop. Calls from the event loop itself, or while the loop is not running,
+    raise a PuidError rather than deadlock.
+
+    :param entropy_fn: Coroutine function of n returning n random bytes
+    """
+
+    def __init__(self, entropy_fn):
+        self.entropy_fn = entropy_fn
+        self.loop = None
+
+    def __call__(self, n_bytes):
+        import asyncio
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if self.loop is None or running_loop is self.loop or not self.loop.is_running():
+            raise PuidError('async entropy_source requires agenerate, agenerate_many or async iteration')
+
+        return asyncio.run_coroutine_threadsafe(self.entropy_fn(n_bytes), self.loop).result()
+
+    def __reduce__(self):
+        return (AsyncEntropy, (self.entropy_fn,))
+
+
+def running_loop():
+    """
+    The running event loop
+
+    :raise RuntimeError: If no event loop is running
+    """
+    import asyncio
+
+    return asyncio.get_running_loop()
+
+
+def is_async(entropy_fn):
+    """
+    Whether `entropy_fn` is a coroutine function
+    """
+    from inspect import iscoroutinefunction
+
+    return iscoroutinefunction(entropy_fn)
+
+
+class Prefetcher:
+    """
+    Prefetched `puid`s for the running event loop
+
+    :param puid_muncher: Muncher of batches of `puid`s, used only by this prefetcher
+    :param entropy_fn: Entropy function of the muncher
+    :param batch_size: Number of `puid`s per batch
+    :param max_batches: Maximum number of batches awaiting consumption
+    :param executor: Executor for munching, or None for the loop's default executor
+    :param issued: Function called as `issued()` for each `puid` handed out by `next`, and as
+        `issued(n)` by `many`, or None. Prefetched `puid`s are counted as issued only once handed out
+    """
+
+    def __init__(self, puid_muncher, entropy_fn, batch_size=PREFETCH_SIZE, max_batches=PREFETCH_BATCHES, executor=None, issued=None):
+        if not isinstance(batch_size, int) or batch_size <= 0:
+            raise PuidError('batch_size must be a positive integer')
+        if not isinstance(max_batches, int) or max_batches <= 0:
+            raise PuidError('max_batches must be a positive integer')
+
+        import asyncio
+
+        self.loop = asyncio.get_running_loop()
+        if isinstance(entropy_fn, AsyncEntropy):
+            entropy_fn.loop = self.loop
+
+        self.batch_size = batch_size
+        self.n_batches = 0
+
+        self._puid_muncher = puid_muncher
+        self._issued = issued if issued is not None else (lambda n_puids=None: None)
+        self._executor = executor
+        self._batches = asyncio.Queue(maxsize=max_batches)
+        self._puids = deque()
+        self._task = self.loop.create_task(self._prefetch())
+
+    async def _prefetch(self):
+        while True:
+            try:
+                batch = await self.loop.run_in_executor(self._executor, self._puid_muncher, self.batch_size)
+            except Exception as error:
+                # Hand the error to waiting consumers rather than leaving them waiting
+                await self._batches.put(error)
+                return
+            self.n_batches += 1
+            await self._batches.put(batch)
+
+    async def _refill(self):
+        batch = await self._batches.get()
+        if isinstance(batch, Exception):
+            # The error ended prefetching, so a new task prefetches for later requests
+            self._task = self.loop.create_task(self._prefetch())
+            raise batch
+        self._puids.extend(batch)
+
+    async def next(self):
+        """
+        Next `puid`
+        """
+        if not self._puids:
+            await self._refill()
+        puid = self._puids.popleft()
+        self._issued()
+        return puid
+
+    async def many(self, n):
+        """
+        Next `n` `puid`s
+        """
+        puids = []
+        while len(puids) < n:
+            if not self._puids:
+                await self._refill()
+            popleft = self._puids.popleft
+            puids.extend([popleft() for _ in range(min(n - len(puids), len(self._puids)))])
+        self._issued(n)
+        return puids
+
+    def close(self):
+        """
+        Stop prefetching
+        """
+        if not self.loop.is_closed():
+            self._task.cancel()
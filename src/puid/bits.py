@@ -1,5 +1,14 @@
+from functools import lru_cache
 from math import ceil, floor, log2
 
+from puid import plan
+from puid import vector
+
+# Fewest values for which the numpy engine slices a batch of puids of non-power of 2 chars with
+# NumPy. Smaller batches are sliced by the Python slicer, which is faster until NumPy's setup of a
+# batch is spread over enough values.
+VECTOR_MIN_VALUES = 1 << 14
+
 #  Create array of minimum bits required to determine if a value is less than n_chars
 #  Array elements are of the form (n, bits): For values less than n, bits bits are required
 #
@@ -34,52 +43,99 @@ def bit_shifts(n_chars):
     return [base_shift] + [shift(bit) for bit in range(2, n_bits_per_char) if is_bit_zero(bit)]
 
 
-def fill_entropy(entropy_offset, entropy_bytes, entropy_fn):
-    n_bytes = len(entropy_bytes)
-    n_bits = 8 * n_bytes
-
-    if entropy_offset == n_bits:
-        # no carry
-        entropy_bytes[0:n_bytes] = entropy_fn(n_bytes)
-    else:
-        offset_byte_num = floor(entropy_offset / 8)
-
-        # Move unused bytes to the left
-        entropy_bytes[0 : n_bytes - offset_byte_num] = entropy_bytes[offset_byte_num:n_bytes]
-
-        # Fill right bytes with new random values
-        entropy_bytes[n_bytes - offset_byte_num : n_bytes] = entropy_fn(offset_byte_num)
-
-    return entropy_offset % 8
+@lru_cache(maxsize=None)
+def value_shifts(n_chars):
+    """
+    Bits shifted for every possible slice value of `n_chars` chars, computed once per `n_chars`
 
+    Valid values are less than the number of characters and shift all the bits per char; invalid
+    values shift the minimal bits necessary to determine they are invalid.
 
-def value_at(l_offset, n_bits, bytes):
-    l_byte_ndx = floor(l_offset / 8)
-    l_byte = bytes[l_byte_ndx]
-
-    l_bit_num = l_offset % 8
-
-    if l_bit_num + n_bits <= 8:
-        return ((l_byte << l_bit_num) & 0xFF) >> (8 - n_bits)
-
-    r_byte = bytes[l_byte_ndx + 1]
-    r_bit_num = l_bit_num + n_bits - 8
-
-    l_value = ((l_byte << l_bit_num) & 0xFF) >> (l_bit_num - r_bit_num)
-    r_value = r_byte >> (8 - r_bit_num)
-
-    return l_value + r_value
+    >>> value_shifts(6)
+    (3, 3, 3, 3, 3, 3, 2, 2)
 
+    :return tuple
+    """
+    n_bits_per_char = ceil(log2(n_chars))
+    shifts = bit_shifts(n_chars)
 
-def muncher(n_chars, puid_len, entropy_fn):
+    def reject_shift(value):
+        return [bs for bs in shifts if value <= bs[0]][0][1]
+
+    return tuple([n_bits_per_char if value < n_chars else reject_shift(value) for value in range(1 << n_bits_per_char)])
+
+
+class BitReservoir:
+    """
+    Entropy bits read in order from `entropy_fn`
+
+    Unread bits are the low `n_bits` bits of the int `bits`, followed by the bytes of `block` from
+    `block_ndx`. Bits are loaded into `bits` from `block`, which is only replaced when more entropy is
+    fetched, so reading never moves unread bytes within a buffer.
+
+    >>> reservoir = BitReservoir(lambda n_bytes: bytes([0xc7, 0xc9, 0x00, 0x2a])[:n_bytes])
+    >>> block, offset = reservoir.contiguous(10)
+    >>> block.hex(), offset
+    ('c7c9', 0)
+    >>> reservoir.advance(offset + 4)
+    >>> block, offset = reservoir.contiguous(6)
+    >>> block.hex(), offset
+    ('07c9', 4)
+
+    :param entropy_fn: Function of n returning n random bytes
+    """
+
+    __slots__ = ('entropy_fn', 'bits', 'n_bits', 'block', 'block_ndx')
+
+    def __init__(self, entropy_fn):
+        self.entropy_fn = entropy_fn
+        self.bits = 0
+        self.n_bits = 0
+        self.block = b''
+        self.block_ndx = 0
+
+    def prefetch(self, n_bits):
+        """
+        Fetch any shortfall of `n_bits` unread bits in a single call of `entropy_fn`
+        """
+        n_short = n_bits - self.n_bits - 8 * (len(self.block) - self.block_ndx)
+        if 0 < n_short:
+            self.block = self.block[self.block_ndx :] + self.entropy_fn((n_short + 7) >> 3)
+            self.block_ndx = 0
+
+    def contiguous(self, n_bits):
+        """
+        Unread bits, at least `n_bits` of them, as bytes and the bit offset of the first unread bit
+
+        Call `advance` with the offset at which reading stopped.
+        """
+        self.prefetch(n_bits)
+        n_bytes = (self.n_bits + 7) >> 3
+        self.block = self.bits.to_bytes(n_bytes, 'big') + self.block[self.block_ndx :]
+        self.block_ndx = 0
+        offset = 8 * n_bytes - self.n_bits
+        self.bits = 0
+        self.n_bits = 0
+        return (self.block, offset)
+
+    def advance(self, offset):
+        """
+        Continue reading from bit `offset` of the bytes returned by `contiguous`
+        """
+        block_ndx = offset >> 3
+        n_used_bits = offset & 7
+        if n_used_bits:
+            self.n_bits = 8 - n_used_bits
+            self.bits = self.block[block_ndx] & ((1 << self.n_bits) - 1)
+            block_ndx += 1
+        self.block_ndx = block_ndx
+
+
+def muncher(n_chars, puid_len, entropy_fn, engine='python', counters=None):
     n_bits_per_char = ceil(log2(n_chars))
     n_bits_per_puid = n_bits_per_char * puid_len
-    n_bytes_per_puid = ceil(n_bits_per_puid / 8)
 
-    buffer_len = n_bytes_per_puid + 1
-    n_entropy_bits = 8 * buffer_len
-    entropy_offset = n_entropy_bits
-    entropy_bytes = bytearray(buffer_len)
+    reservoir = BitReservoir(entropy_fn)
 
     def pow2(bit):
         return round(pow(2, bit))
@@ -87,57 +143,81 @@ def muncher(n_chars, puid_len, entropy_fn):
     def is_pow2(n):
         return pow2(round(log2(n))) == n
 
-    counter = list(range(puid_len))
+    if is_pow2(n_chars):
+        #  When chars count is a power of 2, sliced bits always yield a valid value, so each puid
+        #  spans exactly n_bits_per_puid bits
+        slice_puid = plan.pow2_slicer(n_bits_per_char, puid_len)
 
-    def sliced_value():
-        nonlocal entropy_offset
-        if n_entropy_bits < entropy_offset + n_bits_per_char:
-            entropy_offset = fill_entropy(entropy_offset, entropy_bytes, entropy_fn)
-        return value_at(entropy_offset, n_bits_per_char, entropy_bytes)
+        def bits_muncher(n_puids=None):
+            if n_puids is None:
+                return slice_puid(reservoir)
 
-    if is_pow2(n_chars):
-        #  When chars count is a power of 2, sliced bits always yield a valid value
-        def bits_muncher():
-            def slice_value():
-                nonlocal entropy_offset
-                value = sliced_value()
-                entropy_offset += n_bits_per_char
-                return value
+            # Fetch entropy for all puids in a single call, rather than one call per puid
+            reservoir.prefetch(n_puids * n_bits_per_puid)
+            return [slice_puid(reservoir) for _ in range(n_puids)]
+
+        if engine == 'numpy':
+
+            def vector_muncher(n_puids=None):
+                if n_puids is None:
+                    return bits_muncher()
+
+                n_bits = n_puids * n_bits_per_puid
+                entropy_bytes, entropy_offset = reservoir.contiguous(n_bits)
+                values = vector.pow2_values(entropy_bytes, entropy_offset, n_puids * puid_len, n_bits_per_char)
+                reservoir.advance(entropy_offset + n_bits)
+                return values.reshape(n_puids, puid_len)
 
-            puid = [slice_value() for _ in counter]
-            return puid
+            return vector_muncher
 
         return bits_muncher
 
-    shifts = bit_shifts(n_chars)
+    # Precomputed bits to shift for every possible slice value
+    shifts = value_shifts(n_chars)
+
+    # Expected bits sliced per accepted char: total bits over all possible slice values divided by
+    # the number of those values that are accepted
+    n_bits_per_accept = sum(shifts) / n_chars
+
+    slice_puid = plan.rejection_slicer(n_chars, n_bits_per_char, puid_len, shifts, counters)
+
+    n_bits_per_puid_accept = ceil(puid_len * n_bits_per_accept)
+
+    def bits_muncher(n_puids=None):
+        if n_puids is None:
+            reservoir.prefetch(n_bits_per_puid_accept)
+            return slice_puid(reservoir)
 
-    def accept_value(value):
-        # Value is valid if it is less than the number of characters
-        if value < n_chars:
-            return (True, n_bits_per_char)
+        # Any shortfall in the expected bits is fetched as needed; any excess is carried forward
+        reservoir.prefetch(floor(n_puids * puid_len * n_bits_per_accept))
+        return [slice_puid(reservoir) for _ in range(n_puids)]
 
-        # For invalid value, shift the minimal bits necessary to determine validity
-        # If only one item, no need to search
-        if len(shifts) == 1:
-            return (False, shifts[0][1])
+    if engine == 'numpy':
 
-        bit_shift = [bs for bs in shifts if value <= bs[0]]
-        return (False, bit_shift[0][1])
+        def vector_muncher(n_puids=None):
+            if n_puids is None:
+                return bits_muncher()
 
-    def slice_value():
-        nonlocal entropy_offset
-        value = sliced_value()
-        accept, shift = accept_value(value)
-        # Returned shift is the minimal bits necessary to determine if slice value is valid
-        entropy_offset += shift
+            n_values = n_puids * puid_len
+            if n_values < VECTOR_MIN_VALUES:
+                return vector.np.array(bits_muncher(n_puids), dtype=vector.np.uint8).reshape(n_puids, puid_len)
 
-        if accept:
-            return value
+            batch_values = []
+            while n_values:
+                # Slice from the expected bits, topping up until all values are accepted
+                entropy_bytes, entropy_offset = reservoir.contiguous(floor(n_values * n_bits_per_accept) + n_bits_per_char)
+                values, n_bits, n_rejects = vector.rejection_values(
+                    entropy_bytes, entropy_offset, n_values, n_bits_per_char, n_chars, shifts
+                )
+                reservoir.advance(entropy_offset + n_bits)
+                if counters is not None:
+                    counters.rejections += n_rejects
+                    counters.rejected_bits += n_bits - len(values) * n_bits_per_char
+                n_values -= len(values)
+                batch_values.append(values)
 
-        # If value not acceptable, slice another
-        return slice_value()
+            return vector.np.concatenate(batch_values).reshape(n_puids, puid_len)
 
-    def bits_muncher():
-        return [slice_value() for _ in counter]
+        return vector_muncher
 
     return bits_muncher
@@ -0,0 +1,298 @@
+"""
+Tracking of issued `puid`s against a planned `total` and `risk`
+
+A `Puid` created with a `budget` counts the `puid`s it issues, and the `RiskBudget` reports the risk of a
+repeat among them, from the same math as `bits_for_total_risk`. As the count passes each threshold
+fraction of the planned `total`, the budget warns with a `RiskBudgetWarning` or calls `on_threshold`.
+
+Each muncher tallies its own count of single `puid`s and adds it to the shared count, under a lock,
+only every `FLUSH_EVERY` `puid`s or on nearing the next threshold, so `generate` takes no lock. Batches
+are added to the shared count as they are generated. With a `path`, the shared count is held in a
+counter file, updated under an exclusive file lock, so that processes issuing `puid`s from the same
+plan share a single count that persists across restarts.
+"""
+import atexit
+import os
+import sys
+import warnings
+from threading import Lock
+from weakref import WeakSet, finalize
+
+from puid.entropy import bits_for_total_risk, risk_for_total_bits
+from puid.puid_error import PuidError, TotalRiskError
+
+# Max puids tallied by a muncher before they are added to the shared count
+FLUSH_EVERY = 1024
+
+# Default fractions of the planned total at which to warn
+THRESHOLDS = (0.5, 0.9, 1.0)
+
+# Max bytes of a counter file
+_COUNT_BYTES = 32
+
+# Directory of the puid package, whose frames are skipped in attributing warnings to the caller
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+# Budgets with tallies, which a forked child process inherits but does not own
+_budgets = WeakSet()
+
+# Whether counter file budgets are flushed at exit
+_flushing_at_exit = False
+
+
+class RiskBudgetWarning(UserWarning):
+    """Issued `puid`s have passed a threshold of a `RiskBudget`"""
+
+    pass
+
+
+class RiskBudget:
+    """
+    Count of issued `puid`s against a planned `total` and `risk`
+
+    >>> from puid import Puid
+    >>> budget = RiskBudget()
+    >>> rand_id = Puid(total=1000, risk=1e12, budget=budget)
+    >>> ids = rand_id.generate_many(100)
+    >>> budget.issued, round(budget.used, 2)
+    (100, 0.1)
+
+    :param total: Planned total number of `puid`s. Defaults to the `total` of the `Puid`
+    :param risk: Planned risk of repeat in `total` `puid`s. Defaults to the `risk` of the `Puid`
+    :param thresholds: Fractions of `total` at which to warn or call `on_threshold`
+    :param on_threshold: Function called with the budget and each passed threshold, instead of warning
+    :param path: Path of a counter file holding the shared count
+    :param flush_every: Max `puid`s tallied by a muncher before they are added to the shared count
+    """
+
+    def __init__(self, total=None, risk=None, thresholds=THRESHOLDS, on_threshold=None, path=None, flush_every=FLUSH_EVERY):
+        if (total is None) != (risk is None):
+            raise TotalRiskError('budget requires both total and risk')
+        if total is not None:
+            bits_for_total_risk(total, risk)
+        if not isinstance(flush_every, int) or flush_every <= 0:
+            raise PuidError('flush_every must be a positive integer')
+        if path is not None and _locked is None:
+            raise PuidError('counter files require fcntl')
+
+        self.total = total
+        self.risk = risk
+        self.thresholds = sorted(thresholds)
+        self.on_threshold = on_threshold
+        self.path = None if path is None else os.fspath(path)
+        self.flush_every = flush_every
+        self.bits = None
+        self._marks = []
+        self._count = 0
+        self._tallies = []
+        self._lock = Lock()
+        _budgets.add(self)
+        if path is not None:
+            _flush_at_exit()
+
+    def _bind(self, bits, total, risk):
+        # Called by Puid with its entropy bits and its own total and risk
+        if self.total is None:
+            if total is None:
+                raise TotalRiskError('budget requires total and risk of either the budget or the Puid')
+            self.total = total
+            self.risk = risk
+        self.bits = bits
+        self._marks = [(round(threshold * self.total), threshold) for threshold in self.thresholds]
+
+    @property
+    def issued(self):
+        """Number of `puid`s issued, including those tallied but not yet added to the shared count"""
+        count = _read_count(self.path) if self.path is not None else self._count
+        return count + sum([tally[0] for tally in self._tallies])
+
+    @property
+    def used(self):
+        """Fraction of the planned `total` issued"""
+        return self.issued / self.total if self.total else float(0 < self.issued)
+
+    @property
+    def effective_risk(self):
+        """Risk of repeat among the `puid`s issued, 1 in which a repeat is expected"""
+        return risk_for_total_bits(self.issued, self.bits)
+
+    def report(self):
+        """
+        Issued `puid`s and risk of repeat against the plan
+
+        - `issued`: `puid`s issued
+        - `total`: Planned total `puid`s
+        - `used`: Fraction of `total` issued
+        - `risk`: Planned risk of repeat in `total` `puid`s
+        - `effective_risk`: Risk of repeat among the `puid`s issued
+
+        :return dict
+        """
+        issued = self.issued
+        return {
+            'issued': issued,
+            'total': self.total,
+            'used': issued / self.total if self.total else float(0 < issued),
+            'risk': self.risk,
+            'effective_risk': risk_for_total_bits(issued, self.bits),
+        }
+
+    def flush(self):
+        """
+        Add the tallies of all munchers to the shared count
+
+        Tallies of a counter file budget are added at exit of the main process. A process that exits
+        otherwise, such as a worker process that generates single `puid`s, should flush before exit.
+        """
+        for tally in self._tallies:
+            n_tallied, tally[0] = tally[0], 0
+            if n_tallied:
+                self._added(n_tallied)
+
+    def _retired(self, tally):
+        # Adds the tally of a muncher no longer in use to the shared count, and drops the tally
+        n_tallied, tally[0] = tally[0], 0
+        if n_tallied:
+            self._added(n_tallied)
+        with self._lock:
+            self._tallies[:] = [other for other in self._tallies if other is not tally]
+
+    def _flush_limit(self, count):
+        # Tally size before the next flush: no more than the puids left before the next threshold
+        for mark, _ in self._marks:
+            if count < mark:
+                return max(1, min(self.flush_every, mark - count))
+        return self.flush_every
+
+    def _added(self, n_puids):
+        # Adds a muncher tally to the shared count, and returns the tally size before the next flush
+        with self._lock:
+            if self.path is None:
+                before = self._count
+                self._count = after = before + n_puids
+            else:
+                before, after = _locked(self.path, n_puids)
+
+        for mark, threshold in self._marks:
+            if before < mark <= after:
+                self._passed(threshold, after)
+        return self._flush_limit(after)
+
+    def _passed(self, threshold, count):
+        if self.on_threshold is not None:
+            self.on_threshold(self, threshold)
+            return
+        risk = risk_for_total_bits(count, self.bits)
+        warnings.warn(
+            f'{count} puids issued, {threshold:.0%} of the planned total of {self.total}: risk of repeat is 1 in {risk:.3g}',
+            RiskBudgetWarning,
+            stacklevel=_caller_stacklevel(),
+        )
+
+    def __getstate__(self):
+        # Tallies are added to the count, and a counter file is shared with the unpickled budget
+        state = self.__dict__.copy()
+        state['_count'] = self._count + sum([tally[0] for tally in self._tallies])
+        state['_tallies'] = []
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+        _budgets.add(self)
+        if self.path is not None:
+            _flush_at_exit()
+
+    def _forked(self):
+        # Tallies inherited from the parent process are counted by the parent
+        self._lock = Lock()
+        for tally in self._tallies:
+            tally[0] = 0
+
+
+def _caller_stacklevel():
+    # Stack level, for warnings.warn called by the caller of this function, of the first frame outside
+    # the puid package, which depends on the entry point and the munchers wrapping the budget
+    frame = sys._getframe(2)
+    stacklevel = 2
+    while frame is not None and frame.f_code.co_filename.startswith(_PACKAGE_DIR):
+        frame = frame.f_back
+        stacklevel += 1
+    return stacklevel
+
+
+def budgeted_muncher(puid_muncher, budget):
+    # The tally is the puids counted but not yet added to the budget, and the limit at which they are
+    count = budget.issued if budget.path is not None else budget._count
+    tally = [0, budget._flush_limit(count)]
+    with budget._lock:
+        budget._tallies.append(tally)
+    added = budget._added
+
+    def budgeted(n_puids=None):
+        if n_puids is None:
+            n_tallied = tally[0] + 1
+            if n_tallied < tally[1]:
+                tally[0] = n_tallied
+                return puid_muncher()
+        else:
+            n_tallied = tally[0] + n_puids
+        tally[0] = 0
+        tally[1] = added(n_tallied)
+        return puid_muncher(n_puids)
+
+    # The tally is added and dropped with the muncher, e.g. at the end of its thread
+    finalize(budgeted, budget._retired, tally).atexit = False
+    return budgeted
+
+
+def _reset_forked():
+    for budget in list(_budgets):
+        budget._forked()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_forked)
+
+
+def _flush_counter_files():
+    for budget in list(_budgets):
+        if budget.path is not None:
+            budget.flush()
+
+
+def _flush_at_exit():
+    global _flushing_at_exit
+    if not _flushing_at_exit:
+        atexit.register(_flush_counter_files)
+        _flushing_at_exit = True
+
+
+def _read_count(path):
+    try:
+        with open(path, 'rb') as file:
+            return int(file.read(_COUNT_BYTES) or 0)
+    except FileNotFoundError:
+        return 0
+
+
+try:
+    import fcntl
+
+    def _locked(path, n_puids):
+        # Count of the counter file before and after adding n_puids, under an exclusive lock
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            before = int(os.pread(fd, _COUNT_BYTES, 0) or 0)
+            after = before + n_puids
+            data = str(after).encode('ascii')
+            os.pwrite(fd, data, 0)
+            os.ftruncate(fd, len(data))
+            return before, after
+        finally:
+            os.close(fd)
+
+except ImportError:  # pragma: no cover
+    _locked = None
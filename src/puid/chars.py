@@ -33,9 +33,9 @@ def valid_chars(chars):
     if len(chars) != len(set(chars)):
         raise NonUniqueChars('Characters are not unique')
 
-    for char in chars:
-        if not _valid_char(char):
-            raise InvalidChars(f'Invalid character with code: {ord(char)}')
+    if not _INVALID_CHARS.isdisjoint(chars):
+        char = next(char for char in chars if char in _INVALID_CHARS)
+        raise InvalidChars(f'Invalid character with code: {ord(char)}')
 
     return True
 
@@ -62,6 +62,10 @@ def _valid_char(char):
     return True
 
 
+# Invalid characters, all of which are below code point 161, checked as a set rather than per char
+_INVALID_CHARS = frozenset([chr(code) for code in range(161) if not _valid_char(chr(code))])
+
+
 class Chars(Enum):
     """
     Predefined Characters
@@ -96,6 +100,8 @@ class Chars(Enum):
 class ValidChars:
     """Base class for PredefinedChars and CustomChars"""
 
+    __slots__ = ('name', 'value')
+
     def __repr__(self):
         return "{0} -> '{1}'".format(self.name, self.value)
 
@@ -117,6 +123,8 @@ class PredefinedChars(ValidChars):
     This class is intended for internal use
     """
 
+    __slots__ = ()
+
     def __init__(self, chars):
         """
         Create a PredefinedChars for Chars enum
@@ -142,6 +150,8 @@ class CustomChars(ValidChars):
     This class is intended for internal use
     """
 
+    __slots__ = ()
+
     def __init__(self, chars):
         """
         Create a CustomChars for a string of characters
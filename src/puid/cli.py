@@ -14,8 +14,117 @@ Why does this file exist, and why not put this in __main__?
 
   Also see (1) from http://click.pocoo.org/5/setuptools/#setuptools-integration
 """
+import argparse
+import os
 import sys
 
+from puid import Chars
+from puid import Puid
+from puid.chars_error import CharsError
+from puid.puid import WRITE_CHUNK
+from puid.puid_error import PuidError
+
+FORMATS = ['lines', 'ndjson', 'csv', 'raw']
+
+# Separator after each fixed-width record written with --mmap, by format
+MMAP_SEPS = {'lines': '\n', 'raw': ''}
+
+
+def _chars_name(name):
+    try:
+        return Chars[name.upper().replace('-', '_')]
+    except KeyError:
+        raise argparse.ArgumentTypeError(f"unknown chars '{name}'")
+
+
+def _positive_int(value):
+    n = int(value)
+    if n <= 0:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a positive integer")
+    return n
+
+
+def _non_negative_int(value):
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a non-negative integer")
+    return n
+
+
+def _parser():
+    chars_names = ', '.join([chars.name.lower() for chars in Chars])
+    parser = argparse.ArgumentParser(prog='puid', description='Generate probably unique identifiers')
+
+    chars = parser.add_mutually_exclusive_group()
+    chars.add_argument('-c', '--chars', type=_chars_name, help=f'Pre-defined chars (default safe64): {chars_names}')
+    chars.add_argument('-C', '--custom', metavar='CHARS', help='Custom chars')
+
+    parser.add_argument('-b', '--bits', type=_positive_int, help='Entropy bits (default 128)')
+    parser.add_argument('-t', '--total', type=float, help='Total number of potential IDs')
+    parser.add_argument('-r', '--risk', type=float, help='Risk of repeat in total IDs')
+    parser.add_argument('-n', '--count', type=_non_negative_int, default=1, help='Number of IDs (default 1)')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='lines', help='Output format (default lines)')
+    parser.add_argument('-o', '--output', help='Output file (default stdout)')
+    parser.add_argument('-w', '--workers', type=_positive_int, default=1, help='Worker processes (default 1)')
+    parser.add_argument(
+        '-m',
+        '--mmap',
+        action='store_true',
+        help='Write fixed-width records into the memory-mapped --output file (lines or raw, ASCII chars)',
+    )
+    return parser
+
+
+def formatter(fmt, chars):
+    """
+    Function that joins a list of `puid`s into a chunk of output text of format `fmt`
+
+    `lines` writes each `puid` on its own line, `ndjson` a JSON object per line and `csv` a single `puid`
+    column, quoted if `chars` includes a comma. `raw` writes the fixed width `puid`s with no separators.
+    Valid chars exclude `"` and `\\`, so `puid`s never need escaping.
+
+    >>> formatter('ndjson', Chars.HEX)(['c0ffee', 'facade'])
+    '{"puid":"c0ffee"}\\n{"puid":"facade"}\\n'
+    """
+    if fmt == 'raw':
+        return ''.join
+
+    prefix, suffix = '', '\n'
+    if fmt == 'ndjson':
+        prefix, suffix = '{"puid":"', '"}\n'
+    elif fmt == 'csv' and ',' in chars.value:
+        prefix, suffix = '"', '"\n'
+
+    between = suffix + prefix
+
+    def format_chunk(puids):
+        return prefix + between.join(puids) + suffix if puids else ''
+
+    return format_chunk
+
+
+def header(fmt):
+    return 'puid\n' if fmt == 'csv' else ''
+
+
+def chunks(rand_id, count, workers):
+    if 1 < workers:
+        return rand_id.generate_parallel(count, workers=workers)
+    return (rand_id.generate_many(min(WRITE_CHUNK, count - start)) for start in range(0, count, WRITE_CHUNK))
+
+
+def write(rand_id, file, count, fmt='lines', workers=1):
+    """
+    Write `count` `puid`s of format `fmt` to the binary `file`, one UTF-8 encoded chunk per write
+
+    :return Number of `puid`s written
+    """
+    format_chunk = formatter(fmt, rand_id.chars)
+    file.write(header(fmt).encode('utf-8'))
+    for puids in chunks(rand_id, count, workers):
+        file.write(format_chunk(puids).encode('utf-8'))
+    return count
+
 
 def main(argv=sys.argv):
     """
@@ -25,7 +134,37 @@ def main(argv=sys.argv):
     Returns:
         int: A return code
 
-    Does stuff.
+    Writes `--count` `puid`s to `--output` or stdout.
     """
-    print(argv)
+    parser = _parser()
+    args = parser.parse_args(argv[1:])
+
+    try:
+        rand_id = Puid(total=args.total, risk=args.risk, bits=args.bits, chars=args.custom or args.chars)
+    except (PuidError, CharsError) as error:
+        parser.error(str(error))
+
+    if args.mmap:
+        if args.output is None:
+            parser.error('--mmap requires --output')
+        if args.format not in MMAP_SEPS:
+            parser.error(f"--mmap requires format {' or '.join(MMAP_SEPS)}")
+        try:
+            rand_id.write_mmap(args.output, args.count, MMAP_SEPS[args.format], args.workers)
+        except PuidError as error:
+            parser.error(str(error))
+        return 0
+
+    if args.output is None:
+        try:
+            write(rand_id, sys.stdout.buffer, args.count, args.format, args.workers)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # Downstream of a pipeline closed early, e.g. `puid -n 1000000 | head`
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+    else:
+        with open(args.output, 'wb') as file:
+            write(rand_id, file, args.count, args.format, args.workers)
+
     return 0
@@ -0,0 +1,240 @@
+"""
+Encoding of `puid`s directly from entropy bytes using stdlib codecs
+
+When the number of characters is 2, 4, 8, 16, 32, 64 or 256, the bits sliced for each character line
+up with a standard byte codec once the bits are padded to a whole group of bytes. The codec output is
+then translated from the codec alphabet to the `puid` characters, so the per character work is done
+in C rather than by the Python muncher. The exception is `base64.b32encode`, which is pure Python, so
+the codec is not the default engine for 32 characters.
+
+Bits are taken from the entropy stream exactly as the muncher slices them, with any unused bits
+carried forward, so the same entropy bytes yield the same `puid`s.
+"""
+from functools import lru_cache
+from binascii import b2a_base64, hexlify
+from math import ceil, log2
+
+_BASE32_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'
+_BASE64_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def _translated(alphabet, chars, as_bytes=False):
+    # Translation of codec output bytes in alphabet to a str of chars, or to UTF-8 bytes of chars
+    if chars.isascii():
+        chars_bytes = chars.encode('ascii')
+        if alphabet == chars_bytes:
+            return (lambda data: data) if as_bytes else (lambda data: data.decode('ascii'))
+
+        table = bytes.maketrans(alphabet, chars_bytes)
+        if as_bytes:
+            return lambda data: data.translate(table)
+        return lambda data: data.translate(table).decode('ascii')
+
+    # Joined from a table of each alphabet byte, which is faster than str.translate beyond latin-1
+    byte_chars = [''] * 256
+    for byte, char in zip(alphabet, chars):
+        byte_chars[byte] = char.encode('utf-8') if as_bytes else char
+    if as_bytes:
+        return lambda data: b''.join([byte_chars[byte] for byte in data])
+    return lambda data: ''.join([byte_chars[byte] for byte in data])
+
+
+def _grouped(chars, n_bits_per_char, as_bytes=False):
+    # Each byte encodes to a group of 8 / n_bits_per_char characters
+    n_chars_per_byte = 8 // n_bits_per_char
+    mask = len(chars) - 1
+    shifts = [8 - n_bits_per_char * (ndx + 1) for ndx in range(n_chars_per_byte)]
+    byte_chars = ["".join([chars[(byte >> shift) & mask] for shift in shifts]) for byte in range(256)]
+
+    def encoded(data, n_chars):
+        return data.decode('latin-1').translate(byte_chars)[:n_chars]
+
+    if as_bytes and chars.isascii():
+        byte_groups = [group.encode('ascii') for group in byte_chars]
+
+        def encoded_bytes(data, n_chars):
+            return b''.join(map(byte_groups.__getitem__, data))[:n_chars]
+
+        return encoded_bytes
+
+    if as_bytes:
+        # Groups of UTF-8 chars cannot be cut at n_chars as bytes
+        def encoded_utf8(data, n_chars):
+            return encoded(data, n_chars).encode('utf-8')
+
+        return encoded_utf8
+
+    return encoded
+
+
+def _octal(chars, as_bytes=False):
+    translated = _translated(b'01234567', chars, as_bytes)
+
+    def encoded(data, n_chars):
+        octal = b'%0*o' % (8 * len(data) // 3, int.from_bytes(data, 'big'))
+        return translated(octal[:n_chars])
+
+    return encoded
+
+
+def _hex(chars, as_bytes=False):
+    translated = _translated(b'0123456789abcdef', chars, as_bytes)
+
+    def encoded(data, n_chars):
+        return translated(hexlify(data)[:n_chars])
+
+    return encoded
+
+
+def _base32(chars, as_bytes=False):
+    # base64 imports re, so it is imported only by base32 chars
+    from base64 import b32encode
+
+    translated = _translated(_BASE32_ALPHABET, chars, as_bytes)
+
+    def encoded(data, n_chars):
+        return translated(b32encode(data)[:n_chars])
+
+    return encoded
+
+
+def _base64(chars, as_bytes=False):
+    translated = _translated(_BASE64_ALPHABET, chars, as_bytes)
+
+    def encoded(data, n_chars):
+        return translated(b2a_base64(data, newline=False)[:n_chars])
+
+    return encoded
+
+
+def _byte(chars, as_bytes=False):
+    translated = _translated(bytes(range(256)), chars, as_bytes)
+
+    def encoded(data, n_chars):
+        return translated(data[:n_chars])
+
+    return encoded
+
+
+# Bits per char: (bits per group of bytes encoded by the codec, codec encoder)
+_codecs = {
+    1: (8, lambda chars, as_bytes=False: _grouped(chars, 1, as_bytes)),
+    2: (8, lambda chars, as_bytes=False: _grouped(chars, 2, as_bytes)),
+    3: (24, _octal),
+    4: (8, _hex),
+    5: (40, _base32),
+    6: (24, _base64),
+    8: (8, _byte),
+}
+
+
+# Max codec encoders kept for reuse
+CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _chars_codec(n_bits_per_char, chars, as_bytes=False):
+    # Encoders are stateless, so Puids of the same chars share one
+    return _codecs[n_bits_per_char][1](chars, as_bytes)
+
+
+def encodable(n_chars):
+    """
+    Whether `n_chars` characters can be encoded by a stdlib codec
+
+    >>> encodable(64)
+    True
+
+    >>> encodable(36)
+    False
+    """
+    n_bits_per_char = log2(n_chars)
+    return n_bits_per_char.is_integer() and round(n_bits_per_char) in _codecs
+
+
+def preferred(n_chars):
+    """
+    Whether the codec is the default engine for `n_chars` characters
+
+    The base32 codec encodes in pure Python, and is slower than the Python muncher for single `puid`s.
+
+    >>> preferred(64)
+    True
+
+    >>> preferred(32)
+    False
+    """
+    return encodable(n_chars) and n_chars != 32
+
+
+def codec_muncher(chars, puid_len, entropy_fn, as_bytes=False):
+    """
+    Muncher of encoded `puid`s for chars with a stdlib codec
+
+    The returned function mirrors the bits muncher: called with no argument it returns a `puid` str,
+    and called with `n_puids` it returns a list of `n_puids` `puid` strs sliced from one fetch of
+    entropy. With `as_bytes`, a `puid` is UTF-8 bytes. `n_puids` `puid`s of ASCII chars are joined
+    into a single bytes, and of other chars are a list of bytes.
+
+    :param chars: ValidChars
+    :param puid_len: Length of each `puid`
+    :param entropy_fn: Function of n returning n random bytes
+    :param as_bytes: Whether `puid`s are UTF-8 bytes rather than strs
+    :return Function
+    """
+    n_bits_per_char = round(log2(len(chars)))
+    n_group_bits = _codecs[n_bits_per_char][0]
+    encoded = _chars_codec(n_bits_per_char, chars.value, as_bytes)
+
+    n_bits_per_puid = n_bits_per_char * puid_len
+    n_bytes_per_puid = n_bits_per_puid // 8
+
+    # UTF-8 bytes of a batch vary in width per puid, so batches are encoded as strs and split
+    utf8 = as_bytes and not chars.value.isascii()
+    encoded_many = _chars_codec(n_bits_per_char, chars.value) if utf8 else encoded
+
+    def split(encoded_chars):
+        if as_bytes and not utf8:
+            return encoded_chars
+        puids = [encoded_chars[ndx : ndx + puid_len] for ndx in range(0, len(encoded_chars), puid_len)]
+        return [puid.encode('utf-8') for puid in puids] if utf8 else puids
+
+    if n_bits_per_puid % n_group_bits == 0:
+        #  Each puid spans whole codec groups, so entropy bytes are encoded as is and no bits are carried
+        def aligned_muncher(n_puids=None):
+            if n_puids is None:
+                return encoded(entropy_fn(n_bytes_per_puid), puid_len)
+
+            return split(encoded_many(entropy_fn(n_puids * n_bytes_per_puid), n_puids * puid_len))
+
+        return aligned_muncher
+
+    carry = 0
+    n_carry = 0
+
+    def padding(n_bits):
+        # Pad bits and bytes for n_bits padded to a whole number of codec groups
+        n_groups = ceil(n_bits / n_group_bits)
+        return (n_groups * n_group_bits - n_bits, n_groups * n_group_bits // 8)
+
+    def sliced(n_bits, n_pad_bits, n_bytes):
+        # Left aligned bytes of the next n_bits of entropy, padded to n_bytes
+        nonlocal carry, n_carry
+        n_entropy_bytes = (n_bits - n_carry + 7) // 8
+        value = (carry << 8 * n_entropy_bytes) | int.from_bytes(entropy_fn(n_entropy_bytes), 'big')
+
+        n_carry += 8 * n_entropy_bytes - n_bits
+        carry = value & ((1 << n_carry) - 1)
+
+        return ((value >> n_carry) << n_pad_bits).to_bytes(n_bytes, 'big')
+
+    n_puid_pad_bits, n_puid_bytes = padding(n_bits_per_puid)
+
+    def carry_muncher(n_puids=None):
+        if n_puids is None:
+            return encoded(sliced(n_bits_per_puid, n_puid_pad_bits, n_puid_bytes), puid_len)
+
+        n_bits = n_puids * n_bits_per_puid
+        return split(encoded_many(sliced(n_bits, *padding(n_bits)), n_puids * puid_len))
+
+    return carry_muncher
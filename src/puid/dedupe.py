@@ -0,0 +1,389 @@
+"""
+Runtime detection of repeated `puid`s
+
+A `Dedupe` records each checked `puid` in an open addressing hash table of fixed width keys, so memory
+scales with the entropy bits of a `puid` rather than with Python objects.
+
+- Exact mode stores the packed form of each `puid` in full and grows as needed, so reported repeats
+  are real.
+- Filter mode, for a `total` and `risk`, stores fixed-size fingerprints in a table sized for `total`
+  `puid`s, so memory is bounded. Fingerprints are sized so that the chance of reporting a repeat that
+  is not one, within `total` checks, is about 1 in `risk`.
+
+With NumPy, a batch of `puid`s is checked at once, a probe step per round, with keys held as rows of
+uint64 words. Otherwise each `puid` is checked in turn, with keys held in an `array` or `bytearray`.
+"""
+from array import array
+from hashlib import blake2b
+from math import ceil, log2
+
+from puid import vector
+from puid.entropy import bits_for_total_risk
+from puid.puid_error import TotalRiskError
+
+# Max load of the table before an exact table grows or a filter table stops adding fingerprints
+MAX_LOAD = 0.5
+
+# Bits of each of the slot and fingerprint halves of a puid digest
+_HASH_BITS = 64
+
+# Multiplier spreading the first packed word of an exact key over the table slots
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+class Dedupe:
+    """
+    Detector of repeated `puid`s of a `Puid`
+
+    >>> from puid import Chars, Puid
+    >>> dedupe = Dedupe(Puid(bits=32, chars=Chars.HEX))
+    >>> [dedupe.check(puid) for puid in ['c0ffee42', 'facade00', 'c0ffee42']]
+    [False, False, True]
+
+    :param rand_id: Puid of the checked `puid`s
+    :param total: Total number of `puid`s checked in filter mode
+    :param risk: Risk of a false repeat report in `total` checks in filter mode
+    :param on_repeat: Function called with each repeated `puid`
+    """
+
+    def __init__(self, rand_id, total=None, risk=None, on_repeat=None):
+        if (total is None) != (risk is None):
+            raise TotalRiskError('filter mode requires both total and risk')
+        if total is not None:
+            bits_for_total_risk(total, risk)
+
+        self.rand_id = rand_id
+        self.total = total
+        self.risk = risk
+        self.on_repeat = on_repeat
+        self.n_checked = 0
+        self.n_repeats = 0
+        self.n_stored = 0
+        self._key_offset = 0
+
+        if total is None:
+            self.mode = 'exact'
+            self._keyed = rand_id.to_int
+            self._shift = 0
+            if vector.available():
+                n_chars_per_word = max(1, int(63 // log2(len(rand_id.chars))))
+                self._init_table(1 << 10, 8 * ceil(rand_id.len / n_chars_per_word), vectorized=True)
+            else:
+                self._init_table(1 << 10, rand_id.packed_len)
+            return
+
+        self.mode = 'filter'
+        n_slots = 1 << max(1, ceil(log2(max(1, total) / MAX_LOAD)))
+        # Each check compares fingerprints along its probe run, a few slots at MAX_LOAD
+        n_fingerprint_bits = ceil(log2(max(1, total)) + log2(max(1, risk)) + 2)
+        if n_fingerprint_bits <= _HASH_BITS:
+            # Digests are quicker than packing and, unlike str hashes, the same in every process: the
+            # slot is from the low half of a digest of the puid, and the fingerprint from the high half
+            self._keyed = _hashed
+            self._shift = _HASH_BITS
+            n_key_bytes = (n_fingerprint_bits + 7) // 8
+            self._key_mask = (1 << 8 * n_key_bytes) - 1
+            words = True
+        else:
+            # Fingerprints are the low packed bits, slot bits included so that keys probed past their
+            # slot never match keys of another slot, and for a puid of few bits are all of its bits.
+            # Stored in words, they are offset by 1 so that 0 still marks an empty slot.
+            self._keyed = rand_id.to_int
+            self._shift = 0
+            n_fingerprint_bits = min(n_fingerprint_bits, ceil(rand_id.bits))
+            n_key_bytes = (n_fingerprint_bits + 7) // 8
+            self._key_mask = (1 << n_fingerprint_bits) - 1
+            words = n_fingerprint_bits < 64
+            self._key_offset = 1 if words else 0
+        self._init_table(n_slots, n_key_bytes, words, words and vector.available())
+
+    def _init_table(self, n_slots, key_bytes, words=False, vectorized=False):
+        self._n_slots = n_slots
+        self._key_bytes = key_bytes
+        self._words = words
+        self._vectorized = vectorized
+        if vectorized:
+            # Rows of uint64 words, with a 0 first word marking an empty slot
+            self._occupied = None
+            self._table = vector.np.zeros((n_slots, max(1, key_bytes // 8)), dtype=vector.np.uint64)
+        elif words:
+            self._occupied = None
+            self._table = array('Q', bytes(8 * n_slots))
+        else:
+            self._occupied = bytearray(n_slots)
+            self._table = bytearray(n_slots * key_bytes)
+
+    @property
+    def saturated(self):
+        """Whether a filter table is full, so further `puid`s are checked but not added"""
+        return self.mode == 'filter' and self._n_slots * MAX_LOAD <= self.n_stored
+
+    @property
+    def nbytes(self):
+        """Bytes of the table"""
+        if self._vectorized:
+            return self._table.nbytes
+        if self._words:
+            return 8 * self._n_slots
+        return self._n_slots * (self._key_bytes + 1)
+
+    def __len__(self):
+        return self.n_stored
+
+    def _grown(self):
+        # Exact table doubled, with every key rehashed from its packed value
+        key_bytes = self._key_bytes
+        occupied = self._occupied
+        table = self._table
+        keys = [table[slot * key_bytes : (slot + 1) * key_bytes] for slot in range(self._n_slots) if occupied[slot]]
+
+        self._init_table(2 * self._n_slots, key_bytes)
+        mask = self._n_slots - 1
+        occupied = self._occupied
+        table = self._table
+        for key in keys:
+            slot = int.from_bytes(key, 'little') & mask
+            while occupied[slot]:
+                slot = (slot + 1) & mask
+            occupied[slot] = 1
+            table[slot * key_bytes : (slot + 1) * key_bytes] = key
+
+    def check_many(self, puids):
+        """
+        Check each of `puids`, recording those not seen before
+
+        :param puids: Iterable of `puid` strs
+        :return list of the `puid`s reported as repeats
+        """
+        if self._vectorized:
+            repeats = self._checked_vector(puids if isinstance(puids, list) else list(puids))
+        elif self._words:
+            repeats = self._checked_words(puids)
+        else:
+            repeats = self._checked_bytes(puids)
+
+        self.n_repeats += len(repeats)
+        if self.on_repeat is not None:
+            for puid in repeats:
+                self.on_repeat(puid)
+        return repeats
+
+    def _checked_words(self, puids):
+        # Fingerprints of up to 64 bits are array ints, with 0 marking an empty slot
+        keyed = self._keyed
+        key_mask = self._key_mask
+        key_offset = self._key_offset
+        shift = self._shift
+        mask = self._n_slots - 1
+        max_stored = self._n_slots * MAX_LOAD
+        n_stored = self.n_stored
+        table = self._table
+        repeats = []
+
+        n_checked = 0
+        for puid in puids:
+            n_checked += 1
+            key_int = keyed(puid)
+            slot = key_int & mask
+            key = ((key_int >> shift & key_mask) + key_offset) or 1
+            stored = table[slot]
+            while stored:
+                if stored == key:
+                    repeats.append(puid)
+                    break
+                slot = (slot + 1) & mask
+                stored = table[slot]
+            else:
+                if n_stored < max_stored:
+                    table[slot] = key
+                    n_stored += 1
+
+        self.n_stored = n_stored
+        self.n_checked += n_checked
+        return repeats
+
+    def _checked_vector(self, puids):
+        np = vector.np
+        n_puids = len(puids)
+        if self.mode == 'exact':
+            keys = vector.packed_words(puids, self.rand_id.chars, self.rand_id.len)
+            # First words are less than 2**63, so offset by 1 they are never 0
+            keys[:, 0] += np.uint64(1)
+            while self._n_slots * MAX_LOAD < self.n_stored + n_puids:
+                self._grown_vector()
+            slots = self._exact_slots(keys)
+        else:
+            mask = self._n_slots - 1
+            key_mask = self._key_mask
+            if self._keyed is _hashed:
+                digests = self._digests(puids)
+                slots = (digests[:, 0] & np.uint64(mask)).astype(np.int64)
+                fingerprints = digests[:, 1] & np.uint64(key_mask)
+            else:
+                key_ints = [self._keyed(puid) for puid in puids]
+                slots = np.array([key_int & mask for key_int in key_ints], dtype=np.int64)
+                shift, key_offset = self._shift, self._key_offset
+                fingerprints = np.array([(key_int >> shift & key_mask) + key_offset for key_int in key_ints], dtype=np.uint64)
+            fingerprints[fingerprints == 0] = 1
+            keys = fingerprints.reshape(n_puids, 1)
+
+        repeated = self._probed(slots, keys)
+        self.n_checked += n_puids
+        return [puids[ndx] for ndx in np.flatnonzero(repeated)]
+
+    def _digests(self, puids):
+        # Digests of a batch: puids of the Puid's length and encoding are hashed at once, and any others,
+        # which never equal a puid of the Puid, by blake2b, so a puid has the same digest in any batch
+        np = vector.np
+        n_puids = len(puids)
+        puid_len = self.rand_id.len
+        chars_ascii = self.rand_id.chars.value.isascii()
+        encoding = 'ascii' if chars_ascii else 'utf-32-le'
+
+        joined = ''.join(puids)
+        if len(joined) == n_puids * puid_len and (joined.isascii() or not chars_ascii):
+            lens = np.fromiter(map(len, puids), dtype=np.int64, count=n_puids)
+            if np.all(lens == puid_len):
+                return vector.digest_words(joined.encode(encoding, 'surrogatepass'), n_puids)
+
+        hashable = np.array([len(puid) == puid_len and (puid.isascii() or not chars_ascii) for puid in puids], dtype=bool)
+        digests = np.empty((n_puids, 2), dtype=np.uint64)
+        hashed = ''.join([puid for puid, is_hashable in zip(puids, hashable) if is_hashable])
+        digests[hashable] = vector.digest_words(hashed.encode(encoding, 'surrogatepass'), int(hashable.sum()))
+        others = [puid for puid, is_hashable in zip(puids, hashable) if not is_hashable]
+        digests[~hashable] = np.frombuffer(b''.join(map(_digest, others)), dtype='<u8').reshape(len(others), 2)
+        return digests
+
+    def _exact_slots(self, keys):
+        np = vector.np
+        n_slot_bits = self._n_slots.bit_length() - 1
+        return ((keys[:, 0] * np.uint64(_GOLDEN)) >> np.uint64(64 - n_slot_bits)).astype(np.int64)
+
+    def _grown_vector(self):
+        # Exact table doubled, with every stored key probed into the new table
+        table = self._table
+        keys = table[table[:, 0] != 0]
+        self._init_table(2 * self._n_slots, self._key_bytes, vectorized=True)
+        self.n_stored = 0
+        self._probed(self._exact_slots(keys), keys)
+
+    def _probed(self, slots, keys):
+        # Linear probing of all keys at once, a probe step per round. Of the keys reaching the same
+        # empty slot in a round the first is stored, and the others probe the slot again next round.
+        np = vector.np
+        table = self._table
+        mask = self._n_slots - 1
+        n_room = int(self._n_slots * MAX_LOAD) - self.n_stored
+        repeated = np.zeros(len(keys), dtype=bool)
+
+        # Least key index reaching each slot in a round, n_keys where none does
+        n_keys = len(keys)
+        firsts = np.full(self._n_slots, n_keys, dtype=np.int64)
+
+        pending = np.arange(n_keys)
+        while pending.size:
+            stored = table[slots[pending]]
+            found = np.all(stored == keys[pending], axis=1)
+            repeated[pending[found]] = True
+            empty = stored[:, 0] == 0
+
+            reached = pending[empty]
+            waiting = reached[:0]
+            if reached.size and 0 < n_room:
+                reached_slots = slots[reached]
+                np.minimum.at(firsts, reached_slots, reached)
+                added = np.sort(reached[firsts[reached_slots] == reached])[:n_room]
+                firsts[reached_slots] = n_keys
+                table[slots[added]] = keys[added]
+                n_room -= added.size
+                self.n_stored += added.size
+                waiting = np.setdiff1d(reached, added, assume_unique=True)
+
+            probing = pending[~found & ~empty]
+            slots[probing] = (slots[probing] + 1) & mask
+            pending = np.concatenate([waiting, probing])
+
+        return repeated
+
+    def _checked_bytes(self, puids):
+        # Exact keys are whole packed puids, and fingerprints the key bits above the slot bits
+        keyed = self._keyed
+        key_bytes = self._key_bytes
+        exact = self.mode == 'exact'
+        key_mask = self._key_mask if not exact else (1 << 8 * key_bytes) - 1
+        shift = self._shift
+        mask = self._n_slots - 1
+        max_stored = self._n_slots * MAX_LOAD
+        n_stored = self.n_stored
+        occupied = self._occupied
+        table = self._table
+        repeats = []
+
+        n_checked = 0
+        for puid in puids:
+            n_checked += 1
+            key_int = keyed(puid)
+            slot = key_int & mask
+            key = (key_int >> shift & key_mask).to_bytes(key_bytes, 'little')
+
+            while occupied[slot]:
+                ndx = slot * key_bytes
+                if table[ndx : ndx + key_bytes] == key:
+                    repeats.append(puid)
+                    break
+                slot = (slot + 1) & mask
+            else:
+                if n_stored < max_stored:
+                    occupied[slot] = 1
+                    ndx = slot * key_bytes
+                    table[ndx : ndx + key_bytes] = key
+                    n_stored += 1
+                    if exact and max_stored <= n_stored:
+                        self.n_stored = n_stored
+                        self._grown()
+                        mask = self._n_slots - 1
+                        max_stored = self._n_slots * MAX_LOAD
+                        occupied = self._occupied
+                        table = self._table
+
+        self.n_stored = n_stored
+        self.n_checked += n_checked
+        return repeats
+
+    def check(self, puid):
+        """
+        Check `puid`, recording it if not seen before
+
+        :param puid: `puid` str
+        :return Whether `puid` is reported as a repeat
+        """
+        return bool(self.check_many([puid]))
+
+    def generate(self):
+        """
+        Generate a checked `puid`
+        """
+        puid = self.rand_id.generate()
+        self.check_many([puid])
+        return puid
+
+    def generate_many(self, n):
+        """
+        Generate `n` checked `puid`s
+
+        :param n: Number of `puid`s
+        :return list
+        """
+        puids = self.rand_id.generate_many(n)
+        self.check_many(puids)
+        return puids
+
+
+def _digest(puid):
+    # 128 bit digest of a puid, stable across processes unlike str hashes
+    return blake2b(puid.encode('utf-8'), digest_size=2 * _HASH_BITS // 8).digest()
+
+
+def _hashed(puid):
+    # Fingerprint hash in the high bits and slot hash in the low bits
+    return int.from_bytes(_digest(puid), 'little')
@@ -1,82 +1,156 @@
+from functools import lru_cache
+from importlib import import_module
+
 from puid.chars import Chars
-from puid.encoders.alpha import alpha
-from puid.encoders.alpha import alpha_lower
-from puid.encoders.alpha import alpha_upper
-from puid.encoders.alphanum import alphanum
-from puid.encoders.alphanum import alphanum_lower
-from puid.encoders.alphanum import alphanum_upper
-from puid.encoders.base16 import base16
-from puid.encoders.base32 import base32
-from puid.encoders.base32 import base32_hex
-from puid.encoders.base32 import base32_hex_upper
-from puid.encoders.crockford32 import crockford32
 from puid.encoders.custom import custom
-from puid.encoders.decimal import decimal
-from puid.encoders.hex import hex_lower
-from puid.encoders.hex import hex_upper
-from puid.encoders.safe32 import safe32
-from puid.encoders.safe64 import safe64
-from puid.encoders.safe_ascii import safe_ascii
-from puid.encoders.symbol import symbol
-from puid.encoders.word_safe32 import word_safe32
+
+# Module and name of the encoder of each predefined chars, imported on first use
+_encoders = {
+    Chars.ALPHA.name: ('alpha', 'alpha'),
+    Chars.ALPHA_LOWER.name: ('alpha', 'alpha_lower'),
+    Chars.ALPHA_UPPER.name: ('alpha', 'alpha_upper'),
+    Chars.ALPHANUM.name: ('alphanum', 'alphanum'),
+    Chars.ALPHANUM_LOWER.name: ('alphanum', 'alphanum_lower'),
+    Chars.ALPHANUM_UPPER.name: ('alphanum', 'alphanum_upper'),
+    Chars.BASE16.name: ('base16', 'base16'),
+    Chars.BASE32.name: ('base32', 'base32'),
+    Chars.BASE32_HEX.name: ('base32', 'base32_hex'),
+    Chars.BASE32_HEX_UPPER.name: ('base32', 'base32_hex_upper'),
+    Chars.CROCKFORD32.name: ('crockford32', 'crockford32'),
+    Chars.DECIMAL.name: ('decimal', 'decimal'),
+    Chars.HEX.name: ('hex', 'hex_lower'),
+    Chars.HEX_UPPER.name: ('hex', 'hex_upper'),
+    Chars.SAFE32.name: ('safe32', 'safe32'),
+    Chars.SAFE64.name: ('safe64', 'safe64'),
+    Chars.SAFE_ASCII.name: ('safe_ascii', 'safe_ascii'),
+    Chars.SYMBOL.name: ('symbol', 'symbol'),
+    Chars.WORD_SAFE32.name: ('word_safe32', 'word_safe32'),
+}
+
+# Encoding tables of predefined chars, compiled on first use
+_encoding_tables = {}
+
+# Max encoding tables of custom chars kept for reuse
+CACHE_SIZE = 256
 
 
 def encoder(chars: Chars):
-    if chars.name == Chars.ALPHA.name:
-        return alpha()
+    encoder_name = _encoders.get(chars.name)
+    if encoder_name is None:
+        return custom(chars)
+    module, name = encoder_name
+    return getattr(import_module(f'puid.encoders.{module}'), name)()
+
+
+def encoding_table(chars):
+    """
+    Translation table from slice values to characters
+
+    For ASCII characters the table is a `bytes` table for `bytes.translate`, otherwise it is the `str`
+    of characters indexed by value. Tables for predefined chars are compiled once, and for the
+    `CACHE_SIZE` most recently used custom chars are reused.
+
+    :param chars: ValidChars
+    :return bytes or str
+    """
+    if chars.name not in _encoders:
+        return _custom_table(chars.value)
+
+    table = _encoding_tables.get(chars.name)
+    if table is None:
+        chars_encoder = encoder(chars)
+        table = _encoding_tables[chars.name] = _table([chars_encoder(value) for value in range(len(chars))])
+    return table
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _custom_table(chars_value):
+    return _table([ord(char) for char in chars_value])
+
+
+def _table(codes):
+    if max(codes) < 128:
+        return bytes(codes).ljust(256, b'\0')
+    return "".join([chr(code) for code in codes])
+
+
+def utf8_table(chars):
+    """
+    UTF-8 bytes of each character, indexed by slice value
+
+    >>> from puid.chars import CustomChars
+    >>> utf8_table(CustomChars('aé€'))
+    (b'a', b'\\xc3\\xa9', b'\\xe2\\x82\\xac')
+
+    :param chars: ValidChars
+    :return tuple of bytes
+    """
+    return _utf8_table(chars.value)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _utf8_table(chars_value):
+    return tuple([char.encode('utf-8') for char in chars_value])
+
+
+def encoding(chars):
+    """
+    Encoder of a sequence of slice values into a string of characters
 
-    if chars.name == Chars.ALPHA_LOWER.name:
-        return alpha_lower()
+    ASCII characters are encoded by a translation table in a couple of C-level calls, rather than a
+    Python call per character. Other characters are joined from a table of the character of each
+    value, which is faster than `str.translate` to characters outside latin-1.
 
-    if chars.name == Chars.ALPHA_UPPER.name:
-        return alpha_upper()
+    :param chars: ValidChars
+    :return Function mapping a sequence of slice values to a str
+    """
+    table = encoding_table(chars)
 
-    if chars.name == Chars.ALPHANUM.name:
-        return alphanum()
+    if isinstance(table, bytes):
 
-    if chars.name == Chars.ALPHANUM_LOWER.name:
-        return alphanum_lower()
+        def encoded(values):
+            return bytes(values).translate(table).decode('ascii')
 
-    if chars.name == Chars.ALPHANUM_UPPER.name:
-        return alphanum_upper()
+    else:
+        value_chars = tuple(table)
 
-    if chars.name == Chars.BASE16.name:
-        return base16()
+        def encoded(values):
+            return ''.join([value_chars[value] for value in values])
 
-    if chars.name == Chars.BASE32.name:
-        return base32()
+    return encoded
 
-    if chars.name == Chars.BASE32_HEX.name:
-        return base32_hex()
 
-    if chars.name == Chars.BASE32_HEX_UPPER.name:
-        return base32_hex_upper()
+def byte_encoding(chars):
+    """
+    Encoder of a sequence of slice values into ASCII bytes of characters
 
-    if chars.name == Chars.CROCKFORD32.name:
-        return crockford32()
+    :param chars: ValidChars of ASCII characters
+    :return Function mapping a sequence of slice values to bytes
+    """
+    table = encoding_table(chars)
 
-    if chars.name == Chars.DECIMAL.name:
-        return decimal()
+    def encoded(values):
+        return bytes(values).translate(table)
 
-    if chars.name == Chars.HEX.name:
-        return hex_lower()
+    return encoded
 
-    if chars.name == Chars.HEX_UPPER.name:
-        return hex_upper()
 
-    if chars.name == Chars.SAFE32.name:
-        return safe32()
+def utf8_encoding(chars):
+    """
+    Encoder of a sequence of slice values into UTF-8 bytes of characters
 
-    if chars.name == Chars.SAFE64.name:
-        return safe64()
+    The UTF-8 bytes of each value are joined from `utf8_table`, so there is no intermediate str to
+    encode. For ASCII characters this is `byte_encoding`.
 
-    if chars.name == Chars.SAFE_ASCII.name:
-        return safe_ascii()
+    :param chars: ValidChars
+    :return Function mapping a sequence of slice values to bytes
+    """
+    if chars.value.isascii():
+        return byte_encoding(chars)
 
-    if chars.name == Chars.SYMBOL.name:
-        return symbol()
+    table = utf8_table(chars)
 
-    if chars.name == Chars.WORD_SAFE32.name:
-        return word_safe32()
+    def encoded(values):
+        return b''.join([table[value] for value in values])
 
-    return custom(chars)
+    return encoded
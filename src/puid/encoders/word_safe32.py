@@ -2,21 +2,21 @@
 # c: 23456789 C FGH J M PQR VWX c fgh j m pqr vwx
 
 def word_safe32():
-    def encoder(n):
-        two = ord("2")
-        C = ord("C")
-        F = ord("F")
-        J = ord("J")
-        M = ord("M")
-        P = ord("P")
-        V = ord("V")
-        c = ord("c")
-        f = ord("f")
-        j = ord("j")
-        m = ord("m")
-        p = ord("p")
-        v = ord("v")
+    two = ord("2")
+    C = ord("C")
+    F = ord("F")
+    J = ord("J")
+    M = ord("M")
+    P = ord("P")
+    V = ord("V")
+    c = ord("c")
+    f = ord("f")
+    j = ord("j")
+    m = ord("m")
+    p = ord("p")
+    v = ord("v")
 
+    def encoder(n):
         if (n < 8):
             return n + two
         if (n == 8):
@@ -1,4 +1,4 @@
-from math import ceil, log2, trunc
+from math import ceil, inf, log2, trunc
 
 from puid.chars import ValidChars
 from puid.chars_error import InvalidChars
@@ -39,6 +39,27 @@ def bits_for_total_risk(total: 0, risk: 0):
         return 2 * log2(total) + log2(risk) - 1
 
 
+def risk_for_total_bits(total, bits):
+    """
+    Risk of repeat in a `total` `puid`s of `bits` entropy bits, the inverse of `bits_for_total_risk`
+
+    :param total: int
+    :param bits: float
+    :return float, 1 in which a repeat is expected
+
+    >>> round(risk_for_total_bits(100_000, 72.08241808752197))
+    1000000000000
+    """
+    if total in [0, 1]:
+        return inf
+
+    if total < 1000:
+        n_risk_bits = bits + 1 - log2(total) - log2(total - 1)
+    else:
+        n_risk_bits = bits + 1 - 2 * log2(total)
+    return 2**n_risk_bits if n_risk_bits < 1024 else inf
+
+
 def bits_per_char(chars):
     """
     Entropy bits per character for either a predefined Chars enum or a string of characters
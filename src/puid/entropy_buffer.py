@@ -0,0 +1,154 @@
+"""
+Read-ahead buffering of entropy bytes
+
+The muncher asks its entropy source for only the few bytes each `puid` needs. An `EntropyBuffer`
+instead fetches entropy in large blocks and serves those requests from memory, optionally fetching the
+next block in a background thread.
+"""
+import os
+import weakref
+from queue import Queue
+from threading import Event, Lock, Thread
+
+from puid.puid_error import EntropyBufferError
+
+# Default bytes per fetch from the entropy source
+DEFAULT_SIZE = 64 * 1024
+
+
+# Buffers to reset in a forked child process
+_buffers = weakref.WeakSet()
+
+
+def _reset_buffers():
+    for entropy_buffer in list(_buffers):
+        entropy_buffer._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_buffers)
+
+
+def _refill_worker(entropy_fn, size, blocks, stopped):
+    # Keep the next block fetched; the queue holds one block so the worker blocks until it is taken. An
+    # error of entropy_fn is handed to the waiting refill in place of a block, and ends the worker.
+    while not stopped.is_set():
+        try:
+            block = entropy_fn(size)
+        except Exception as error:
+            blocks.put(error)
+            return
+        blocks.put(block)
+
+
+class EntropyBuffer:
+    """
+    Entropy source serving bytes from blocks of `size` bytes fetched from `entropy_fn`
+
+    Bytes are served in the order `entropy_fn` produces them, so a `Puid` using the buffer slices the
+    same bits as it would from `entropy_fn` directly.
+
+    With `background=True`, a daemon thread fetches the next block while the current block is served,
+    so only a request that outpaces the thread waits on `entropy_fn`. Call `close` to stop the thread,
+    which otherwise stops when the buffer is garbage collected.
+
+    An error of `entropy_fn` is raised by the request that waits on the failed fetch, and the thread is
+    restarted for later requests.
+
+    Buffered bytes are discarded in a forked child process, which would otherwise serve the same bytes
+    as its parent.
+
+    :param entropy_fn: Function of n returning n random bytes
+    :param size: Bytes per fetch from `entropy_fn`
+    :param background: Whether to fetch the next block in a background thread
+
+    >>> entropy_buffer = EntropyBuffer(size=1024)
+    >>> len(entropy_buffer(16))
+    16
+    >>> entropy_buffer.n_refills
+    1
+    """
+
+    def __init__(self, entropy_fn=os.urandom, size=DEFAULT_SIZE, background=False):
+        if not isinstance(size, int) or size <= 0:
+            raise EntropyBufferError('size must be a positive integer')
+
+        self.entropy_fn = entropy_fn
+        self.size = size
+        self.background = background
+
+        self.n_refills = 0
+        self.n_waits = 0
+
+        self._reset()
+        _buffers.add(self)
+
+    def _reset(self):
+        self._lock = Lock()
+        self._bytes = b''
+        self._offset = 0
+
+        if self.background:
+            self._blocks = Queue(maxsize=1)
+            self._stopped = Event()
+            self._start_worker()
+            self._close = weakref.finalize(self, EntropyBuffer._stop, self._blocks, self._stopped)
+
+    def _start_worker(self):
+        Thread(target=_refill_worker, args=(self.entropy_fn, self.size, self._blocks, self._stopped), daemon=True).start()
+
+    @staticmethod
+    def _stop(blocks, stopped):
+        stopped.set()
+        # Unblock a worker waiting to put its next block
+        if not blocks.empty():
+            blocks.get_nowait()
+
+    def _refill(self):
+        if self.background and not self._stopped.is_set():
+            if self._blocks.empty():
+                self.n_waits += 1
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                # The failed worker has ended, so a new one fetches the next block
+                self._start_worker()
+                raise block
+            self._bytes = block
+        else:
+            self._bytes = self.entropy_fn(self.size)
+        self._offset = 0
+        self.n_refills += 1
+
+    def close(self):
+        """
+        Stop the background thread, if any. Later refills fetch from `entropy_fn` directly.
+        """
+        if self.background:
+            self._close()
+
+    def __call__(self, n_bytes):
+        with self._lock:
+            offset = self._offset + n_bytes
+            if offset <= len(self._bytes):
+                self._offset = offset
+                return self._bytes[offset - n_bytes : offset]
+
+            served = [self._bytes[self._offset :]]
+            n_unserved = n_bytes - len(served[0])
+            while 0 < n_unserved:
+                self._refill()
+                if not self._bytes:
+                    # Entropy source is exhausted
+                    break
+                served.append(self._bytes[:n_unserved])
+                self._offset = len(served[-1])
+                n_unserved -= self._offset
+
+            return b''.join(served)
+
+    def __reduce__(self):
+        # Pickle the configuration only; buffered bytes are never shared
+        return (EntropyBuffer, (self.entropy_fn, self.size, self.background))
+
+    def __repr__(self):
+        return f'EntropyBuffer: size = {self.size}, background = {self.background}, n_refills = {self.n_refills}'
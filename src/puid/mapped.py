@@ -0,0 +1,52 @@
+"""
+Fixed-width `puid` records written into memory-mapped files
+
+Every `puid` is `len` ASCII bytes, so a file of `puid` records, each followed by a separator, has a
+known size, and record `ndx` is at byte `ndx * (len + len(sep))`. The file is sized up front, and
+records are written by `Puid.generate_into` directly into windows of the file mapped one at a time, so
+memory use is bounded by the window size regardless of the number of records. Disjoint ranges of
+records can be filled concurrently by separate processes.
+"""
+from mmap import ALLOCATIONGRANULARITY, mmap
+
+# Max bytes of a file mapped at a time
+WINDOW_SIZE = 64 * 1024 * 1024
+
+
+def create(path, size):
+    """
+    Create or truncate the file at `path` to `size` bytes
+
+    Bytes not yet written read as zeros, and on most file systems take no disk space.
+    """
+    with open(path, 'wb') as file:
+        file.truncate(size)
+
+
+def fill_records(rand_id, path, start, count, sep=b'', window_size=WINDOW_SIZE):
+    """
+    Write records `start` to `start + count` of the file at `path`, which must already be large enough
+
+    :param rand_id: Puid of ASCII chars
+    :param path: Path of the file
+    :param start: Index of the first record
+    :param count: Number of records
+    :param sep: bytes written after each `puid`
+    :param window_size: Max bytes mapped at a time
+    :return Number of records written
+    """
+    width = rand_id.len + len(sep)
+    n_window_records = max(1, window_size // width)
+    end = start + count
+
+    with open(path, 'r+b') as file:
+        for window_start in range(start, end, n_window_records):
+            n_records = min(n_window_records, end - window_start)
+            offset = window_start * width
+            # A mapping starts at a multiple of the allocation granularity
+            map_offset = offset - offset % ALLOCATIONGRANULARITY
+            with mmap(file.fileno(), offset + n_records * width - map_offset, offset=map_offset) as mapped:
+                with memoryview(mapped) as view:
+                    rand_id.generate_into(view[offset - map_offset :], n_records, sep)
+
+    return count
@@ -0,0 +1,209 @@
+"""
+Packing of `puid`s to and from their compact integer and bytes forms
+
+A `puid` of `len` characters from `n_chars` characters is the `len` digit base `n_chars` number of the
+character values, most significant first. The packed int therefore needs only the entropy bits of the
+`puid`, and ints compare in the same order as the value sequences. Packed bytes are the packed int as
+fixed width big-endian bytes, which compare in the same order as the ints.
+
+Characters are decoded by precomputed reverse tables. For up to 36 characters, a `puid` is translated
+to the standard digits of its base and converted by `int`, and for 64 characters to base64 and decoded;
+otherwise values are accumulated per char. When the number of characters has a stdlib codec, a packed
+int is encoded by the codec, for 10 characters by `str`, and otherwise values are divided out two
+chars at a time. A `puid` with more digits than the interpreter's int string conversion limit is
+instead accumulated or divided out for any number of characters.
+"""
+import sys
+from binascii import a2b_base64
+from math import ceil, log2
+
+from puid import codec
+from puid.puid_error import PackError
+
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+_BASE64_DIGITS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+# Characters also decoded as the given character when decoding Crockford32 ignoring case
+_CROCKFORD_ALIASES = {'I': '1', 'L': '1', 'O': '0'}
+
+
+def n_packed_bytes(n_chars, puid_len):
+    """
+    Bytes of a packed `puid`
+
+    >>> n_packed_bytes(64, 22)
+    17
+    """
+    return ((n_chars**puid_len - 1).bit_length() + 7) // 8
+
+
+def _digits_limited(n_chars, puid_len):
+    # Whether converting puid_len digits of base n_chars by int or str exceeds the interpreter's digit limit
+    max_digits = sys.get_int_max_str_digits() if hasattr(sys, 'get_int_max_str_digits') else 0
+    return n_chars & (n_chars - 1) != 0 and 0 < max_digits < puid_len
+
+
+def reverse_table(chars, ignore_case=False):
+    """
+    dict of each decoded character to its value
+
+    Ignoring case, both cases of each character decode to its value, as do the Crockford32 aliases
+    `I`, `L` and `O`.
+
+    :param chars: ValidChars
+    :param ignore_case: Whether decoding ignores case
+    :return dict
+    """
+    values = {char: value for value, char in enumerate(chars.value)}
+    if not ignore_case:
+        return values
+
+    folded = {}
+    for char, value in values.items():
+        for case_char in [char.lower(), char.upper()]:
+            if folded.get(case_char, value) != value or values.get(case_char, value) != value:
+                raise PackError(f'{chars.name} chars are case sensitive')
+            folded[case_char] = value
+
+    if chars.name == 'CROCKFORD32':
+        for alias, char in _CROCKFORD_ALIASES.items():
+            folded[alias] = folded[alias.lower()] = values[char]
+
+    return folded
+
+
+def _coder(codes):
+    # Function of a puid str to the bytes of the code of each char in codes, or None for invalid chars
+    if all([char.isascii() for char in codes]):
+        # bytes.translate, with all valid chars deleted to check for invalid chars
+        table = bytearray(256)
+        for char, code in codes.items():
+            table[ord(char)] = code
+        table = bytes(table)
+        valid = bytes([ord(char) for char in codes])
+
+        def coded(puid):
+            try:
+                data = puid.encode('ascii')
+            except UnicodeEncodeError:
+                return None
+            return None if data.translate(None, valid) else data.translate(table)
+
+        return coded
+
+    table = str.maketrans({char: chr(code) for char, code in codes.items()})
+    stripped = str.maketrans({char: None for char in codes})
+
+    def coded(puid):
+        return None if puid.translate(stripped) else puid.translate(table).encode('latin-1')
+
+    return coded
+
+
+def int_decoder(chars, puid_len, ignore_case=False):
+    """
+    Decoder of a `puid` str to its packed int
+
+    :param chars: ValidChars
+    :param puid_len: Length of each `puid`
+    :param ignore_case: Whether decoding ignores case
+    :return Function mapping a `puid` str to an int
+    """
+    n_chars = len(chars)
+    values = reverse_table(chars, ignore_case)
+    by_int = n_chars <= len(_DIGITS) and not _digits_limited(n_chars, puid_len)
+
+    if by_int:
+        coded = _coder({char: ord(_DIGITS[value]) for char, value in values.items()})
+    elif n_chars == 64:
+        coded = _coder({char: ord(_BASE64_DIGITS[value]) for char, value in values.items()})
+    else:
+        coded = _coder(values)
+
+    def checked(puid):
+        codes = coded(puid) if len(puid) == puid_len else None
+        if codes is None:
+            raise PackError(f"'{puid}' is not a puid of {puid_len} {chars.name} chars")
+        return codes
+
+    if by_int:
+
+        def decoded(puid):
+            return int(checked(puid), n_chars)
+
+        return decoded
+
+    if n_chars == 64:
+        # Padded to whole base64 groups and decoded, with the pad bits shifted away
+        n_pad_chars = -puid_len % 4
+        padding = b'A' * n_pad_chars
+
+        def decoded(puid):
+            return int.from_bytes(a2b_base64(checked(puid) + padding), 'big') >> 6 * n_pad_chars
+
+        return decoded
+
+    def decoded(puid):
+        packed = 0
+        for value in checked(puid):
+            packed = packed * n_chars + value
+        return packed
+
+    return decoded
+
+
+def int_encoder(chars, puid_len):
+    """
+    Encoder of a packed int to its `puid` str
+
+    :param chars: ValidChars
+    :param puid_len: Length of each `puid`
+    :return Function mapping an int to a `puid` str
+    """
+    n_chars = len(chars)
+    n_values = n_chars**puid_len
+
+    def checked(packed):
+        if not 0 <= packed < n_values:
+            raise PackError(f'{packed} is not a packed puid of {puid_len} {chars.name} chars')
+        return packed
+
+    if codec.encodable(n_chars) and n_chars != 32:
+        # The packed bits, left aligned in whole codec groups, are the bits sliced by the codec muncher.
+        # The base32 codec works in Python per group, so 32 chars are divided out in pairs instead
+        n_bits_per_char = round(log2(n_chars))
+        n_group_bits, chars_codec = codec._codecs[n_bits_per_char]
+        n_bits = n_bits_per_char * puid_len
+        n_bytes = ceil(n_bits / n_group_bits) * n_group_bits // 8
+        n_pad_bits = 8 * n_bytes - n_bits
+        encoded = chars_codec(chars.value)
+
+        def encoded_int(packed):
+            return encoded((checked(packed) << n_pad_bits).to_bytes(n_bytes, 'big'), puid_len)
+
+        return encoded_int
+
+    if n_chars == 10 and not _digits_limited(n_chars, puid_len):
+        decimal_chars = str.maketrans(_DIGITS[:10], chars.value)
+
+        def encoded_int(packed):
+            return str(checked(packed)).zfill(puid_len).translate(decimal_chars)
+
+        return encoded_int
+
+    # Values are divided out two chars at a time
+    pair_chars = [first + second for first in chars.value for second in chars.value]
+    n_pairs, n_odd = divmod(puid_len, 2)
+    n_pair_values = n_chars * n_chars
+
+    def encoded_int(packed):
+        packed = checked(packed)
+        pairs = []
+        for _ in range(n_pairs):
+            packed, pair = divmod(packed, n_pair_values)
+            pairs.append(pair_chars[pair])
+        if n_odd:
+            pairs.append(chars.value[packed])
+        return ''.join(reversed(pairs))
+
+    return encoded_int
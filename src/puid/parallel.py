@@ -0,0 +1,147 @@
+"""
+Bulk generation of `puid`s across worker processes
+
+Each worker process receives a pickled copy of the `Puid`, which carries its configuration but not its
+entropy state, so every worker slices its own entropy from its own entropy source. The copy has no
+`budget`: the `puid`s of the workers are counted by the budget of the `Puid` as their results return.
+"""
+from collections import deque
+from copy import copy
+from os import cpu_count
+
+from puid import mapped
+from puid.puid_error import PuidError
+
+# Number of puids generated by a worker per task
+CHUNK_SIZE = 64 * 1024
+
+# Puid of a worker process, set once by the pool initializer
+_worker_id = None
+
+
+def _init_worker(rand_id):
+    global _worker_id
+    _worker_id = rand_id
+
+
+def _generate_chunk(n):
+    return _worker_id.generate_many(n)
+
+
+def _write_partition(path, n, sep, batch_size):
+    with open(path, 'w', encoding='utf-8') as file:
+        return _worker_id.write_to(file, n, sep, batch_size)
+
+
+def _fill_partition(path, start, n, sep):
+    return mapped.fill_records(_worker_id, path, start, n, sep)
+
+
+def _counted(rand_id, n_puids):
+    # Adds the puids of a worker result to the budget
+    if rand_id.budget is not None:
+        rand_id.budget._added(n_puids)
+    return n_puids
+
+
+def _partitions(n, n_parts, part_size=None):
+    # Sizes of n split into parts of part_size, or into n_parts nearly equal parts
+    if part_size is not None:
+        return [min(part_size, n - start) for start in range(0, n, part_size)]
+    return [n // n_parts + (1 if ndx < n % n_parts else 0) for ndx in range(n_parts)]
+
+
+def _executor(rand_id, workers, n_tasks):
+    # concurrent.futures and multiprocessing are imported only by bulk generation
+    from concurrent.futures import ProcessPoolExecutor
+
+    if workers is not None and (not isinstance(workers, int) or workers <= 0):
+        raise PuidError('workers must be a positive integer')
+    n_workers = max(1, min(workers or cpu_count() or 1, n_tasks))
+    # A copy without munchers, so a forked worker does not inherit those of rand_id
+    worker_id = copy(rand_id)
+    worker_id.budget = None
+    return (ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(worker_id,)), n_workers)
+
+
+def parallel_chunks(rand_id, n, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Generate `n` `puid`s across worker processes
+
+    Chunks are yielded in order as they complete, with at most two chunks per worker in flight so
+    results do not accumulate faster than they are consumed.
+
+    :param rand_id: Puid
+    :param n: Number of `puid`s
+    :param workers: Number of worker processes. Defaults to the number of CPUs
+    :param chunk_size: Number of `puid`s per chunk
+    :return Iterator of lists of `puid`s
+    """
+    chunk_sizes = _partitions(n, None, chunk_size)
+    if not chunk_sizes:
+        return
+
+    executor, n_workers = _executor(rand_id, workers, len(chunk_sizes))
+    with executor:
+        chunks = deque()
+        for chunk_n in chunk_sizes:
+            chunks.append(executor.submit(_generate_chunk, chunk_n))
+            if len(chunks) == 2 * n_workers:
+                chunk = chunks.popleft().result()
+                _counted(rand_id, len(chunk))
+                yield chunk
+
+        while chunks:
+            chunk = chunks.popleft().result()
+            _counted(rand_id, len(chunk))
+            yield chunk
+
+
+def parallel_files(rand_id, n, paths, workers=None, sep='\n', batch_size=CHUNK_SIZE):
+    """
+    Write `n` `puid`s across worker processes, split nearly equally into the files at `paths`
+
+    Each file is written by a single worker as UTF-8, with each `puid` followed by `sep`.
+
+    :param rand_id: Puid
+    :param n: Total number of `puid`s
+    :param paths: Paths of the partition files
+    :param workers: Number of worker processes. Defaults to the number of CPUs
+    :param sep: Separator written after each `puid`
+    :param batch_size: Number of `puid`s per write
+    :return list of the number of `puid`s written to each file
+    """
+    paths = list(paths)
+    if not paths:
+        raise PuidError('paths must name at least one file')
+
+    executor, _ = _executor(rand_id, workers, len(paths))
+    with executor:
+        counts = [
+            executor.submit(_write_partition, path, part_n, sep, batch_size)
+            for path, part_n in zip(paths, _partitions(n, len(paths)))
+        ]
+        return [_counted(rand_id, count.result()) for count in counts]
+
+
+def parallel_records(rand_id, n, path, workers=None, sep=b''):
+    """
+    Fill `n` fixed-width `puid` records of the file at `path` across worker processes
+
+    The file must already hold `n` records. Each worker fills a contiguous range of records through its
+    own memory maps of the file.
+
+    :param rand_id: Puid of ASCII chars
+    :param n: Number of records
+    :param path: Path of the file
+    :param workers: Number of worker processes. Defaults to the number of CPUs
+    :param sep: bytes written after each `puid`
+    :return Number of records written
+    """
+    executor, n_workers = _executor(rand_id, workers, n)
+    with executor:
+        starts = [0]
+        for part_n in _partitions(n, n_workers):
+            starts.append(starts[-1] + part_n)
+        counts = [executor.submit(_fill_partition, path, start, end - start, sep) for start, end in zip(starts, starts[1:])]
+        return sum([_counted(rand_id, count.result()) for count in counts])
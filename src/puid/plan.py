@@ -0,0 +1,177 @@
+"""
+Munching plans compiled for the exact shape of a `Puid`
+
+The bits per char, `puid` length and rejection shifts of a `Puid` are fixed at construction, so the
+slicing of a `puid` from a `bits.BitReservoir` is generated as Python source with these inlined as
+constants and compiled once per shape.
+
+When the number of characters is a power of 2, every `puid` spans a fixed number of bits, which are
+loaded from the reservoir as a single int and unrolled into values as shifts and masks. Otherwise
+values are sliced in a loop from a small window of reservoir bits, with rejected values looked up in
+a table of shifts.
+"""
+
+from functools import lru_cache
+
+# Max chars unrolled from a single int, which keeps the int small
+SEGMENT_CHARS = 32
+
+# Max bytes loaded into the reservoir bits at a time when slicing with rejection
+WINDOW_BYTES = 32
+
+# Max compiled plans kept for reuse by Puids of the same shape
+CACHE_SIZE = 256
+
+
+def _unrolled(n_values, n_bits_per_char, v='v'):
+    # Expression of the list of n_values values unrolled from the int `v`
+    mask = (1 << n_bits_per_char) - 1
+    shifts = [n_bits_per_char * (n_values - 1 - ndx) for ndx in range(n_values)]
+    values = ', '.join([f'{v} >> {shift} & {mask}' if shift else f'{v} & {mask}' for shift in shifts])
+    return f'[{values}]'
+
+
+def pow2_source(n_bits_per_char, puid_len):
+    """
+    Source of `slice_puid(reservoir)`, returning the list of `puid_len` values of the next bits of
+    `reservoir`
+
+    The bits of the `puid` are loaded from the reservoir block as a single int. Values are unrolled
+    from that int in segments of at most `SEGMENT_CHARS` chars, so each shift is of a small int.
+    """
+    n_bits_per_puid = n_bits_per_char * puid_len
+    lines = [
+        'def slice_puid(reservoir):',
+        '    n_bits = reservoir.n_bits',
+        '    v = reservoir.bits',
+        f'    if n_bits < {n_bits_per_puid}:',
+        f'        n_bytes = ({n_bits_per_puid} + 7 - n_bits) >> 3',
+        '        block_ndx = reservoir.block_ndx',
+        '        if len(reservoir.block) - block_ndx < n_bytes:',
+        f'            reservoir.prefetch({n_bits_per_puid})',
+        '            block_ndx = 0',
+        "        v = v << (n_bytes << 3) | int.from_bytes(reservoir.block[block_ndx : block_ndx + n_bytes], 'big')",
+        '        reservoir.block_ndx = block_ndx + n_bytes',
+        '        n_bits += n_bytes << 3',
+        f'    n_bits -= {n_bits_per_puid}',
+        '    reservoir.n_bits = n_bits',
+        '    reservoir.bits = v & ((1 << n_bits) - 1)',
+        '    v >>= n_bits',
+    ]
+    if puid_len <= SEGMENT_CHARS:
+        lines += [f'    return {_unrolled(puid_len, n_bits_per_char)}']
+        return '\n'.join(lines) + '\n'
+
+    segment_lens = [SEGMENT_CHARS] * (puid_len // SEGMENT_CHARS)
+    if puid_len % SEGMENT_CHARS:
+        segment_lens.append(puid_len % SEGMENT_CHARS)
+    n_shift_bits = n_bits_per_puid
+    segments = []
+    for segment_len in segment_lens:
+        n_shift_bits -= n_bits_per_char * segment_len
+        segment_mask = (1 << n_bits_per_char * segment_len) - 1
+        segment = f'v >> {n_shift_bits} & {segment_mask}' if n_shift_bits else f'v & {segment_mask}'
+        lines += [f'    s = {segment}']
+        segments.append(_unrolled(segment_len, n_bits_per_char, 's'))
+        lines += [f'    values{" +" if 1 < len(segments) else ""}= {segments[-1]}']
+    lines += ['    return values']
+    return '\n'.join(lines) + '\n'
+
+
+def rejection_source(n_chars, n_bits_per_char, puid_len, counted=False):
+    """
+    Source of `slice_puid(reservoir)`, returning the list of `puid_len` values sliced from `reservoir`
+
+    Values are sliced from the reservoir bits in place. Bytes of the reservoir block are loaded at
+    most `WINDOW_BYTES` at a time, so slicing works on small ints, and only an empty block calls back
+    into the reservoir. Accepted values shift `n_bits_per_char` bits, and rejected values the bits
+    given by the `SHIFTS` table. With `counted`, rejections are counted into `counters`.
+    """
+    mask = (1 << n_bits_per_char) - 1
+    lines = [
+        'def slice_puid(reservoir):',
+        '    values = []',
+        '    append = values.append',
+        f'    n_needed = {puid_len}',
+        '    bits = reservoir.bits',
+        '    n_bits = reservoir.n_bits',
+        '    block = reservoir.block',
+        '    block_ndx = reservoir.block_ndx',
+        '    while True:',
+        f'        while {n_bits_per_char} <= n_bits:',
+        f'            value = bits >> (n_bits - {n_bits_per_char}) & {mask}',
+        f'            if value < {n_chars}:',
+        f'                n_bits -= {n_bits_per_char}',
+        '                append(value)',
+        '                n_needed -= 1',
+        '                if not n_needed:',
+        '                    reservoir.bits = bits & ((1 << n_bits) - 1)',
+        '                    reservoir.n_bits = n_bits',
+        '                    reservoir.block_ndx = block_ndx',
+        '                    return values',
+        '            else:',
+        '                shift = SHIFTS[value]',
+        '                n_bits -= shift',
+    ]
+    if counted:
+        lines += [
+            '                counters.rejections += 1',
+            '                counters.rejected_bits += shift',
+        ]
+    lines += [
+        f'        n_bytes = min(len(block) - block_ndx, {WINDOW_BYTES})',
+        '        if not n_bytes:',
+        '            # The remaining values need at least their bits, so fetch those',
+        '            reservoir.bits = bits & ((1 << n_bits) - 1)',
+        '            reservoir.n_bits = n_bits',
+        '            reservoir.block_ndx = block_ndx',
+        f'            reservoir.prefetch(n_bits + {n_bits_per_char} * n_needed)',
+        '            block = reservoir.block',
+        '            block_ndx = reservoir.block_ndx',
+        f'            n_bytes = min(len(block) - block_ndx, {WINDOW_BYTES})',
+        "        bits = (bits & ((1 << n_bits) - 1)) << (n_bytes << 3) | int.from_bytes(block[block_ndx : block_ndx + n_bytes], 'big')",
+        '        n_bits += n_bytes << 3',
+        '        block_ndx += n_bytes',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _pow2_code(n_bits_per_char, puid_len):
+    return compile(pow2_source(n_bits_per_char, puid_len), f'<puid plan pow2 {n_bits_per_char}x{puid_len}>', 'exec')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _rejection_code(n_chars, n_bits_per_char, puid_len, counted):
+    source = rejection_source(n_chars, n_bits_per_char, puid_len, counted)
+    return compile(source, f'<puid plan rejection {n_chars}x{puid_len}>', 'exec')
+
+
+def _compiled(code, namespace):
+    # Compiling dominates the cost of a plan, so code is compiled once per shape and only the function
+    # is created per Puid
+    exec(code, namespace)
+    return namespace['slice_puid']
+
+
+def pow2_slicer(n_bits_per_char, puid_len):
+    """
+    Compiled `slice_puid` for chars whose count is a power of 2
+
+    >>> from puid.bits import BitReservoir
+    >>> slice_puid = pow2_slicer(4, 3)
+    >>> slice_puid(BitReservoir(lambda n_bytes: bytes([0x7c, 0x9a])[:n_bytes]))
+    [7, 12, 9]
+    """
+    return _compiled(_pow2_code(n_bits_per_char, puid_len), {})
+
+
+def rejection_slicer(n_chars, n_bits_per_char, puid_len, value_shifts, counters=None):
+    """
+    Compiled `slice_puid` for chars whose count is not a power of 2
+
+    :param value_shifts: List of bits shifted for each possible sliced value
+    :param counters: stats.Counters to count rejections into, or None
+    """
+    code = _rejection_code(n_chars, n_bits_per_char, puid_len, counters is not None)
+    return _compiled(code, {'SHIFTS': tuple(value_shifts), 'counters': counters})
@@ -1,35 +1,126 @@
+import errno
+import io
+from _thread import allocate_lock
+from collections import OrderedDict
+from itertools import chain
 from math import ceil, log2
-from secrets import token_bytes
+from os import urandom
 
 from puid import Chars
+from puid import codec
+from puid import packing
+from puid import vector
 from puid.bits import muncher
-from puid.chars import CustomChars, PredefinedChars
+from puid.chars import CustomChars, PredefinedChars, valid_chars
 from puid.chars_error import InvalidChars
-from puid.encoder import encoder
+from puid.encoder import encoding, utf8_encoding
 from puid.entropy import bits_for_total_risk
-from puid.puid_error import BitsError, TotalRiskError
+from puid.puid_error import BitsError, EngineError, PackError, PuidError, TotalRiskError
+
+# Number of puids sliced from each bulk fetch of entropy
+BATCH_SIZE = 4096
+
+# Number of puids per write by write_to
+WRITE_CHUNK = 16 * BATCH_SIZE
+
+# Max Puids kept by Puid.cached
+CACHE_SIZE = 1024
+
+# Puids of Puid.cached by normalized configuration, least recently used first
+_cache = OrderedDict()
+# A threading.Lock, allocated without importing threading
+_cache_lock = allocate_lock()
+
+
+def _cached_puid(cls, total, risk, bits, chars, entropy_source, engine, thread_safe):
+    chars = Chars.SAFE64 if chars is None else chars
+    valid_chars(chars)
+    puid_len = ceil(_base_bits(total, risk, bits) / log2(len(chars)))
+    key = (cls, chars, puid_len, entropy_source, engine, thread_safe)
+
+    with _cache_lock:
+        rand_id = _cache.get(key)
+        if rand_id is not None:
+            _cache.move_to_end(key)
+            return rand_id
+
+    # Created outside the lock, and the first of concurrent creations is shared
+    rand_id = cls(total, risk, bits, chars, entropy_source, engine, thread_safe)
+    with _cache_lock:
+        rand_id = _cache.setdefault(key, rand_id)
+        _cache.move_to_end(key)
+        if CACHE_SIZE < len(_cache):
+            _cache.popitem(last=False)
+    return rand_id
+
+
+def _base_bits(total, risk, bits):
+    if bits is None and total is None and risk is None:
+        return 128
+    elif bits is not None and (total is not None or risk is not None):
+        raise BitsError("bits cannot be specified with total/risk")
+    elif bits is not None and total is None and risk is None:
+        if not isinstance(bits, int):
+            raise BitsError("bits must be non-negative integer")
+        if bits <= 0:
+            raise BitsError("bits must be non-negative integer")
+        return bits
+    elif total is None and risk is not None:
+        raise TotalRiskError("risk with no total")
+    elif total is not None and risk is None:
+        raise TotalRiskError("total with no risk")
+    else:
+        return bits_for_total_risk(total, risk)
+
+
+def _write_all(raw_file, data):
+    # A raw file may write only part of the data per call
+    view = memoryview(data)
+    while view:
+        n_written = raw_file.write(view)
+        if n_written is None:
+            raise BlockingIOError(errno.EAGAIN, 'file is not ready for writing')
+        view = view[n_written:]
 
 
 class Puid:
-    def __init__(self, total=None, risk=None, bits=None, chars=None, entropy_source=None):
-
-        base_bits = None
-        if bits is None and total is None and risk is None:
-            base_bits = 128
-        elif bits is not None and (total is not None or risk is not None):
-            raise BitsError("bits cannot be specified with total/risk")
-        elif bits is not None and total is None and risk is None:
-            if not isinstance(bits, int):
-                raise BitsError("bits must be non-negative integer")
-            if bits <= 0:
-                raise BitsError("bits must be non-negative integer")
-            base_bits = bits
-        elif total is None and risk is not None:
-            raise TotalRiskError("risk with no total")
-        elif total is not None and risk is None:
-            raise TotalRiskError("total with no risk")
-        else:
-            base_bits = bits_for_total_risk(total, risk)
+    __slots__ = (
+        'chars',
+        'len',
+        'bits',
+        'bits_per_char',
+        'ere',
+        'packed_len',
+        'entropy_source',
+        'engine',
+        'thread_safe',
+        'tracer',
+        'budget',
+        '_entropy_fn',
+        '_prefetcher',
+        '_counters',
+        '_puid_muncher',
+        '_bytes_muncher',
+        '_utf8_muncher',
+        '_packers',
+        '__weakref__',
+    )
+
+    def __init__(
+        self,
+        total=None,
+        risk=None,
+        bits=None,
+        chars=None,
+        entropy_source=None,
+        engine=None,
+        thread_safe=False,
+        stats=False,
+        tracer=None,
+        budget=None,
+    ):
+
+        base_bits = _base_bits(total, risk, bits)
 
         if chars is None:
             self.chars = PredefinedChars(Chars.SAFE64)
@@ -41,25 +132,179 @@ class Puid:
             raise InvalidChars('specified chars must be either Chars enum or string')
 
         n_chars = len(self.chars)
+        if engine is None:
+            # NumPy only pays off for large batches, and is then opted into by engine='numpy'
+            engine = 'codec' if codec.preferred(n_chars) else 'python'
+        elif engine not in ['codec', 'python', 'numpy']:
+            raise EngineError("engine must be one of 'codec', 'python' or 'numpy'")
+        elif engine == 'numpy' and not vector.available():
+            raise EngineError("numpy engine requires NumPy")
+        elif engine == 'codec' and not codec.encodable(n_chars):
+            raise EngineError('codec engine requires 2, 4, 8, 16, 32, 64 or 256 chars')
+
         n_bits_per_char = log2(n_chars)
         self.len = round(ceil(base_bits / n_bits_per_char))
         self.bits = self.len * n_bits_per_char
-        entropy_fn = entropy_source or token_bytes
-        self.entropy_source = f'{entropy_fn.__module__}.{entropy_fn.__name__}'
+        if entropy_source is None:
+            # secrets.token_bytes is os.urandom, which saves importing secrets
+            entropy_fn = urandom
+            self.entropy_source = 'os.urandom'
+        else:
+            entropy_fn = entropy_source
+            entropy_name = getattr(entropy_fn, '__name__', type(entropy_fn).__name__)
+            self.entropy_source = f'{entropy_fn.__module__}.{entropy_name}'
+            from puid import aio
 
-        self._chars_encoder = encoder(self.chars)
-        self.bits_muncher = muncher(n_chars, self.len, entropy_fn)
+            if aio.is_async(entropy_fn):
+                entropy_fn = aio.AsyncEntropy(entropy_fn)
+        self._entropy_fn = entropy_fn
+        self._prefetcher = None
 
-        self.bits_per_char = n_bits_per_char
+        self.engine = engine
+        self.thread_safe = thread_safe
+        self._counters = None
+        if stats:
+            from puid.stats import Counters
 
-        chars_encoder = encoder(self.chars)
+            # Retired counters, into which the counts of munchers no longer in use are folded
+            self._counters = [Counters()]
+        self.tracer = tracer
+        self.budget = budget
+        if budget is not None:
+            budget._bind(self.bits, total, risk)
 
-        def encoded(values):
-            return [chr(chars_encoder(value)) for value in values]
+        self.bits_per_char = n_bits_per_char
 
-        self._encoded = encoded
+        self._puid_muncher = None
+        self._bytes_muncher = None
+        self._utf8_muncher = None
+        self._packers = {}
 
         self.ere = (n_bits_per_char * n_chars) / (8 * len(self.chars.value.encode('utf-8')))
+        self.packed_len = packing.n_packed_bytes(n_chars, self.len)
+
+    def _new_puid_muncher(self, as_bytes=False, prefetched=False):
+        # A prefetched muncher returns the puid muncher and a function counting puids issued when handed out
+        n_chars = len(self.chars)
+        entropy_fn = self._entropy_fn
+        counters = None
+        if self._counters is not None:
+            from puid.stats import Counters, counted_entropy
+
+            # Each muncher counts into its own counters, summed by stats()
+            counters = Counters()
+            self._counters.append(counters)
+            entropy_fn = counted_entropy(entropy_fn, counters)
+        if self.tracer is not None:
+            from puid.timing import traced_entropy
+
+            entropy_fn = traced_entropy(entropy_fn, self.tracer)
+
+        if self.engine == 'codec':
+            puid_muncher = codec.codec_muncher(self.chars, self.len, entropy_fn, as_bytes)
+        else:
+            puid_muncher = self._encoded_muncher(muncher(n_chars, self.len, entropy_fn, self.engine, counters), as_bytes)
+
+        if prefetched:
+            # Counts of a muncher that munches nothing, called by the prefetcher as it hands out puids
+            issued = self._issuing_muncher(lambda n_puids=None: None, counters)
+        else:
+            puid_muncher = self._issuing_muncher(puid_muncher, counters)
+
+        if self.tracer is not None:
+            from puid.timing import traced_muncher
+
+            puid_muncher = traced_muncher(puid_muncher, self.tracer)
+        if counters is not None:
+            from weakref import finalize
+
+            from puid.stats import retire
+
+            # Counts are retired with the muncher, e.g. at the end of its thread, rather than kept per muncher
+            finalize(issued if prefetched else puid_muncher, retire, self._counters, counters).atexit = False
+        return (puid_muncher, issued) if prefetched else puid_muncher
+
+    def _issuing_muncher(self, puid_muncher, counters):
+        # Counts puids as issued in stats and the risk budget
+        if counters is not None:
+            from puid.stats import counted_muncher
+
+            puid_muncher = counted_muncher(puid_muncher, counters)
+        if self.budget is not None:
+            from puid.budget import budgeted_muncher
+
+            puid_muncher = budgeted_muncher(puid_muncher, self.budget)
+        return puid_muncher
+
+    def _thread_muncher(self, as_bytes=False):
+        # Each thread lazily creates its own muncher, so threads share no entropy state
+        from threading import local
+
+        new_puid_muncher = self._new_puid_muncher
+        thread_local = local()
+
+        def thread_muncher(n_puids=None):
+            try:
+                puid_muncher = thread_local.puid_muncher
+            except AttributeError:
+                puid_muncher = thread_local.puid_muncher = new_puid_muncher(as_bytes)
+            return puid_muncher(n_puids)
+
+        return thread_muncher
+
+    def _encoded_muncher(self, bits_muncher, as_bytes=False):
+        encoded = utf8_encoding(self.chars) if as_bytes else encoding(self.chars)
+
+        if self.engine == 'numpy':
+            encoded_many = vector.chars_encoder(self.chars, self.len, as_bytes)
+        elif as_bytes and self.chars.value.isascii():
+            # A batch of ASCII bytes puids is joined into a single bytes
+            def encoded_many(values_batch):
+                return encoded(chain.from_iterable(values_batch))
+
+        else:
+
+            def encoded_many(values_batch):
+                return [encoded(values) for values in values_batch]
+
+        def puid_muncher(n_puids=None):
+            if n_puids is None:
+                return encoded(bits_muncher())
+            return encoded_many(bits_muncher(n_puids))
+
+        return puid_muncher
+
+    @classmethod
+    def cached(cls, total=None, risk=None, bits=None, chars=None, entropy_source=None, engine=None, thread_safe=True):
+        """
+        Shared `Puid` of the configuration, created on first use
+
+        Configurations that yield the same chars and `puid` length share a `Puid`, e.g. any `total` and
+        `risk` for the same bits. The `CACHE_SIZE` most recently used `Puid`s are kept. Cached `Puid`s
+        are shared across threads, so are thread safe by default.
+
+        :return Puid
+        """
+        return _cached_puid(cls, total, risk, bits, chars, entropy_source, engine, thread_safe)
+
+    def __getstate__(self):
+        # Configuration only: an unpickled Puid slices its own entropy
+        state = {name: getattr(self, name) for name in self.__slots__ if name != '__weakref__'}
+        state['_puid_muncher'] = None
+        state['_bytes_muncher'] = None
+        state['_utf8_muncher'] = None
+        state['_packers'] = {}
+        state['_prefetcher'] = None
+        if self._counters is not None:
+            from puid.stats import Counters
+
+            state['_counters'] = [Counters()]
+        state['tracer'] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def __repr__(self):
         bits = round(self.bits, 2)
@@ -67,6 +312,421 @@ class Puid:
         return f'Puid: bits = {bits}, bits_per_char = {bpc}, chars = {self.chars}, len = {self.len}, '
         'ere = {self.ere}, entropy_source = {self.entropy_source}'
 
+    def __iter__(self):
+        """
+        Endless iterator of `puid`s, generated in batches of `BATCH_SIZE`
+        """
+        return self.stream()
+
     def generate(self):
-        values = self.bits_muncher()
-        return "".join(self._encoded(values))
+        return (self._puid_muncher or self._muncher())()
+
+    def generate_bytes(self):
+        """
+        Generate a `puid` as ASCII bytes
+
+        The bytes are encoded directly from the sliced values, with no intermediate str. Bytes
+        `puid`s are sliced from entropy independently of `generate` and `generate_many`.
+
+        :return bytes
+        """
+        return self._bytes_puid_muncher()()
+
+    def generate_many_bytes(self, n):
+        """
+        Generate `n` `puid`s as ASCII bytes
+
+        :param n: Number of `puid`s
+        :return list of bytes
+        """
+        bytes_muncher = self._bytes_puid_muncher()
+        puid_len = self.len
+        puids = []
+        for batch_start in range(0, n, BATCH_SIZE):
+            joined = bytes_muncher(min(BATCH_SIZE, n - batch_start))
+            puids.extend([joined[ndx : ndx + puid_len] for ndx in range(0, len(joined), puid_len)])
+        return puids
+
+    def generate_utf8(self):
+        """
+        Generate a `puid` as UTF-8 bytes
+
+        The bytes of each char are joined from a table of the UTF-8 bytes of each char, with no
+        intermediate str to encode. For ASCII chars this is `generate_bytes`.
+
+        :return bytes
+        """
+        return self._utf8_puid_muncher()()
+
+    def generate_many_utf8(self, n):
+        """
+        Generate `n` `puid`s as UTF-8 bytes
+
+        :param n: Number of `puid`s
+        :return list of bytes
+        """
+        if self.chars.value.isascii():
+            return self.generate_many_bytes(n)
+
+        utf8_muncher = self._utf8_puid_muncher()
+        puids = []
+        for batch_start in range(0, n, BATCH_SIZE):
+            puids.extend(utf8_muncher(min(BATCH_SIZE, n - batch_start)))
+        return puids
+
+    def generate_into(self, buffer, count, sep=b''):
+        """
+        Write `count` `puid`s as ASCII bytes into the start of `buffer`, each followed by `sep`
+
+        Every `puid` is `len` bytes, so the `puid`s fill `count * (len + len(sep))` bytes of the buffer.
+        `puid`s are written a batch at a time, with no Python object per `puid`. Entropy is sliced as
+        for `generate_bytes`.
+
+        :param buffer: Writable, C-contiguous buffer such as a bytearray, memoryview, array.array, NumPy
+            array or mmap
+        :param count: Number of `puid`s
+        :param sep: bytes written after each `puid`
+        :return Number of bytes written
+        """
+        bytes_muncher = self._bytes_puid_muncher()
+        view = memoryview(buffer)
+        if view.readonly:
+            raise PuidError('buffer must be writable')
+        view = view.cast('B')
+        puid_len = self.len
+        width = puid_len + len(sep)
+        n_bytes = count * width
+        if view.nbytes < n_bytes:
+            raise PuidError(f'buffer of {view.nbytes} bytes cannot hold {count} records of {width} bytes')
+
+        if sep:
+            # Batch records are staged in a bytearray holding the separators, with a strided copy of
+            # each char position, which is much faster into a bytearray than into a memoryview
+            n_records = min(BATCH_SIZE, count)
+            records = bytearray(n_records * width)
+            for ndx, byte in enumerate(sep):
+                records[puid_len + ndx :: width] = bytes([byte]) * n_records
+            records_view = memoryview(records)
+
+        offset = 0
+        for batch_start in range(0, count, BATCH_SIZE):
+            n_puids = min(BATCH_SIZE, count - batch_start)
+            joined = bytes_muncher(n_puids)
+            if sep:
+                n_batch_bytes = n_puids * width
+                for ndx in range(puid_len):
+                    records[ndx:n_batch_bytes:width] = joined[ndx::puid_len]
+                view[offset : offset + n_batch_bytes] = records_view[:n_batch_bytes]
+                offset += n_batch_bytes
+            else:
+                view[offset : offset + len(joined)] = joined
+                offset += len(joined)
+        return n_bytes
+
+    def write_mmap(self, path, count, sep='\n', workers=1):
+        """
+        Write `count` `puid`s as fixed-width records into the memory-mapped file at `path`
+
+        The file is created or resized to `count * (len + len(sep))` bytes, and the records are written
+        into windows of the file mapped one at a time. With more than 1 worker, each worker process
+        fills its own range of records, so the `entropy_source` must be picklable.
+
+        :param path: Path of the file
+        :param count: Number of `puid`s
+        :param sep: ASCII separator written after each `puid`
+        :param workers: Number of worker processes
+        :return Number of `puid`s written
+        """
+        from puid import mapped
+
+        self._bytes_puid_muncher()
+        sep_bytes = sep.encode('ascii')
+        mapped.create(path, count * (self.len + len(sep_bytes)))
+        if not count:
+            return 0
+        if workers == 1:
+            return mapped.fill_records(self, path, 0, count, sep_bytes)
+        from puid import parallel
+
+        return parallel.parallel_records(self, count, path, workers, sep_bytes)
+
+    def _muncher(self):
+        # Built on first use, so a Puid that is never used holds only its configuration
+        if self._puid_muncher is None:
+            self._puid_muncher = self._thread_muncher() if self.thread_safe else self._new_puid_muncher()
+        return self._puid_muncher
+
+    def _bytes_puid_muncher(self):
+        if self._bytes_muncher is None:
+            if not self.chars.value.isascii():
+                raise PuidError('bytes puids require ASCII chars')
+            self._bytes_muncher = self._thread_muncher(True) if self.thread_safe else self._new_puid_muncher(True)
+        return self._bytes_muncher
+
+    def _utf8_puid_muncher(self):
+        # UTF-8 bytes of ASCII chars are ASCII bytes, and of other chars are a list per batch
+        if self._utf8_muncher is None:
+            if self.chars.value.isascii():
+                self._utf8_muncher = self._bytes_puid_muncher()
+            else:
+                self._utf8_muncher = self._thread_muncher(True) if self.thread_safe else self._new_puid_muncher(True)
+        return self._utf8_muncher
+
+    def _packer(self, kind, ignore_case=False):
+        # Packing functions are built on first use
+        key = (kind, ignore_case)
+        packer = self._packers.get(key)
+        if packer is None:
+            if kind == 'decoder':
+                packer = packing.int_decoder(self.chars, self.len, ignore_case)
+            else:
+                packer = packing.int_encoder(self.chars, self.len)
+            self._packers[key] = packer
+        return packer
+
+    def to_int(self, puid, ignore_case=False):
+        """
+        Packed int of `puid`
+
+        The int is the `len` digit base `len(chars)` number of the `puid` character values, so it spans
+        only the entropy bits of the `puid`.
+
+        :param puid: `puid` str of this Puid's chars and length
+        :param ignore_case: Whether to decode both cases of case insensitive chars, and for Crockford32
+            also `I`, `L` and `O`
+        :return int
+        """
+        return self._packer('decoder', ignore_case)(puid)
+
+    def from_int(self, packed):
+        """
+        `puid` of the packed int `packed`
+
+        :param packed: int returned by `to_int`
+        :return str
+        """
+        return self._packer('encoder')(packed)
+
+    def pack(self, puid, ignore_case=False):
+        """
+        Packed bytes of `puid`: its packed int as `packed_len` big-endian bytes
+
+        :param puid: `puid` str of this Puid's chars and length
+        :param ignore_case: As for `to_int`
+        :return bytes
+        """
+        return self.to_int(puid, ignore_case).to_bytes(self.packed_len, 'big')
+
+    def unpack(self, packed):
+        """
+        `puid` of the packed bytes `packed`
+
+        :param packed: bytes returned by `pack`
+        :return str
+        """
+        return self.from_int(int.from_bytes(packed, 'big'))
+
+    def pack_many(self, puids, ignore_case=False):
+        """
+        Packed bytes of each of `puids`
+
+        :param puids: Iterable of `puid` strs
+        :param ignore_case: As for `to_int`
+        :return list of bytes
+        """
+        decoded = self._packer('decoder', ignore_case)
+        packed_len = self.packed_len
+        return [decoded(puid).to_bytes(packed_len, 'big') for puid in puids]
+
+    def unpack_many(self, packed_puids):
+        """
+        `puid`s of each of `packed_puids`
+
+        :param packed_puids: Iterable of bytes returned by `pack`, or a bytes of packed `puid`s joined
+            end to end
+        :return list of str
+        """
+        encoded = self._packer('encoder')
+        if isinstance(packed_puids, (bytes, bytearray, memoryview)):
+            packed_len = self.packed_len
+            packed_puids = bytes(packed_puids)
+            if len(packed_puids) % packed_len:
+                raise PackError(f'packed puids must be a multiple of {packed_len} bytes')
+            packed_puids = [packed_puids[ndx : ndx + packed_len] for ndx in range(0, len(packed_puids), packed_len)]
+        return [encoded(int.from_bytes(packed, 'big')) for packed in packed_puids]
+
+    def stats(self):
+        """
+        Counts of `puid` generation and entropy consumption, for a `Puid` created with `stats=True`
+
+        - `ids`: `puid`s generated
+        - `entropy_calls`: Calls to the entropy source
+        - `entropy_bytes`: Bytes requested from the entropy source
+        - `bits_sliced`: Entropy bits sliced, including rejected bits
+        - `rejections`: Sliced values rejected as beyond the number of characters
+        - `rejected_bits`: Entropy bits discarded by rejected values
+        - `bits_per_rejection`: Mean bits discarded per rejected value
+
+        Counts include the async API, but not worker processes of the parallel API. `ids` of the async
+        API are counted as prefetched `puid`s are handed out, while entropy counts include batches still
+        awaiting consumption.
+
+        :return dict
+        """
+        if self._counters is None:
+            raise PuidError('stats requires a Puid created with stats=True')
+        from puid.stats import totals
+
+        return totals(self._counters, self.len * ceil(self.bits_per_char))
+
+    def generate_many(self, n):
+        """
+        Generate `n` `puid`s
+
+        Entropy is fetched in bulk rather than once per `puid`, but is otherwise sliced exactly as in
+        `generate`, so the same entropy bytes yield the same `puid`s.
+
+        :param n: Number of `puid`s
+        :return list
+        """
+        puid_muncher = self._muncher()
+        puids = []
+        for batch_start in range(0, n, BATCH_SIZE):
+            n_puids = min(BATCH_SIZE, n - batch_start)
+            puids.extend(puid_muncher(n_puids))
+        return puids
+
+    def stream(self, count=None):
+        """
+        Generator of `count` `puid`s, or endless if `count` is None, generated in batches of `BATCH_SIZE`
+
+        :param count: Number of `puid`s
+        :return generator
+        """
+        puid_muncher = self._muncher()
+        if count is None:
+            while True:
+                yield from puid_muncher(BATCH_SIZE)
+
+        for batch_start in range(0, count, BATCH_SIZE):
+            yield from puid_muncher(min(BATCH_SIZE, count - batch_start))
+
+    def write_to(self, fileobj, count, sep='\n', chunk=WRITE_CHUNK):
+        """
+        Write `count` `puid`s to `fileobj`, each followed by `sep`
+
+        `puid`s are joined into chunks of `chunk` `puid`s, so there is one write per chunk and memory use
+        is independent of `count`. UTF-8 encoded bytes are written to binary file objects, and to a raw
+        file object until each whole chunk is written.
+
+        :param fileobj: Text or binary file object
+        :param count: Number of `puid`s
+        :param sep: Separator written after each `puid`
+        :param chunk: Number of `puid`s per write
+        :return Number of `puid`s written
+        """
+        if not isinstance(chunk, int) or chunk <= 0:
+            raise PuidError('chunk must be a positive integer')
+
+        raw = isinstance(fileobj, io.RawIOBase)
+        binary = raw or isinstance(fileobj, io.BufferedIOBase)
+        for chunk_start in range(0, count, chunk):
+            text = sep.join(self.generate_many(min(chunk, count - chunk_start))) + sep
+            if raw:
+                _write_all(fileobj, text.encode('utf-8'))
+            else:
+                fileobj.write(text.encode('utf-8') if binary else text)
+        return count
+
+    def prefetch(self, batch_size=None, max_batches=None, executor=None):
+        """
+        Start prefetching `puid`s for the async API on the running event loop
+
+        The async API starts prefetching with the default arguments when first awaited on an event
+        loop. Prefetching slices entropy independently of `generate` and `generate_many`.
+
+        :param batch_size: Number of `puid`s generated per executor call. Defaults to `aio.PREFETCH_SIZE`
+        :param max_batches: Maximum number of prefetched batches awaiting consumption. Defaults to
+            `aio.PREFETCH_BATCHES`
+        :param executor: Executor for generation, or None for the loop's default executor
+        :return aio.Prefetcher
+        """
+        from puid import aio
+
+        batch_size = aio.PREFETCH_SIZE if batch_size is None else batch_size
+        max_batches = aio.PREFETCH_BATCHES if max_batches is None else max_batches
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+        puid_muncher, issued = self._new_puid_muncher(prefetched=True)
+        self._prefetcher = aio.Prefetcher(puid_muncher, self._entropy_fn, batch_size, max_batches, executor, issued)
+        return self._prefetcher
+
+    def _running_prefetcher(self):
+        from puid import aio
+
+        if self._prefetcher is None or self._prefetcher.loop is not aio.running_loop():
+            return self.prefetch()
+        return self._prefetcher
+
+    async def agenerate(self):
+        """
+        Generate a `puid` without blocking the event loop
+        """
+        return await self._running_prefetcher().next()
+
+    async def agenerate_many(self, n):
+        """
+        Generate `n` `puid`s without blocking the event loop
+
+        :param n: Number of `puid`s
+        :return list
+        """
+        return await self._running_prefetcher().many(n)
+
+    async def __aiter__(self):
+        """
+        Endless async iterator of prefetched `puid`s
+        """
+        prefetcher = self._running_prefetcher()
+        while True:
+            yield await prefetcher.next()
+
+    def generate_parallel(self, n, workers=None, chunk_size=None):
+        """
+        Generate `n` `puid`s across worker processes
+
+        Each worker process slices entropy from its own call of the entropy source, which must be
+        picklable. A deterministic entropy source yields the same `puid`s in every worker.
+
+        :param n: Number of `puid`s
+        :param workers: Number of worker processes. Defaults to the number of CPUs
+        :param chunk_size: Number of `puid`s per chunk. Defaults to `parallel.CHUNK_SIZE`
+        :return Iterator of ordered lists of `puid`s
+        """
+        from puid import parallel
+
+        return parallel.parallel_chunks(self, n, workers, parallel.CHUNK_SIZE if chunk_size is None else chunk_size)
+
+    def write_parallel(self, n, paths, workers=None, sep='\n'):
+        """
+        Write `n` `puid`s across worker processes into the partition files at `paths`
+
+        :param n: Total number of `puid`s
+        :param paths: Paths of the partition files, each written by one worker
+        :param workers: Number of worker processes. Defaults to the number of CPUs
+        :param sep: Separator written after each `puid`
+        :return list of the number of `puid`s written to each file
+        """
+        from puid import parallel
+
+        return parallel.parallel_files(self, n, paths, workers, sep)
+
+
+def generate(total=None, risk=None, bits=None, chars=None):
+    """
+    Generate a `puid` of the configuration, from the `Puid` shared by `Puid.cached`
+
+    >>> len(generate(bits=64, chars=Chars.HEX))
+    16
+    """
+    return Puid.cached(total, risk, bits, chars).generate()
@@ -20,3 +20,31 @@ class TotalRiskError(PuidError):
       - total and risk are not both specified
     """
     pass
+
+
+class EngineError(PuidError):
+    """
+    Raised when
+      - engine is not a known engine
+      - engine requires an optional dependency that is not installed
+      - engine cannot encode the chars
+    """
+    pass
+
+
+class EntropyBufferError(PuidError):
+    """
+    Raised when
+      - entropy buffer size is not a positive integer
+    """
+    pass
+
+
+class PackError(PuidError):
+    """
+    Raised when
+      - a puid to pack is not of the Puid chars and length
+      - a packed puid is out of range for the Puid chars and length
+      - chars are case sensitive when ignoring case
+    """
+    pass
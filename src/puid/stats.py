@@ -0,0 +1,118 @@
+"""
+Counters of `puid` generation and entropy consumption
+
+A `Puid` created with `stats=True` gives each of its munchers its own `Counters`, so counting needs no
+lock even when threads each use their own muncher. Counts are summed across munchers when read. The
+counts of a muncher no longer in use, such as that of a finished thread, are folded into retired
+counters, which head the list and which no muncher counts into, so the list does not grow with threads.
+"""
+from threading import Lock
+
+# Serializes folding counts into retired counters with summing them
+_retiring = Lock()
+
+# Counter name: Prometheus help text
+COUNTERS = {
+    'ids': 'Number of puids generated',
+    'entropy_calls': 'Number of calls to the entropy source',
+    'entropy_bytes': 'Number of entropy bytes requested from the entropy source',
+    'bits_sliced': 'Number of entropy bits sliced into puid characters, including rejected bits',
+    'rejections': 'Number of sliced values rejected as beyond the number of characters',
+    'rejected_bits': 'Number of entropy bits discarded by rejected values',
+}
+
+
+class Counters:
+    """
+    Counts of a single muncher
+    """
+
+    __slots__ = ('ids', 'entropy_calls', 'entropy_bytes', 'rejections', 'rejected_bits')
+
+    def __init__(self):
+        self.ids = 0
+        self.entropy_calls = 0
+        self.entropy_bytes = 0
+        self.rejections = 0
+        self.rejected_bits = 0
+
+
+def counted_entropy(entropy_fn, counters):
+    def counted(n_bytes):
+        counters.entropy_calls += 1
+        counters.entropy_bytes += n_bytes
+        return entropy_fn(n_bytes)
+
+    return counted
+
+
+def counted_muncher(puid_muncher, counters):
+    def counted(n_puids=None):
+        counters.ids += 1 if n_puids is None else n_puids
+        return puid_muncher(n_puids)
+
+    return counted
+
+
+def retire(counters_list, counters):
+    """
+    Fold `counters` of a muncher no longer in use into the retired counters heading `counters_list`
+
+    :param counters_list: List of Counters, the first of which are the retired counters
+    :param counters: Counters of a muncher no longer in use
+    """
+    with _retiring:
+        retired = counters_list[0]
+        for name in Counters.__slots__:
+            setattr(retired, name, getattr(retired, name) + getattr(counters, name))
+        counters_list.remove(counters)
+
+
+def totals(counters_list, n_bits_per_puid):
+    """
+    Counts summed over `counters_list`
+
+    Accepted values slice exactly `n_bits_per_puid` bits per `puid`, so the bits sliced are those bits
+    plus the bits discarded by rejections.
+
+    :param counters_list: List of Counters
+    :param n_bits_per_puid: Bits sliced per `puid` when no value is rejected
+    :return dict
+    """
+    with _retiring:
+        counts = {name: sum([getattr(counters, name) for counters in counters_list]) for name in Counters.__slots__}
+    counts['bits_sliced'] = counts['ids'] * n_bits_per_puid + counts['rejected_bits']
+    counts['bits_per_rejection'] = counts['rejected_bits'] / counts['rejections'] if counts['rejections'] else 0.0
+    return counts
+
+
+def prometheus(counts, labels=None, prefix='puid'):
+    """
+    Counts in Prometheus text exposition format
+
+    >>> print(prometheus({'ids': 3}, {'name': 'session'}), end='')
+    # HELP puid_ids_total Number of puids generated
+    # TYPE puid_ids_total counter
+    puid_ids_total{name="session"} 3
+
+    :param counts: dict of counts, as returned by `Puid.stats`
+    :param labels: dict of label names to values
+    :param prefix: Prefix of each metric name
+    :return str
+    """
+    label_values = ','.join([f'{name}="{_escaped(str(value))}"' for name, value in (labels or {}).items()])
+    label_set = f'{{{label_values}}}' if label_values else ''
+
+    lines = []
+    for name, help_text in COUNTERS.items():
+        if name not in counts:
+            continue
+        metric = f'{prefix}_{name}_total'
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric}{label_set} {counts[name]}')
+    return ''.join([line + '\n' for line in lines])
+
+
+def _escaped(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
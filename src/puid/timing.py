@@ -0,0 +1,187 @@
+"""
+Timing hooks around entropy fetches and `puid` generation
+
+A `Puid` created with a `tracer` times calls of its entropy source, single `puid` generation and batch
+generation, and passes the elapsed nanoseconds to the tracer. Only every `sample_every`-th call of each
+kind is timed, so untimed calls cost a countdown. A `Puid` without a tracer is not wrapped at all.
+"""
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter_ns
+
+from puid.puid_error import PuidError
+
+# Upper bounds of latency buckets in ns: 4 buckets per doubling from 64 ns to about 68 s
+BUCKET_BOUNDS = [round(2 ** (exp / 4)) for exp in range(24, 145)]
+
+
+class Tracer:
+    """
+    Base class of timing hooks
+
+    Each hook is called with the elapsed nanoseconds of a sampled call. Hooks are called from the
+    thread making the call, and the timed calls of `generate` and batches include their entropy calls.
+
+    :param sample_every: Time every `sample_every`-th call of each kind
+    """
+
+    def __init__(self, sample_every=1):
+        if not isinstance(sample_every, int) or sample_every <= 0:
+            raise PuidError('sample_every must be a positive integer')
+        self.sample_every = sample_every
+
+    def entropy(self, n_bytes, ns):
+        """Called with the duration of a call of the entropy source for `n_bytes` bytes"""
+        pass
+
+    def generate(self, ns):
+        """Called with the duration of a single `puid` generation"""
+        pass
+
+    def batch(self, n_puids, ns):
+        """Called with the duration of a batch generation of `n_puids` `puid`s"""
+        pass
+
+
+class LatencyHistogram:
+    """
+    Counts of latencies in fixed buckets
+
+    Percentiles are the upper bound of the bucket holding the percentile rank, so they overstate the
+    latency by less than a bucket width, about 19%.
+
+    >>> histogram = LatencyHistogram()
+    >>> for ns in [1000, 1000, 1000, 50_000]:
+    ...     histogram.record(ns)
+    >>> histogram.percentile(50)
+    1024
+    >>> histogram.percentile(99)
+    50000
+    """
+
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        self.counts[bisect_left(self.bounds, ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if self.max_ns < ns:
+            self.max_ns = ns
+
+    def percentile(self, percent):
+        """
+        Latency in ns at or below which `percent` of the recorded latencies fall, or 0 if none recorded
+        """
+        if not self.count:
+            return 0
+
+        rank = max(1, round(self.count * percent / 100))
+        n_counted = 0
+        for ndx, count in enumerate(self.counts):
+            n_counted += count
+            if rank <= n_counted:
+                return min(self.bounds[ndx], self.max_ns) if ndx < len(self.bounds) else self.max_ns
+
+    def summary(self):
+        mean_ns = self.total_ns / self.count if self.count else 0
+        return {
+            'count': self.count,
+            'mean_ns': mean_ns,
+            'p50_ns': self.percentile(50),
+            'p90_ns': self.percentile(90),
+            'p99_ns': self.percentile(99),
+            'p999_ns': self.percentile(99.9),
+            'max_ns': self.max_ns,
+        }
+
+
+class Timings(Tracer):
+    """
+    Tracer recording sampled latencies into a `LatencyHistogram` per kind of call
+
+    Batch latencies are recorded per `puid`, so batches of different sizes share a histogram.
+
+    :param sample_every: Time every `sample_every`-th call of each kind
+    """
+
+    def __init__(self, sample_every=64):
+        super().__init__(sample_every)
+        self.entropy_latency = LatencyHistogram()
+        self.generate_latency = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+        self._lock = Lock()
+
+    def entropy(self, n_bytes, ns):
+        with self._lock:
+            self.entropy_latency.record(ns)
+
+    def generate(self, ns):
+        with self._lock:
+            self.generate_latency.record(ns)
+
+    def batch(self, n_puids, ns):
+        with self._lock:
+            self.batch_latency.record(ns // max(1, n_puids))
+
+    def summary(self):
+        with self._lock:
+            return {
+                'entropy': self.entropy_latency.summary(),
+                'generate': self.generate_latency.summary(),
+                'batch_per_puid': self.batch_latency.summary(),
+            }
+
+
+def traced_entropy(entropy_fn, tracer):
+    sample_every = tracer.sample_every
+    countdown = 1
+
+    def traced(n_bytes):
+        nonlocal countdown
+        countdown -= 1
+        if countdown:
+            return entropy_fn(n_bytes)
+
+        countdown = sample_every
+        start = perf_counter_ns()
+        entropy = entropy_fn(n_bytes)
+        tracer.entropy(n_bytes, perf_counter_ns() - start)
+        return entropy
+
+    return traced
+
+
+def traced_muncher(puid_muncher, tracer):
+    sample_every = tracer.sample_every
+    generate_countdown = 1
+    batch_countdown = 1
+
+    def traced(n_puids=None):
+        nonlocal generate_countdown, batch_countdown
+        if n_puids is None:
+            generate_countdown -= 1
+            if generate_countdown:
+                return puid_muncher()
+
+            generate_countdown = sample_every
+            start = perf_counter_ns()
+            puid = puid_muncher()
+            tracer.generate(perf_counter_ns() - start)
+            return puid
+
+        batch_countdown -= 1
+        if batch_countdown:
+            return puid_muncher(n_puids)
+
+        batch_countdown = sample_every
+        start = perf_counter_ns()
+        puids = puid_muncher(n_puids)
+        tracer.batch(n_puids, perf_counter_ns() - start)
+        return puids
+
+    return traced
@@ -0,0 +1,433 @@
+"""
+Vectorized slicing and encoding of `puid` batches using NumPy
+
+NumPy is an optional dependency. When it is not installed, `available()` is False and `Puid` uses the
+pure Python muncher. NumPy takes longer to import than all of `puid`, so it is imported on first use
+rather than with this module: `available()` only looks for it, and `np` is imported by the first
+vectorized slicing or encoding.
+"""
+from importlib.machinery import PathFinder
+from math import ceil, log2
+
+from puid.puid_error import PackError
+
+
+# Odd multipliers of the two 64-bit lanes of digest_words, and of its final mix (that of MurmurHash3)
+_LANE_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xD6E8FEB86659FD93)
+_MIX_MULTIPLIERS = (0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53)
+
+
+def available():
+    if 'np' in globals():
+        return np is not None
+    return PathFinder.find_spec('numpy') is not None
+
+
+def _numpy():
+    global np
+    if 'np' not in globals():
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover
+            np = None
+    return np
+
+
+def __getattr__(name):
+    if name == 'np':
+        return _numpy()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def pow2_values(entropy_bytes, entropy_offset, n_values, n_bits_per_char):
+    """
+    Slice `n_values` consecutive `n_bits_per_char` values from `entropy_bytes` starting at bit
+    `entropy_offset`
+
+    This yields exactly the values the pure Python muncher slices one at a time when the number of
+    characters is a power of 2.
+
+    :param entropy_bytes: bytes-like entropy
+    :param entropy_offset: Bit offset of the first value
+    :param n_values: Number of values to slice
+    :param n_bits_per_char: Bits per value (1 to 8)
+    :return numpy.ndarray of uint8
+    """
+    np = _numpy()
+    l_byte_ndx = entropy_offset // 8
+    r_byte_ndx = ceil((entropy_offset + n_values * n_bits_per_char) / 8)
+    l_bit_num = entropy_offset % 8
+
+    # Slicing copies the bytes, so the entropy buffer is not held by the array
+    entropy = np.frombuffer(entropy_bytes[l_byte_ndx:r_byte_ndx], dtype=np.uint8)
+    bits = np.unpackbits(entropy)[l_bit_num : l_bit_num + n_values * n_bits_per_char]
+
+    # Each row of bits packs left-aligned into a byte; shift right to the value
+    values = np.packbits(bits.reshape(n_values, n_bits_per_char), axis=1).ravel()
+    return values >> (8 - n_bits_per_char)
+
+
+def _searched(is_before, n_stops, n_walks):
+    """
+    Index of the first stop of each walk at which `is_before` is False, found by bisection
+
+    :param is_before: Function mapping an index into each walk to whether the stop at each is before
+        that sought, which along each walk must be True and then False
+    :param n_stops: Number of stops of each walk
+    :param n_walks: Number of walks
+    :return numpy.ndarray of the index into each walk, or n_stops if is_before is True throughout
+    """
+    np = _numpy()
+    lo = np.zeros(n_walks, dtype=np.int64)
+    hi = np.full(n_walks, n_stops, dtype=np.int64)
+    for _ in range(n_stops.bit_length()):
+        mid = (lo + hi) >> 1
+        before = is_before(np.minimum(mid, n_stops - 1)) & (mid < hi)
+        lo = np.where(before, mid + 1, lo)
+        hi = np.where(before, hi, mid)
+    return lo
+
+
+def _meets(walks, next_walks):
+    """
+    Where each of `walks` meets the corresponding walk of `next_walks`
+
+    Walks that meet stop at the same stops from then on, so either the last stop of a walk is a stop of
+    the next walk, or the last stop of the next walk is a stop of the walk. The same stops of the walks
+    then differ in index by a lag.
+
+    :param walks: numpy.ndarray of walks, one per row, each of increasing stop offsets
+    :param next_walks: numpy.ndarray of walks of the same shape as walks
+    :return (numpy.ndarray of the index into each walk of its first stop in the next walk, or the
+        number of stops if the walks do not meet, numpy.ndarray of the lags)
+    """
+    np = _numpy()
+    n_walks, n_stops = walks.shape
+    last_ndx = n_stops - 1
+    walk_ndx = np.arange(n_walks)
+    last, next_last = walks[:, -1], next_walks[:, -1]
+
+    def stop(ndx):
+        return walks[walk_ndx, ndx]
+
+    def next_stop(ndx):
+        return next_walks[walk_ndx, ndx]
+
+    # Index of the last stop of each walk in the other walk
+    last_in_next = np.minimum(_searched(lambda ndx: next_stop(ndx) < last, n_stops, n_walks), last_ndx)
+    next_last_in = np.minimum(_searched(lambda ndx: stop(ndx) < next_last, n_stops, n_walks), last_ndx)
+    is_last_in_next = next_stop(last_in_next) == last
+    meet = is_last_in_next | (stop(next_last_in) == next_last)
+    lags = np.where(is_last_in_next, last_ndx - last_in_next, next_last_in - last_ndx)
+
+    # The walks are the same, the lag apart, from the first index at which they meet
+    lo = np.maximum(lags, 0)
+    span = np.minimum(last_ndx, last_ndx + lags) - lo + 1
+
+    def is_before(ndx):
+        return (ndx < span) & (stop(np.minimum(lo + ndx, last_ndx)) != next_stop(np.clip(lo + ndx - lags, 0, last_ndx)))
+
+    meet_ndx = lo + _searched(is_before, n_stops, n_walks)
+    return (np.where(meet & (meet_ndx - lo < span), meet_ndx, n_stops), lags)
+
+
+# Number of set bits in each byte above each bit, at index 9 * byte + bit
+_n_bits_above = [bin(byte >> (8 - bit)).count('1') for byte in range(256) for bit in range(9)]
+
+
+def rejection_values(entropy_bytes, entropy_offset, n_values, n_bits_per_char, n_chars, value_shifts):
+    """
+    Slice up to `n_values` accepted values from `entropy_bytes` starting at bit `entropy_offset`
+
+    Values are accepted and rejected exactly as in the pure Python muncher: a value less than
+    `n_chars` is accepted and shifts `n_bits_per_char` bits, while a rejected value shifts the minimal
+    bits given by `value_shifts`.
+
+    Candidate values are sliced at every bit offset at once. Accepted values between rejections lie
+    `n_bits_per_char` apart, so slicing is a walk from rejection to rejection. The entropy is split
+    into blocks, and walks from the start of every block are stepped in lockstep. Walks from different
+    offsets soon meet and from then on are the same, so the walk from the first offset is followed from
+    block to block where each walk meets the next, which is all that is done per block in Python.
+
+    Fewer than `n_values` are returned if the entropy runs out, in which case the returned bit count
+    is where slicing should resume once more entropy is available. Only rejected values whose bits are
+    consumed are counted.
+
+    :param entropy_bytes: bytes-like entropy
+    :param entropy_offset: Bit offset of the first value
+    :param n_values: Maximum number of values to slice
+    :param n_bits_per_char: Bits per sliced value
+    :param n_chars: Number of characters
+    :param value_shifts: List of bits shifted for each possible sliced value
+    :return (numpy.ndarray of uint8, bits consumed, rejected values consumed)
+    """
+    np = _numpy()
+    l_byte_ndx = entropy_offset // 8
+    l_bit_num = entropy_offset % 8
+
+    entropy = np.frombuffer(entropy_bytes[l_byte_ndx:], dtype=np.uint8)
+
+    # Values are sliced at every bit offset for which n_bits_per_char bits remain
+    n_slices = 8 * len(entropy) - n_bits_per_char + 1
+    if n_values <= 0 or n_slices <= l_bit_num:
+        return (np.zeros(0, dtype=np.uint8), 0, 0)
+
+    # Walks are of up to 64 stops, or about the expected stops of all the slices if fewer
+    n_bits_per_stop = sum(value_shifts) / (len(value_shifts) - n_chars)
+    n_steps = min(64, ceil(n_slices / n_bits_per_stop) + 1)
+
+    # Offsets are laid out in rows of n_bits_per_char, so a run of accepted values is down a column.
+    # Offsets past the last slice are all stops, and there are enough rows of them that walks stay
+    # within the rows.
+    n_rows = ceil(n_slices / n_bits_per_char) + n_steps + 2
+    n_offsets = n_rows * n_bits_per_char
+
+    # The value at each bit of a byte is sliced from the 16 bits of the byte and the next byte
+    windows = np.append(entropy, np.uint8(0)).astype(np.uint16)
+    windows = (windows[:-1] << 8) | windows[1:]
+    values = np.full(n_offsets, 255, dtype=np.uint8)
+    byte_values = values[: 8 * len(entropy)].reshape(len(entropy), 8)
+    for bit in range(8):
+        byte_values[:, bit] = (windows >> (16 - n_bits_per_char - bit)) & ((1 << n_bits_per_char) - 1)
+    values[n_slices:] = 255
+
+    # Stops are rejected values and offsets past the last slice. Walks step by the keys of offsets
+    # column by column, so the next stop down a column is the first stop at or after a key: the stop
+    # ranked by the number of stops before the key, counted by byte of packed stops.
+    column_values = values.reshape(n_rows, n_bits_per_char).T.ravel()
+    is_stop = n_chars <= column_values
+    stop_keys = np.flatnonzero(is_stop)
+    byte_ndxs = np.packbits(is_stop).astype(np.int32) * 9
+    n_bits_above = np.array(_n_bits_above, dtype=np.int32)
+    n_stops_before = np.zeros(len(byte_ndxs), dtype=np.int32)
+    np.cumsum(n_bits_above[byte_ndxs[:-1] + 8], out=n_stops_before[1:])
+
+    def next_stop(keys):
+        byte = keys >> 3
+        return stop_keys[n_stops_before[byte] + n_bits_above[byte_ndxs[byte] + (keys & 7)]]
+
+    # Change in key on shifting past each value in each column. Offsets past the last slice are given
+    # the shift of an accepted value.
+    shifts = np.array(list(value_shifts) + [n_bits_per_char] * (256 - len(value_shifts)), dtype=np.int64)
+    columns = np.arange(n_bits_per_char)[:, None] + shifts
+    key_shifts = ((columns % n_bits_per_char - np.arange(n_bits_per_char)[:, None]) * n_rows + columns // n_bits_per_char).ravel()
+
+    def walked(offsets):
+        rows, columns = np.divmod(offsets, n_bits_per_char)
+        keys = np.empty((n_steps + 1, len(offsets)), dtype=np.int64)
+        keys[0] = next_stop(columns * n_rows + rows)
+        for step in range(n_steps):
+            key = keys[step]
+            keys[step + 1] = next_stop(key + key_shifts[(key // n_rows << 8) + column_values[key]])
+        columns, rows = np.divmod(keys.T, n_rows)
+        return rows * n_bits_per_char + columns
+
+    # Walks from the first offset and from the start of blocks of about three quarters of the stops of
+    # a walk. Walks stay in their columns modulo the greatest common divisor of the shifts, so blocks
+    # start a multiple of n_bits_per_char bits apart.
+    n_block_bits = max(1, round(n_steps * n_bits_per_stop * 3 / 4 / n_bits_per_char)) * n_bits_per_char
+    walks = walked(np.arange(l_bit_num, max(n_slices, l_bit_num + 1), n_block_bits))
+
+    # The last walk has no next walk to meet
+    meet_ndx, lags = _meets(walks[:-1], walks[1:])
+    meet_ndx = np.append(meet_ndx, n_steps + 1)
+    lags = np.append(lags, 0)
+
+    # Walks that do not meet the next walk are continued by a further walk, which meets the walk at its
+    # last stop, until they do or they pass the last slice
+    unmet = np.flatnonzero((meet_ndx == n_steps + 1) & (walks[:, -1] < n_slices))
+    while len(unmet):
+        continued = walked(walks[unmet, -1])
+        continued_meet_ndx = np.full(len(unmet), n_steps + 1)
+        continued_lags = np.zeros(len(unmet), dtype=np.int64)
+        has_next = unmet + 1 < len(walks)
+        continued_meet_ndx[has_next], continued_lags[has_next] = _meets(continued[has_next], walks[unmet[has_next] + 1])
+
+        meet_ndx[unmet], lags[unmet] = n_steps, n_steps
+        walks = np.insert(walks, unmet + 1, continued, axis=0)
+        meet_ndx = np.insert(meet_ndx, unmet + 1, continued_meet_ndx)
+        lags = np.insert(lags, unmet + 1, continued_lags)
+        unmet = np.flatnonzero((meet_ndx == n_steps + 1) & (walks[:, -1] < n_slices))
+
+    # Follow the walk from the first offset from walk to walk where they meet
+    walk_starts = []
+    walk_ends = []
+    walk_ndx = 0
+    for meet, lag in zip(meet_ndx.tolist(), lags.tolist()):
+        walk_starts.append(walk_ndx)
+        if meet == n_steps + 1:
+            walk_ends.append(n_steps + 1)
+            break
+        walk_ndx = max(walk_ndx, meet)
+        walk_ends.append(walk_ndx)
+        walk_ndx -= lag
+
+    ndx = np.arange(n_steps + 1)
+    walk_starts = np.array(walk_starts)[:, None]
+    walk_ends = np.array(walk_ends)[:, None]
+    run_stops = walks[: len(walk_starts)][(walk_starts <= ndx) & (ndx < walk_ends)]
+    run_stops = run_stops[: np.searchsorted(run_stops, n_slices) + 1]
+
+    # Each run starts where slicing resumed after the previous stop
+    run_starts = np.concatenate([[l_bit_num], run_stops[:-1] + shifts[values[run_stops[:-1]]]])
+    counts = (run_stops - run_starts) // n_bits_per_char
+    n_founds = np.cumsum(counts)
+
+    if n_values <= n_founds[-1]:
+        # Drop the runs after that reaching n_values, and any excess values from that run; slicing
+        # resumes after the last value
+        n_runs = int(np.searchsorted(n_founds, n_values)) + 1
+        run_stops, run_starts, counts = run_stops[:n_runs], run_starts[:n_runs], counts[:n_runs]
+        counts[-1] -= n_founds[n_runs - 1] - n_values
+        n_found = n_values
+        offset = int(run_starts[-1] + counts[-1] * n_bits_per_char)
+    else:
+        # The walk passed the last slice; slicing resumes at its last stop
+        n_found = int(n_founds[-1])
+        offset = int(run_stops[-1])
+
+    # Every stop but the last is a rejection that was shifted past
+    n_rejects = len(run_stops) - 1
+
+    # Offsets of accepted values: each run steps by n_bits_per_char from its start
+    run_offsets = np.repeat(run_starts - n_bits_per_char * (np.cumsum(counts) - counts), counts)
+    accepted = run_offsets + n_bits_per_char * np.arange(n_found)
+
+    return (values[accepted], offset - l_bit_num, n_rejects)
+
+
+def chars_encoder(chars, puid_len, as_bytes=False):
+    """
+    Encoder for a batch of `puid` values
+
+    :param chars: ValidChars
+    :param puid_len: Length of each `puid`
+    :param as_bytes: Whether `puid`s are UTF-8 bytes rather than strings. `puid`s of ASCII chars are
+        joined into a single bytes, and of other chars are a list of bytes
+    :return Function mapping an ndarray of values to `puid`s
+    """
+    np = _numpy()
+    codes = [ord(char) for char in chars.value]
+
+    if as_bytes and max(codes) < 128:
+        byte_lut = np.array(codes, dtype=np.uint8)
+
+        def encoded_bytes(values):
+            return byte_lut[values].tobytes()
+
+        return encoded_bytes
+
+    if as_bytes:
+        # Rows of the UTF-8 bytes of each char, left aligned, of which the first width bytes are taken
+        utf8_chars = [char.encode('utf-8') for char in chars.value]
+        widths = np.array([len(utf8_char) for utf8_char in utf8_chars], dtype=np.int64)
+        utf8_lut = np.array([list(utf8_char.ljust(4, b'\0')) for utf8_char in utf8_chars], dtype=np.uint8)
+        columns = np.arange(4)
+
+        def encoded_utf8(values):
+            value_widths = widths[values]
+            joined = utf8_lut[values][columns < value_widths[..., None]].tobytes()
+            ends = np.cumsum(value_widths.sum(axis=-1)).tolist()
+            return [joined[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+        return encoded_utf8
+
+    if max(codes) < 128:
+        lut = np.array(codes, dtype=np.uint8)
+        codec = 'ascii'
+    else:
+        lut = np.array(codes, dtype='<u4')
+        codec = 'utf-32-le'
+
+    def encoded(values):
+        encoded_chars = lut[values].tobytes().decode(codec)
+        return [encoded_chars[ndx : ndx + puid_len] for ndx in range(0, len(encoded_chars), puid_len)]
+
+    return encoded
+
+
+def packed_words(puids, chars, puid_len):
+    """
+    Packed form of a batch of `puid`s as uint64 words of base `len(chars)` digits
+
+    Each word packs the values of as many consecutive chars as fit in 63 bits, most significant first,
+    so the words of a `puid` are a fixed width, injective form of its values.
+
+    :param puids: List of `puid` strs
+    :param chars: ValidChars
+    :param puid_len: Length of each `puid`
+    :return numpy.ndarray of uint64 with a row of words per `puid`
+    """
+    np = _numpy()
+    n_puids = len(puids)
+    n_chars = len(chars)
+    if np.any(np.fromiter(map(len, puids), dtype=np.int64, count=n_puids) != puid_len):
+        raise PackError(f'puids must be {puid_len} chars')
+
+    joined = ''.join(puids)
+    if chars.value.isascii():
+        # ASCII chars number at most 128, so values and the invalid marker fit a byte
+        lut = np.full(256, n_chars, dtype=np.uint8)
+        lut[[ord(char) for char in chars.value]] = np.arange(n_chars, dtype=np.uint8)
+        try:
+            values = lut.take(np.frombuffer(joined.encode('ascii'), dtype=np.uint8))
+        except UnicodeEncodeError:
+            raise PackError(f'puids must be {chars.name} chars') from None
+    else:
+        order = np.argsort([ord(char) for char in chars.value])
+        codes = np.array([ord(char) for char in chars.value], dtype=np.uint32)[order]
+        points = np.frombuffer(joined.encode('utf-32-le'), dtype='<u4')
+        ndx = np.minimum(np.searchsorted(codes, points), n_chars - 1)
+        values = np.where(codes[ndx] == points, order[ndx], n_chars).astype(np.uint16)
+    if np.any(values == n_chars):
+        raise PackError(f'puids must be {chars.name} chars')
+    # Columns of values, contiguous for packing
+    columns = np.ascontiguousarray(values.reshape(n_puids, puid_len).T)
+
+    n_chars_per_word = max(1, int(63 // log2(n_chars)))
+    words = np.empty((n_puids, ceil(puid_len / n_chars_per_word)), dtype=np.uint64)
+    radix = np.uint64(n_chars)
+    for word_ndx, ndx in enumerate(range(0, puid_len, n_chars_per_word)):
+        word = columns[ndx].astype(np.uint64)
+        for column in columns[ndx + 1 : ndx + n_chars_per_word]:
+            word *= radix
+            word += column
+        words[:, word_ndx] = word
+    return words
+
+
+def digest_words(data, n_rows):
+    """
+    128 bit digests of `n_rows` equal rows of `data` as 2 uint64 words
+
+    Each lane of a digest folds the little-endian words of a row into a 64-bit state by xor, an odd
+    multiply and a shift, and ends with the MurmurHash3 finalizer. The digests are the same in every
+    process, unlike str hashes.
+
+    :param data: bytes-like of `n_rows` rows of equal length
+    :param n_rows: Number of rows
+    :return numpy.ndarray of uint64 with a row of 2 words per row of `data`
+    """
+    np = _numpy()
+    n_row_bytes = len(data) // n_rows if n_rows else 0
+    n_words = (n_row_bytes + 7) // 8
+    padded = np.zeros((n_rows, 8 * n_words), dtype=np.uint8)
+    padded[:, :n_row_bytes] = np.frombuffer(data, dtype=np.uint8).reshape(n_rows, n_row_bytes)
+    # Columns of words, contiguous for folding
+    columns = np.ascontiguousarray(padded.view('<u8').T)
+
+    digests = np.empty((n_rows, 2), dtype=np.uint64)
+    shift, mix_shift = np.uint64(31), np.uint64(33)
+    for lane, multiplier in enumerate(_LANE_MULTIPLIERS):
+        multiplier = np.uint64(multiplier)
+        state = np.full(n_rows, n_row_bytes + lane, dtype=np.uint64)
+        for column in columns:
+            state ^= column
+            state *= multiplier
+            state ^= state >> shift
+        for mix_multiplier in _MIX_MULTIPLIERS:
+            state ^= state >> mix_shift
+            state *= np.uint64(mix_multiplier)
+        state ^= state >> mix_shift
+        digests[:, lane] = state
+    return digests
@@ -0,0 +1,125 @@
+import asyncio
+import os
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+from puid.budget import RiskBudget
+from puid.puid_error import PuidError
+
+
+@pytest.mark.parametrize("chars", [Chars.SAFE64, Chars.ALPHANUM, 'dingosky'])
+def test_agenerate(util, chars):
+    async_id = Puid(chars=chars, entropy_source=util.seeded_bytes(41))
+    rand_id = Puid(chars=chars, entropy_source=util.seeded_bytes(41))
+
+    async def agenerate():
+        return [await async_id.agenerate() for _ in range(10)] + await async_id.agenerate_many(3000)
+
+    assert asyncio.run(agenerate()) == rand_id.generate_many(3010)
+
+
+def test_async_entropy_source(util):
+    entropy_bytes = util.seeded_bytes(43)
+
+    async def async_entropy(n_bytes):
+        await asyncio.sleep(0)
+        return entropy_bytes(n_bytes)
+
+    async_id = Puid(chars=Chars.ALPHANUM, entropy_source=async_entropy)
+    rand_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(43))
+
+    assert async_id.entropy_source.endswith('async_entropy')
+    assert asyncio.run(async_id.agenerate_many(100)) == rand_id.generate_many(100)
+
+    with pytest.raises(PuidError):
+        async_id.generate()
+
+
+def test_async_iter():
+    async_id = Puid(chars=Chars.HEX)
+
+    async def aiterate():
+        puids = []
+        async for puid in async_id:
+            puids.append(puid)
+            if len(puids) == 10:
+                return puids
+
+    puids = asyncio.run(aiterate())
+    assert len(set(puids)) == 10
+    assert all([len(puid) == async_id.len for puid in puids])
+
+
+def test_prefetch_backpressure():
+    async_id = Puid()
+
+    async def prefetch():
+        prefetcher = async_id.prefetch(batch_size=10, max_batches=2)
+        await async_id.agenerate()
+        for _ in range(20):
+            await asyncio.sleep(0.001)
+        return prefetcher.n_batches
+
+    # One batch consumed, two queued and at most one more awaiting a place in the queue
+    assert asyncio.run(prefetch()) <= 4
+
+
+def test_prefetch_issued():
+    budget = RiskBudget()
+    async_id = Puid(total=10_000, risk=1e12, budget=budget, stats=True)
+
+    async def agenerate():
+        await async_id.agenerate()
+        await async_id.agenerate_many(10)
+        for _ in range(20):
+            await asyncio.sleep(0.001)
+
+    # Prefetched puids are issued only once handed out
+    asyncio.run(agenerate())
+    assert async_id._prefetcher.n_batches > 1
+    assert budget.issued == 11
+    assert async_id.stats()['ids'] == 11
+
+
+def test_prefetch_per_loop():
+    async_id = Puid()
+    puids = asyncio.run(async_id.agenerate_many(5)) + asyncio.run(async_id.agenerate_many(5))
+    assert len(set(puids)) == 10
+
+
+def test_prefetch_error():
+    def failed_entropy(n_bytes):
+        raise OSError('entropy unavailable')
+
+    async_id = Puid(chars=Chars.ALPHANUM, entropy_source=failed_entropy)
+
+    with pytest.raises(OSError):
+        asyncio.run(async_id.agenerate())
+
+    async def prefetch():
+        async_id.prefetch(batch_size=0)
+
+    with pytest.raises(PuidError):
+        asyncio.run(prefetch())
+
+
+def test_prefetch_error_recovers():
+    n_calls = []
+
+    def failing_once(n_bytes):
+        n_calls.append(n_bytes)
+        if len(n_calls) == 1:
+            raise OSError('entropy unavailable')
+        return os.urandom(n_bytes)
+
+    async_id = Puid(chars=Chars.ALPHANUM, entropy_source=failing_once)
+
+    async def generate():
+        with pytest.raises(OSError):
+            await async_id.agenerate()
+        return [await async_id.agenerate() for _ in range(3)] + await async_id.agenerate_many(2000)
+
+    puids = asyncio.run(generate())
+    assert len(set(puids)) == 2003
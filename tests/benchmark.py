@@ -0,0 +1,407 @@
+"""
+Benchmark suite of `puid` generation
+
+Reports IDs/sec, ns/char and entropy bytes consumed per `puid` for every predefined Chars and for custom
+ASCII and Unicode chars, at 64, 128, 256 and 1024 bits, with `secrets.token_bytes` and a seeded PRNG as
+entropy sources. `generate` is measured once per case and `generate_many` once per available engine.
+`uuid.uuid4`, `secrets.token_urlsafe` and `secrets.token_hex` are measured as baselines.
+
+Features are measured for SAFE64 and ALPHANUM `Puid`s of 128 bits: construction and `Puid.cached`
+lookups, UTF-8 `puid`s, thread safe, counted and traced generation, `write_to`, `Dedupe` checks and,
+unless quick, `generate_parallel`. Thread safe `Puid`s are also measured across 1 to 16 threads, and
+the table encoding of each predefined Chars against encoding each char by its encoder function.
+
+Bytes per `Puid`, before and after first use, are measured by tracemalloc. The cold start of
+`import puid; Puid().generate()` is run with `-X importtime`, with its slowest imports, and the run
+fails if the best cold start is over `IMPORT_BUDGET_MS`. Run with:
+
+    python tests/benchmark.py [--quick] [--save results.json] [--compare baseline.json]
+
+`--compare` reports each measurement against a saved run and exits with status 1 if any is slower by
+more than `--threshold` (default 0.1).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from random import Random, randrange
+from secrets import token_bytes, token_hex, token_urlsafe
+from threading import Barrier, Thread
+from time import perf_counter
+from timeit import Timer
+from uuid import uuid4
+
+import puid
+from puid import Chars
+from puid import Puid
+from puid import codec
+from puid import vector
+from puid.dedupe import Dedupe
+from puid.encoder import encoder, encoding
+from puid.timing import Timings
+
+BITS = [64, 128, 256, 1024]
+
+CUSTOM_CHARS = {
+    'custom_ascii': 'dingoskyDINGOSKY',
+    'custom_unicode': 'dîñgø$kyDÎÑGØßK¥',
+}
+
+# Chars of the feature measurements
+FEATURE_CHARS = [Chars.SAFE64, Chars.ALPHANUM]
+
+# Number of puids per generate_many call
+MANY_SIZE = 1000
+
+# Number of puids per generate_parallel call
+PARALLEL_SIZE = 200_000
+
+# Minimum seconds timed per measurement
+MIN_TIME = 0.2
+
+# Thread counts of the thread safe measurements
+THREADS = [1, 2, 4, 8, 16]
+
+# Number of puids generated by each thread
+THREAD_SIZE = 20_000
+
+# Configurations of the bytes per Puid measurements
+MEMORY_CONFIGS = [
+    ('safe64', {}),
+    ('alphanum 64 bits', {'chars': Chars.ALPHANUM, 'bits': 64}),
+    ('custom total/risk', {'chars': 'dingosky_me', 'total': 10**6, 'risk': 10**12}),
+    ('unicode 90 bits', {'chars': 'dîñgø$kyDÎÑGØßK¥', 'bits': 90}),
+]
+
+# Number of Puids per bytes per Puid measurement
+MEMORY_SIZE = 1000
+
+# Max ms of the best cold start of import puid; Puid().generate()
+IMPORT_BUDGET_MS = 100
+
+# Fresh interpreters timed for the cold start
+N_COLD_STARTS = 5
+
+# Slowest imports reported of the cold start
+N_SLOWEST_IMPORTS = 10
+
+COLD_START = 'from time import perf_counter; start = perf_counter(); import puid; puid.Puid().generate(); print(perf_counter() - start)'
+
+
+def prng_bytes(seed=1729):
+    rng = Random(seed)
+
+    def prng_bytes(n_bytes):
+        return rng.getrandbits(8 * n_bytes).to_bytes(n_bytes, 'big') if n_bytes else b''
+
+    return prng_bytes
+
+
+SOURCES = {
+    'token_bytes': lambda: token_bytes,
+    'prng': prng_bytes,
+}
+
+
+def counting(entropy_fn):
+    def counted(n_bytes):
+        counted.n_bytes += n_bytes
+        return entropy_fn(n_bytes)
+
+    counted.n_bytes = 0
+    return counted
+
+
+def timed(fn, n_per_call, min_time):
+    # Seconds per item of the fastest of 3 runs of at least `min_time` seconds
+    timer = Timer(fn)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat=3, number=number)) / (number * n_per_call)
+
+
+def measurement(key, per_id, id_len, entropy_bytes=None):
+    return {
+        'key': key,
+        'ids_per_sec': 1 / per_id,
+        'ns_per_char': 1e9 * per_id / id_len,
+        'entropy_bytes_per_id': entropy_bytes,
+    }
+
+
+def puid_measurements(chars_name, chars, bits, source_name, engines, min_time):
+    measurements = []
+    n_chars = len(chars.value if isinstance(chars, Chars) else chars)
+    for engine in [None] + (['codec'] if codec.encodable(n_chars) else []) + engines:
+        entropy_fn = counting(SOURCES[source_name]())
+        rand_id = Puid(bits=bits, chars=chars, entropy_source=entropy_fn, engine=engine)
+
+        if engine is None:
+            method, n_per_call, generate = 'generate', 1, rand_id.generate
+        else:
+            method, n_per_call = f'generate_many/{engine}', MANY_SIZE
+
+            def generate():
+                rand_id.generate_many(MANY_SIZE)
+
+        n_calls = 0
+
+        def fn():
+            nonlocal n_calls
+            n_calls += 1
+            generate()
+
+        per_id = timed(fn, n_per_call, min_time)
+        entropy_bytes = entropy_fn.n_bytes / (n_calls * n_per_call)
+        key = f'{chars_name} {bits} {source_name} {method}'
+        measurements.append(measurement(key, per_id, rand_id.len, entropy_bytes))
+    return measurements
+
+
+def baseline_measurements(min_time):
+    baselines = [
+        ('uuid4', lambda: str(uuid4()), 16),
+        ('secrets.token_urlsafe', lambda: token_urlsafe(16), 16),
+        ('secrets.token_hex', lambda: token_hex(16), 16),
+    ]
+    return [measurement(name, timed(fn, 1, min_time), len(fn()), n_bytes) for name, fn, n_bytes in baselines]
+
+
+def feature_measurements(chars, quick, min_time):
+    rand_id = Puid(chars=chars)
+    puids = rand_id.generate_many(MANY_SIZE)
+    devnull = open(os.devnull, 'w')
+
+    features = [
+        ('new Puid', lambda: Puid(chars=chars), 1),
+        ('Puid.cached', lambda: Puid.cached(chars=chars), 1),
+        ('generate_utf8', rand_id.generate_utf8, 1),
+        ('generate_many_utf8', lambda: rand_id.generate_many_utf8(MANY_SIZE), MANY_SIZE),
+        ('write_to', lambda: rand_id.write_to(devnull, MANY_SIZE), MANY_SIZE),
+        ('dedupe exact', lambda: Dedupe(rand_id).check_many(puids), MANY_SIZE),
+        ('dedupe filter', lambda: Dedupe(rand_id, total=MANY_SIZE, risk=1e9).check_many(puids), MANY_SIZE),
+    ]
+    for name, options in [('thread_safe', {'thread_safe': True}), ('stats', {'stats': True}), ('tracer', {'tracer': Timings()})]:
+        feature_id = Puid(chars=chars, **options)
+        features.append((f'{name} generate', feature_id.generate, 1))
+        features.append((f'{name} generate_many', lambda feature_id=feature_id: feature_id.generate_many(MANY_SIZE), MANY_SIZE))
+    if not quick:
+
+        def generate_parallel():
+            for _ in rand_id.generate_parallel(PARALLEL_SIZE, workers=2):
+                pass
+
+        features.append(('generate_parallel/2', generate_parallel, PARALLEL_SIZE))
+
+    with devnull:
+        return [measurement(f'{chars.name} 128 {name}', timed(fn, n_per_call, min_time), rand_id.len) for name, fn, n_per_call in features]
+
+
+def encoder_measurements(min_time):
+    measurements = []
+    for chars in Chars:
+        rand_id = Puid(chars=chars)
+        values = [randrange(len(rand_id.chars)) for _ in range(rand_id.len)]
+        chars_encoder = encoder(rand_id.chars)
+        table_encoded = encoding(rand_id.chars)
+
+        def per_char_encoded():
+            return ''.join([chr(chars_encoder(value)) for value in values])
+
+        assert per_char_encoded() == table_encoded(values)
+        for method, fn in [('per_char', per_char_encoded), ('table', lambda: table_encoded(values))]:
+            measurements.append(measurement(f'{chars.name} 128 encode/{method}', timed(fn, 1, min_time), rand_id.len))
+    return measurements
+
+
+def threads_per_id(rand_id, n_threads, batch):
+    # Seconds per puid of n_threads each generating THREAD_SIZE puids, the fastest of 3 runs
+    def generate():
+        barrier.wait()
+        if batch:
+            rand_id.generate_many(THREAD_SIZE)
+        else:
+            for _ in range(THREAD_SIZE):
+                rand_id.generate()
+
+    elapsed = []
+    for _ in range(3):
+        barrier = Barrier(n_threads + 1)
+        threads = [Thread(target=generate) for _ in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed.append(perf_counter() - start)
+    return min(elapsed) / (n_threads * THREAD_SIZE)
+
+
+def thread_measurements(chars):
+    rand_id = Puid(chars=chars, thread_safe=True)
+    measurements = []
+    for n_threads in THREADS:
+        for method, batch in [('generate', False), ('generate_many', True)]:
+            key = f'{chars.name} 128 thread_safe/{n_threads} threads {method}'
+            measurements.append(measurement(key, threads_per_id(rand_id, n_threads, batch), rand_id.len))
+    return measurements
+
+
+def bytes_per_puid(config, used):
+    tracemalloc.start()
+    rand_ids = [Puid(**config) for _ in range(MEMORY_SIZE)]
+    if used:
+        for rand_id in rand_ids:
+            rand_id.generate()
+    n_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return n_bytes / len(rand_ids)
+
+
+def memory_measurements(report=print):
+    report(f'\n{"bytes per Puid":<56}{"unused":>14}{"used":>10}')
+    memory = {}
+    for name, config in MEMORY_CONFIGS:
+        Puid(**config).generate()
+        memory[name] = {'unused': bytes_per_puid(config, False), 'used': bytes_per_puid(config, True)}
+        report(f'{name:<56}{memory[name]["unused"]:>14,.0f}{memory[name]["used"]:>10,.0f}')
+    return memory
+
+
+def cold_start():
+    # Wall ms and import us (self, cumulative) by module of import puid; Puid().generate() in a fresh interpreter
+    env = dict(os.environ)
+    src = os.path.dirname(os.path.dirname(puid.__file__))
+    env['PYTHONPATH'] = os.pathsep.join([src] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+    command = [sys.executable, '-X', 'importtime', '-c', COLD_START]
+    started = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+
+    import_us = {}
+    for line in started.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+            import_us[name.strip()] = (int(self_us), int(cumulative_us))
+    return 1e3 * float(started.stdout), import_us
+
+
+def import_measurements(report=print):
+    wall_ms, import_us = min([cold_start() for _ in range(N_COLD_STARTS)], key=lambda started: started[0])
+    puid_ms = import_us['puid'][1] / 1e3
+    report(f'\nimport puid; Puid().generate(), best of {N_COLD_STARTS} fresh interpreters')
+    report(f'  total {wall_ms:.1f} ms, import puid {puid_ms:.1f} ms, budget {IMPORT_BUDGET_MS} ms')
+    report('  slowest imports, self ms:')
+    for name, (self_us, _) in sorted(import_us.items(), key=lambda item: -item[1][0])[:N_SLOWEST_IMPORTS]:
+        report(f'    {name:<28}{self_us / 1e3:>6.1f}')
+    return {'total_ms': wall_ms, 'puid_ms': puid_ms, 'budget_ms': IMPORT_BUDGET_MS}
+
+
+def run(quick=False, min_time=MIN_TIME, report=print):
+    """
+    Run the benchmark suite
+
+    :param quick: Only measure 128 bits with `secrets.token_bytes`, and no worker processes
+    :param min_time: Minimum seconds timed per measurement
+    :param report: Called with each report line
+    :return dict of run info and measurements
+    """
+    charsets = [(chars.name, chars) for chars in Chars] + list(CUSTOM_CHARS.items())
+    engines = ['python'] + (['numpy'] if vector.available() else [])
+    bits_levels = [128] if quick else BITS
+    sources = ['token_bytes'] if quick else list(SOURCES)
+
+    cold_start_import = import_measurements(report)
+    memory = memory_measurements(report)
+
+    report(f'\n{"measurement":<56}{"IDs/sec":>14}{"ns/char":>10}{"bytes/id":>10}')
+    measurements = []
+
+    def add(measured):
+        for entry in measured:
+            bytes_per_id = entry['entropy_bytes_per_id']
+            bytes_column = '' if bytes_per_id is None else f'{bytes_per_id:.2f}'
+            report(f'{entry["key"]:<56}{entry["ids_per_sec"]:>14,.0f}{entry["ns_per_char"]:>10.1f}{bytes_column:>10}')
+        measurements.extend(measured)
+
+    add(baseline_measurements(min_time))
+    for chars_name, chars in charsets:
+        for bits in bits_levels:
+            for source_name in sources:
+                add(puid_measurements(chars_name, chars, bits, source_name, engines, min_time))
+    for chars in FEATURE_CHARS:
+        add(feature_measurements(chars, quick, min_time))
+        add(thread_measurements(chars))
+    add(encoder_measurements(min_time))
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'engines': engines,
+        'import': cold_start_import,
+        'memory': memory,
+        'measurements': measurements,
+    }
+
+
+def compare(results, baseline, threshold=0.1, report=print):
+    """
+    Report IDs/sec of `results` relative to `baseline` for measurements in both
+
+    :param threshold: Fraction slower than `baseline` reported as a regression
+    :return list of the keys of regressed measurements
+    """
+    baseline_rates = {entry['key']: entry['ids_per_sec'] for entry in baseline['measurements']}
+
+    report(f'\n{"measurement":<56}{"baseline":>14}{"current":>14}{"change":>9}')
+    regressions = []
+    for entry in results['measurements']:
+        if entry['key'] not in baseline_rates:
+            continue
+        was, now = baseline_rates[entry['key']], entry['ids_per_sec']
+        change = now / was - 1
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(entry['key'])
+        report(f'{entry["key"]:<56}{was:>14,.0f}{now:>14,.0f}{change:>+9.1%}{"  REGRESSION" if regressed else ""}')
+
+    report(f'\n{len(regressions)} regressions beyond {threshold:.0%}')
+    return regressions
+
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description='puid benchmark suite')
+    parser.add_argument('--quick', action='store_true', help='Only 128 bits with secrets.token_bytes, and no worker processes')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help='Minimum seconds timed per measurement')
+    parser.add_argument('--save', metavar='PATH', help='Save results as JSON')
+    parser.add_argument('--compare', metavar='PATH', help='Compare with results saved as JSON')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Fraction slower reported as a regression')
+    args = parser.parse_args(argv[1:])
+
+    results = run(args.quick, args.min_time)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            status = 1
+
+    total_ms = results['import']['total_ms']
+    if IMPORT_BUDGET_MS < total_ms:
+        print(f'\nimport puid; Puid().generate() took {total_ms:.1f} ms, over the budget of {IMPORT_BUDGET_MS} ms')
+        status = 1
+
+    return status
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
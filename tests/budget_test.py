@@ -0,0 +1,192 @@
+import pickle
+import threading
+import warnings
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+from puid.budget import RiskBudget
+from puid.budget import RiskBudgetWarning
+from puid.entropy import risk_for_total_bits
+from puid.puid_error import PuidError
+from puid.puid_error import TotalRiskError
+from puid.timing import Timings
+
+
+def test_issued():
+    budget = RiskBudget()
+    rand_id = Puid(total=10_000, risk=1e12, budget=budget)
+    assert (budget.total, budget.risk) == (10_000, 1e12)
+
+    rand_id.generate()
+    rand_id.generate_many(999)
+    rand_id.generate_bytes()
+    list(rand_id.stream(99))
+    assert budget.issued == 1100
+    assert budget.used == pytest.approx(0.11)
+
+    report = budget.report()
+    assert report['issued'] == 1100
+    assert report['effective_risk'] == risk_for_total_bits(1100, rand_id.bits)
+    assert report['effective_risk'] > budget.risk
+
+
+def test_effective_risk_past_total():
+    budget = RiskBudget(total=1000, risk=1e6, thresholds=[])
+    rand_id = Puid(bits=32, chars=Chars.HEX, budget=budget)
+    rand_id.generate_many(1000)
+    within_risk = budget.effective_risk
+    rand_id.generate_many(9000)
+    assert budget.effective_risk < within_risk / 99
+
+
+def test_thresholds_warn():
+    budget = RiskBudget(thresholds=(0.5, 1.0))
+    rand_id = Puid(total=1000, risk=1e9, budget=budget)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        for _ in range(499):
+            rand_id.generate()
+        assert not caught
+
+        rand_id.generate()
+        assert [warning.category for warning in caught] == [RiskBudgetWarning]
+        assert '50%' in str(caught[0].message)
+
+        rand_id.generate_many(2000)
+        assert len(caught) == 2
+        assert '100%' in str(caught[1].message)
+
+
+def test_on_threshold():
+    passed = []
+    budget = RiskBudget(total=100, risk=1e6, thresholds=(0.25, 0.5, 0.75), on_threshold=lambda budget, threshold: passed.append(threshold))
+    rand_id = Puid(bits=64, budget=budget, thread_safe=True)
+
+    for _ in range(60):
+        rand_id.generate()
+    assert passed == [0.25, 0.5]
+    rand_id.generate_many(40)
+    assert passed == [0.25, 0.5, 0.75]
+
+
+def test_threads():
+    budget = RiskBudget(total=10**6, risk=1e9)
+    rand_id = Puid(bits=64, thread_safe=True, budget=budget)
+
+    def generate():
+        for _ in range(5000):
+            rand_id.generate()
+        rand_id.generate_many(100)
+
+    threads = [threading.Thread(target=generate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert budget.issued == 4 * 5100
+
+
+def test_finished_threads():
+    budget = RiskBudget(total=10**6, risk=1e9)
+    rand_id = Puid(bits=64, thread_safe=True, budget=budget)
+
+    def generate():
+        for _ in range(10):
+            rand_id.generate()
+
+    for _ in range(50):
+        thread = threading.Thread(target=generate)
+        thread.start()
+        thread.join()
+
+    # Tallies of finished threads are added to the shared count
+    assert len(budget._tallies) <= 1
+    assert budget._count >= 490
+    assert budget.issued == 500
+
+
+def test_counter_file(tmp_path):
+    path = tmp_path / 'issued'
+    rand_id = Puid(total=10_000, risk=1e9, budget=RiskBudget(path=path))
+    rand_id.generate_many(100)
+    rand_id.generate()
+    assert path.read_text() == '100'
+    assert rand_id.budget.issued == 101
+
+    rand_id.budget.flush()
+    assert path.read_text() == '101'
+
+    # A budget of another process, or after a restart, continues the same count
+    other_budget = RiskBudget(total=10_000, risk=1e9, path=path)
+    other_id = Puid(total=10_000, risk=1e9, budget=other_budget)
+    other_id.generate_many(899)
+    assert rand_id.budget.issued == other_budget.issued == 1000
+
+
+def test_counter_file_workers(tmp_path):
+    path = tmp_path / 'issued'
+    budget = RiskBudget(total=10_000, risk=1e9, path=path)
+    rand_id = Puid(bits=64, budget=budget)
+    rand_id.generate_many(10)
+
+    assert sum([len(chunk) for chunk in rand_id.generate_parallel(3000, workers=2, chunk_size=1000)]) == 3000
+    assert budget.issued == 3010
+
+
+def test_parallel(tmp_path):
+    # Workers do not count: the budget counts the puids they return
+    budget = RiskBudget(total=10_000, risk=1e9, thresholds=(0.5,))
+    rand_id = Puid(bits=64, chars=Chars.HEX, budget=budget)
+    rand_id.generate()
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        assert sum([len(chunk) for chunk in rand_id.generate_parallel(5000, workers=2, chunk_size=1000)]) == 5000
+    assert budget.issued == 5001
+    assert budget.effective_risk == risk_for_total_bits(5001, rand_id.bits)
+    assert [warning.category for warning in caught] == [RiskBudgetWarning]
+    assert caught[0].filename == __file__
+
+    assert rand_id.write_parallel(1000, [tmp_path / 'a', tmp_path / 'b'], workers=2) == [500, 500]
+    assert budget.issued == 6001
+    assert rand_id.write_mmap(tmp_path / 'c', 1000, workers=2) == 1000
+    assert budget.issued == 7001
+
+
+@pytest.mark.parametrize("tracer", [None, Timings(sample_every=1)])
+def test_warning_caller(tracer):
+    budget = RiskBudget(total=100, risk=1e6, thresholds=(0.25, 0.5))
+    rand_id = Puid(bits=64, budget=budget, thread_safe=True, tracer=tracer)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        for _ in range(25):
+            rand_id.generate()
+        rand_id.generate_many(25)
+    assert [(warning.filename, warning.category) for warning in caught] == [(__file__, RiskBudgetWarning)] * 2
+
+
+def test_pickle():
+    rand_id = Puid(total=1000, risk=1e9, budget=RiskBudget())
+    rand_id.generate_many(10)
+    rand_id.generate()
+
+    unpickled_id = pickle.loads(pickle.dumps(rand_id))
+    assert unpickled_id.budget.issued == 11
+    unpickled_id.generate()
+    assert unpickled_id.budget.issued == 12
+    assert rand_id.budget.issued == 11
+
+
+def test_invalid_budgets():
+    with pytest.raises(TotalRiskError):
+        Puid(bits=64, budget=RiskBudget())
+    with pytest.raises(TotalRiskError):
+        RiskBudget(total=1000)
+    with pytest.raises(TotalRiskError):
+        RiskBudget(total=-1, risk=1e6)
+    with pytest.raises(PuidError):
+        RiskBudget(flush_every=0)
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+from puid.cli import formatter
+from puid.cli import main
+
+
+def run(tmp_path, *args):
+    path = tmp_path / 'puids.out'
+    assert main(['puid', '-o', str(path), *args]) == 0
+    return path.read_text(encoding='utf-8')
+
+
+def test_lines(tmp_path):
+    puids = run(tmp_path, '-n', '1000', '-c', 'alphanum', '-b', '64').split('\n')
+
+    assert puids[-1] == ''
+    puids = puids[:-1]
+    assert len(set(puids)) == 1000
+    rand_id = Puid(bits=64, chars=Chars.ALPHANUM)
+    assert all([len(puid) == rand_id.len and set(puid) <= set(Chars.ALPHANUM.value) for puid in puids])
+
+
+def test_custom_total_risk(tmp_path):
+    puids = run(tmp_path, '-n', '10', '-C', 'dîñgø$kyDÎÑGØßK¥', '-t', '1e6', '-r', '1e12').split('\n')[:-1]
+
+    rand_id = Puid(total=1e6, risk=1e12, chars='dîñgø$kyDÎÑGØßK¥')
+    assert len(puids) == 10
+    assert all([len(puid) == rand_id.len and set(puid) <= set(rand_id.chars.value) for puid in puids])
+
+
+def test_ndjson(tmp_path):
+    lines = run(tmp_path, '-n', '5', '-f', 'ndjson').split('\n')[:-1]
+
+    assert len(lines) == 5
+    assert all([len(json.loads(line)['puid']) == 22 for line in lines])
+
+
+def test_csv(tmp_path):
+    assert run(tmp_path, '-n', '3', '-f', 'csv').split('\n')[0] == 'puid'
+    assert run(tmp_path, '-n', '0', '-f', 'csv') == 'puid\n'
+
+    rows = run(tmp_path, '-n', '3', '-f', 'csv', '-c', 'symbol').split('\n')[1:-1]
+    assert all([row[0] == '"' and row[-1] == '"' for row in rows])
+
+
+def test_raw(tmp_path):
+    assert len(run(tmp_path, '-n', '100', '-f', 'raw', '-c', 'hex', '-b', '32')) == 800
+    assert run(tmp_path, '-n', '0', '-f', 'raw') == ''
+
+
+def test_workers(tmp_path):
+    puids = run(tmp_path, '-n', '2500', '-w', '2').split('\n')[:-1]
+
+    assert len(set(puids)) == 2500
+
+
+def test_mmap(tmp_path):
+    puids = run(tmp_path, '-m', '-n', '2500', '-c', 'alphanum').split('\n')
+    assert puids[-1] == ''
+    assert len(set(puids[:-1])) == 2500
+
+    assert len(run(tmp_path, '-m', '-n', '100', '-f', 'raw', '-c', 'hex', '-b', '32', '-w', '2')) == 800
+    assert run(tmp_path, '-m', '-n', '0') == ''
+
+
+def test_stdout(capsysbinary):
+    assert main(['puid', '-n', '2', '-c', 'hex_upper']) == 0
+
+    puids = capsysbinary.readouterr().out.decode('utf-8').split('\n')[:-1]
+    assert len(puids) == 2
+    assert all([set(puid) <= set(Chars.HEX_UPPER.value) for puid in puids])
+
+
+def test_formatter():
+    assert formatter('lines', Chars.HEX)(['abc', 'def']) == 'abc\ndef\n'
+    assert formatter('csv', Chars.HEX)(['abc', 'def']) == 'abc\ndef\n'
+    assert formatter('csv', Chars.SYMBOL)(['!,', '#$']) == '"!,"\n"#$"\n'
+    assert formatter('ndjson', Chars.HEX)([]) == ''
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ['-b', '64', '-t', '1e6', '-r', '1e9'],
+        ['-t', '1e6'],
+        ['-C', 'aa'],
+        ['-c', 'hexadecimal'],
+        ['-c', 'hex', '-C', 'abc'],
+        ['-n', '-1'],
+        ['-w', '0'],
+        ['-f', 'xml'],
+        ['-m'],
+        ['-m', '-f', 'csv', '-o', 'puids.csv'],
+        ['-m', '-C', 'dîñgø$kyDÎÑGØßK¥', '-o', 'puids.txt'],
+    ],
+)
+def test_errors(args, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(['puid', *args])
+    assert exit.value.code == 2
+    assert 'puid: error:' in capsys.readouterr().err
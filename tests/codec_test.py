@@ -0,0 +1,59 @@
+import pytest
+
+from puid import Chars
+from puid.bits import muncher
+from puid.chars import CustomChars, PredefinedChars
+from puid.codec import codec_muncher, encodable, preferred
+from puid.encoder import encoding
+
+codec_chars = [
+    PredefinedChars(Chars.HEX),
+    PredefinedChars(Chars.HEX_UPPER),
+    PredefinedChars(Chars.BASE16),
+    PredefinedChars(Chars.BASE32),
+    PredefinedChars(Chars.BASE32_HEX),
+    PredefinedChars(Chars.CROCKFORD32),
+    PredefinedChars(Chars.SAFE32),
+    PredefinedChars(Chars.WORD_SAFE32),
+    PredefinedChars(Chars.SAFE64),
+    CustomChars('FT'),
+    CustomChars('ab#$'),
+    CustomChars('dingosky'),
+    CustomChars('dîñgø$kyDÎÑGØßK¥'),
+    CustomChars("".join([chr(code) for code in range(0x100, 0x200)])),
+]
+
+
+def test_encodable():
+    assert [n_chars for n_chars in range(2, 257) if encodable(n_chars)] == [2, 4, 8, 16, 32, 64, 256]
+
+
+def test_preferred():
+    assert [n_chars for n_chars in range(2, 257) if preferred(n_chars)] == [2, 4, 8, 16, 64, 256]
+
+
+@pytest.mark.parametrize("chars", codec_chars, ids=lambda chars: str(len(chars)))
+@pytest.mark.parametrize("puid_len", [1, 3, 8, 11, 22, 32, 40, 171])
+def test_codec_muncher(util, chars, puid_len):
+    bits_muncher = muncher(len(chars), puid_len, util.seeded_bytes(puid_len))
+    encoded = encoding(chars)
+    expected = [encoded(bits_muncher()) for _ in range(300)]
+
+    puid_muncher = codec_muncher(chars, puid_len, util.seeded_bytes(puid_len))
+    puids = [puid_muncher() for _ in range(3)] + puid_muncher(200) + [puid_muncher()] + puid_muncher(96)
+
+    assert puids == expected
+
+
+def test_codec_muncher_hex(util):
+    hex_muncher = codec_muncher(PredefinedChars(Chars.HEX), 4, util.fixed_bytes("c7 c9 00 2a bd 17"))
+
+    assert hex_muncher() == 'c7c9'
+    assert hex_muncher(2) == ['002a', 'bd17']
+
+
+def test_codec_muncher_safe64_carry(util):
+    safe64_muncher = codec_muncher(PredefinedChars(Chars.SAFE64), 3, util.fixed_bytes("fb 00 c9 36 a5"))
+
+    assert safe64_muncher() == '-wD'
+    assert safe64_muncher() == 'JNq'
@@ -1,5 +1,6 @@
 import os
 from collections import namedtuple
+from random import Random
 
 import pytest
 
@@ -19,6 +20,10 @@ class Util:
         with open(bin_file, 'rb') as file:
             return Util.static_bytes_fn(bytearray(file.read()))
 
+    @staticmethod
+    def seeded_bytes(seed, n_bytes=1 << 17):
+        return Util.static_bytes_fn(bytearray(Random(seed).getrandbits(8 * n_bytes).to_bytes(n_bytes, 'big')))
+
     @staticmethod
     def static_bytes_fn(bytes):
         offset = 0
@@ -31,9 +36,15 @@ class Util:
 
         return get_bytes
 
+    @staticmethod
+    def value_at(offset, n_bits, entropy_bytes):
+        # Value of the n_bits bits at bit offset of entropy_bytes
+        n_trailing_bits = 8 * len(entropy_bytes) - offset - n_bits
+        return (int.from_bytes(entropy_bytes, 'big') >> n_trailing_bits) & ((1 << n_bits) - 1)
+
     @staticmethod
     def data_path(data_name, file_name):
-        return os.path.join(os.getcwd(), 'tests', 'data', data_name, file_name)
+        return os.path.join(os.path.dirname(__file__), 'data', data_name, file_name)
 
     @staticmethod
     def params(data_name):
@@ -98,7 +109,7 @@ class Util:
         if name == 'safe32':
             return Chars.SAFE32
         if name == 'safe64':
-            return Chars.SAFE6
+            return Chars.SAFE64
         if name == 'symbol':
             return Chars.SYMBOL
         if name == 'word_safe32':
@@ -107,20 +118,55 @@ class Util:
         return None
 
     @staticmethod
-    def rand_id_mod(dir_name):
+    def reference_ids(entropy_bytes, chars, puid_len, count):
+        # Bit by bit slicing of count ids from entropy_bytes, independent of the puid munchers. A rejected
+        # value shifts only the leading bits that already make every value sharing them too large.
+        n_chars = len(chars)
+        n_bits = (n_chars - 1).bit_length()
+        entropy = int.from_bytes(entropy_bytes, 'big')
+        n_entropy_bits = 8 * len(entropy_bytes)
+        offset = 0
+        ids = []
+        for _ in range(count):
+            id_chars = []
+            while len(id_chars) < puid_len:
+                assert offset + n_bits <= n_entropy_bits, 'entropy exhausted'
+                value = (entropy >> (n_entropy_bits - offset - n_bits)) & ((1 << n_bits) - 1)
+                if value < n_chars:
+                    id_chars.append(chars[value])
+                    offset += n_bits
+                else:
+                    n_shift = 1
+                    while (value >> (n_bits - n_shift)) << (n_bits - n_shift) < n_chars:
+                        n_shift += 1
+                    offset += n_shift
+            ids.append(''.join(id_chars))
+        return ids
+
+    @staticmethod
+    def rand_id_mod(dir_name, engine=None):
         params = Util.params(dir_name)
         rand_bytes = Util.file_bytes(params.bin_file)
-        return Puid(total=params.total, risk=params.risk, chars=params.chars, entropy_source=rand_bytes)
+        return Puid(total=params.total, risk=params.risk, chars=params.chars, entropy_source=rand_bytes, engine=engine)
 
     @staticmethod
     def test_data(data_name):
         rand_id = Util.rand_id_mod(data_name)
         ids_file = Util.data_path(data_name, 'ids')
 
-        with open(ids_file) as ids:
+        with open(ids_file, encoding='utf-8') as ids:
             for id in ids:
                 assert rand_id.generate() == id.strip()
 
+    @staticmethod
+    def test_data_many(data_name, engine):
+        rand_id = Util.rand_id_mod(data_name, engine)
+        ids_file = Util.data_path(data_name, 'ids')
+
+        with open(ids_file, encoding='utf-8') as ids:
+            expected = [id.strip() for id in ids]
+            assert rand_id.generate_many(len(expected)) == expected
+
 
 @pytest.fixture
 def util():
@@ -1,22 +0,0 @@
-def test_data_alphanum(util):
-    util.test_data('alphanum')
-
-
-def test_data_alpha_10_lower(util):
-    util.test_data('alpha_10_lower')
-
-
-def test_data_custom_8(util):
-    util.test_data('dingosky')
-
-
-def test_data_safe32(util):
-    util.test_data('safe32')
-
-
-def test_data_safe_ascii(util):
-    util.test_data('safe_ascii')
-
-
-def test_data_unicode(util):
-    util.test_data('unicode')
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+
+DATA_NAMES = ['alphanum', 'alpha_10_lower', 'dingosky', 'safe32', 'safe_ascii', 'unicode']
+
+# Vectors of the tests/data submodule, shared with the other puid implementations
+data_vectors = pytest.mark.skipif(
+    not os.path.isdir(os.path.join(os.path.dirname(__file__), 'data', 'alphanum')), reason='requires the tests/data submodule'
+)
+
+
+@data_vectors
+@pytest.mark.parametrize("data_name", DATA_NAMES)
+def test_data(util, data_name):
+    util.test_data(data_name)
+
+
+@data_vectors
+@pytest.mark.parametrize("data_name", DATA_NAMES)
+def test_data_many_python(util, data_name):
+    util.test_data_many(data_name, 'python')
+
+
+@data_vectors
+@pytest.mark.parametrize("data_name", DATA_NAMES)
+def test_data_many_numpy(util, data_name):
+    pytest.importorskip('numpy')
+    util.test_data_many(data_name, 'numpy')
+
+
+@pytest.mark.parametrize(
+    "chars", [Chars.ALPHANUM, 'abcdefghij', 'dingosky', Chars.SAFE32, Chars.HEX, Chars.SAFE64, Chars.SAFE_ASCII, 'dîñgø$kyDÎÑGØßK¥1']
+)
+@pytest.mark.parametrize("engine", ['python', 'numpy'])
+def test_reference(util, chars, engine):
+    if engine == 'numpy':
+        pytest.importorskip('numpy')
+    entropy_bytes = util.seeded_bytes(23)(1 << 15)
+    rand_id = Puid(total=10**6, risk=10**12, chars=chars, entropy_source=util.static_bytes_fn(entropy_bytes), engine=engine)
+    expected = util.reference_ids(entropy_bytes, rand_id.chars.value, rand_id.len, 1000)
+
+    assert [rand_id.generate() for _ in range(10)] + rand_id.generate_many(990) == expected
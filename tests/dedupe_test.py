@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+from puid import vector
+from puid.dedupe import Dedupe
+from puid.puid_error import PackError
+from puid.puid_error import TotalRiskError
+
+MODES = [{}, {'total': 20000, 'risk': 1e6}, {'total': 20000, 'risk': 1e30}]
+
+
+def repeats_of(puids):
+    seen = set()
+    repeats = []
+    for puid in puids:
+        if puid in seen:
+            repeats.append(puid)
+        seen.add(puid)
+    return repeats
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def engine(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(vector, 'np', None)
+    return request.param
+
+
+@pytest.mark.parametrize("chars", [Chars.SAFE64, Chars.HEX, Chars.ALPHANUM, 'dîñgø$kyDÎÑGØßK¥'])
+@pytest.mark.parametrize("mode", MODES)
+def test_repeats(util, engine, chars, mode):
+    # 20 bits of entropy gives plenty of repeats in 20000 puids
+    rand_id = Puid(bits=20, chars=chars, entropy_source=util.seeded_bytes(71))
+    puids = rand_id.generate_many(20000)
+    expected = repeats_of(puids)
+    assert expected
+
+    reported = []
+    dedupe = Dedupe(rand_id, on_repeat=reported.append, **mode)
+    repeats = dedupe.check_many(puids[:7000]) + dedupe.check_many(iter(puids[7000:]))
+
+    assert repeats == expected
+    assert reported == expected
+    assert dedupe.n_checked == len(puids)
+    assert dedupe.n_repeats == len(expected)
+    assert len(dedupe) == len(puids) - len(expected)
+
+
+def test_check(engine):
+    dedupe = Dedupe(Puid(bits=32, chars=Chars.HEX))
+    assert [dedupe.check(puid) for puid in ['c0ffee42', 'facade00', 'c0ffee42', 'c0ffee42']] == [False, False, True, True]
+    assert dedupe.check_many(['0badf00d', '0badf00d', 'facade00']) == ['0badf00d', 'facade00']
+
+
+def test_exact_growth(engine):
+    rand_id = Puid(bits=64, chars=Chars.HEX)
+    dedupe = Dedupe(rand_id)
+    nbytes = dedupe.nbytes
+
+    puids = dedupe.generate_many(5000)
+    assert dedupe.nbytes > nbytes
+    assert dedupe.n_repeats == 0
+    assert dedupe.check_many(puids[::-1]) == puids[::-1]
+    assert dedupe.generate() not in puids
+
+
+def test_filter_stable():
+    # Filter tables of the same puids are the same in processes with different str hash seeds
+    script = (
+        'from random import Random; from puid import Chars, Puid; from puid.dedupe import Dedupe;'
+        'rand_id = Puid(bits=64, chars=Chars.ALPHANUM, entropy_source=Random(61).randbytes);'
+        'dedupe = Dedupe(rand_id, total=1000, risk=1e6); dedupe.generate_many(500);'
+        'print(bytes(dedupe._table).hex())'
+    )
+    tables = []
+    for seed in ['1', '2']:
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=os.pathsep.join(sys.path))
+        tables.append(subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True).stdout)
+    assert tables[0] and tables[0] == tables[1]
+
+
+@pytest.mark.parametrize("chars", [Chars.HEX, 'dîñgø$kyDÎÑGØßK¥'])
+def test_filter_other_puids(engine, chars):
+    rand_id = Puid(bits=32, chars=chars)
+    puids = rand_id.generate_many(100)
+    others = ['', 'c0ffee4', 'c0ffeé42', 'dîñgø$kyDÎÑGØ', 'z' * rand_id.len]
+
+    # Puids not of the Puid are reported as repeats whether checked alone or in a batch
+    dedupe = Dedupe(rand_id, total=1000, risk=1e9)
+    assert dedupe.check_many(puids + others) == []
+    assert [puid for puid in others if dedupe.check(puid)] == others
+    assert dedupe.check_many(others + puids[:10]) == others + puids[:10]
+    assert dedupe.check_many([]) == []
+
+
+def test_filter_saturation(engine):
+    rand_id = Puid(bits=64, chars=Chars.ALPHANUM)
+    dedupe = Dedupe(rand_id, total=100, risk=1e6)
+    nbytes = dedupe.nbytes
+
+    puids = dedupe.generate_many(1000)
+    assert dedupe.saturated
+    assert dedupe.nbytes == nbytes
+    assert dedupe.n_repeats == 0
+    assert len(dedupe) < len(puids)
+    assert len(dedupe.check_many(puids)) == len(dedupe)
+
+
+def test_exact_invalid_puid(engine):
+    dedupe = Dedupe(Puid(bits=32, chars=Chars.HEX))
+    for puid in ['c0ffee4', 'c0ffee4g', 'c0ffeé42']:
+        with pytest.raises(PackError):
+            dedupe.check(puid)
+
+
+def test_invalid_total_risk():
+    rand_id = Puid()
+    with pytest.raises(TotalRiskError):
+        Dedupe(rand_id, total=1e6)
+    with pytest.raises(TotalRiskError):
+        Dedupe(rand_id, risk=1e6)
+    with pytest.raises(TotalRiskError):
+        Dedupe(rand_id, total=-1, risk=1e6)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_wide_puids(util, engine, mode):
+    rand_id = Puid(entropy_source=util.seeded_bytes(73))
+    puids = rand_id.generate_many(3000)
+    checked = puids + puids[::7]
+
+    dedupe = Dedupe(rand_id, **mode)
+    assert dedupe.check_many(checked) == puids[::7]
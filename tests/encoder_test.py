@@ -1,5 +1,9 @@
 from puid import Chars
+from puid.chars import CustomChars
+from puid.chars import PredefinedChars
 from puid.encoder import encoder
+from puid.encoder import encoding
+from puid.encoder import encoding_table
 
 
 def encoder_chars(chars):
@@ -28,3 +32,18 @@ def test_encoders():
     encoder_chars(Chars.SAFE64)
     encoder_chars(Chars.SYMBOL)
     encoder_chars(Chars.WORD_SAFE32)
+
+
+def test_encoding():
+    for chars in Chars:
+        assert encoding(PredefinedChars(chars))(range(len(chars))) == chars.value
+
+
+def test_encoding_custom():
+    assert encoding(CustomChars('dingosky'))([4, 0, 1, 7]) == 'odiy'
+    assert encoding(CustomChars('dîñgø$kyDÎÑGØßK¥'))(bytes([15, 1, 12, 5])) == '¥îØ$'
+
+
+def test_encoding_table():
+    assert encoding_table(PredefinedChars(Chars.HEX))[:16] == b'0123456789abcdef'
+    assert encoding_table(CustomChars('dîngøsky')) == 'dîngøsky'
@@ -0,0 +1,113 @@
+import os
+from secrets import token_bytes
+
+import pytest
+
+from puid import Chars
+from puid import EntropyBuffer
+from puid import Puid
+from puid.puid_error import EntropyBufferError
+
+
+def test_entropy_buffer(util):
+    entropy_buffer = EntropyBuffer(util.fixed_bytes("00 01 02 03 04 05 06 07 08 09"), size=4)
+
+    assert entropy_buffer(3) == bytes([0, 1, 2])
+    assert entropy_buffer(2) == bytes([3, 4])
+    assert entropy_buffer(6) == bytes([5, 6, 7, 8, 9])
+    assert entropy_buffer.n_refills == 4
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_entropy_buffer_stream(util, background):
+    entropy_buffer = EntropyBuffer(util.seeded_bytes(6), size=100, background=background)
+    entropy_bytes = util.seeded_bytes(6)
+
+    for n_bytes in [1, 17, 99, 100, 3, 250, 0, 64]:
+        assert entropy_buffer(n_bytes) == entropy_bytes(n_bytes)
+
+    entropy_buffer.close()
+
+
+@pytest.mark.parametrize("chars", [Chars.SAFE64, Chars.ALPHANUM, 'dingosky'])
+def test_puid_entropy_buffer(util, chars):
+    buffered_id = Puid(chars=chars, entropy_source=EntropyBuffer(util.seeded_bytes(9), size=1024))
+    rand_id = Puid(chars=chars, entropy_source=util.seeded_bytes(9))
+
+    assert [buffered_id.generate() for _ in range(500)] + buffered_id.generate_many(500) == [
+        rand_id.generate() for _ in range(1000)
+    ]
+    assert buffered_id.entropy_source == 'puid.entropy_buffer.EntropyBuffer'
+
+
+def test_entropy_buffer_background():
+    entropy_buffer = EntropyBuffer(size=64, background=True)
+
+    assert len(entropy_buffer(1000)) == 1000
+    assert entropy_buffer.n_refills == 16
+    assert entropy_buffer.n_waits <= 16
+
+    entropy_buffer.close()
+    assert len(entropy_buffer(1000)) == 1000
+
+
+def test_entropy_buffer_background_error():
+    from threading import Thread
+
+    n_calls = []
+
+    def failing_once(n_bytes):
+        n_calls.append(n_bytes)
+        if len(n_calls) == 2:
+            raise OSError('entropy unavailable')
+        return os.urandom(n_bytes)
+
+    entropy_buffer = EntropyBuffer(failing_once, size=64, background=True)
+    results = []
+
+    def requests():
+        results.append(len(entropy_buffer(64)))
+        try:
+            entropy_buffer(64)
+        except OSError as error:
+            results.append(error)
+        results.append(len(entropy_buffer(64)))
+
+    # A hung request fails the test rather than the run
+    thread = Thread(target=requests, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert results[0] == 64
+    assert isinstance(results[1], OSError)
+    assert results[2] == 64
+    entropy_buffer.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_entropy_buffer_fork():
+    entropy_buffer = EntropyBuffer(token_bytes, size=64)
+    entropy_buffer(1)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        os.write(write_fd, entropy_buffer(8) + bytes([entropy_buffer.n_refills]))
+        os._exit(0)
+
+    os.waitpid(pid, 0)
+    child_bytes = os.read(read_fd, 9)
+    os.close(read_fd)
+    os.close(write_fd)
+
+    assert child_bytes[:8] != entropy_buffer(8)
+    assert child_bytes[8] == 2
+
+
+def test_invalid_size():
+    with pytest.raises(EntropyBufferError):
+        EntropyBuffer(size=0)
+    with pytest.raises(EntropyBufferError):
+        EntropyBuffer(size=1.5)
@@ -8,6 +8,7 @@ from puid.entropy import bits_for_len
 from puid.entropy import bits_for_total_risk
 from puid.entropy import bits_per_char
 from puid.entropy import len_for_bits
+from puid.entropy import risk_for_total_bits
 from puid.puid_error import TotalRiskError
 
 
@@ -29,6 +30,16 @@ def test_bits_for_total_risk(total, risk, expect):
     assert round(bits_for_total_risk(total, risk), 2) == expect
 
 
+@pytest.mark.parametrize("total, risk", [(100, 100), (999, 1000), (1e4, 1e3), (100000, 1e12), (10.0e9, 1.0e21)])
+def test_risk_for_total_bits(total, risk):
+    assert risk_for_total_bits(total, bits_for_total_risk(total, risk)) == pytest.approx(risk)
+
+
+def test_risk_for_total_bits_is_inf():
+    assert risk_for_total_bits(1, 64) == float('inf')
+    assert risk_for_total_bits(1000, 2048) == float('inf')
+
+
 def test_bits_per_predefined_chars():
     assert bits_per_char(PredefinedChars(Chars.ALPHANUM)) == 5.954196310386875
 
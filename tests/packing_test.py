@@ -0,0 +1,123 @@
+import pickle
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+from puid.puid_error import PackError
+
+CHARS = [
+    Chars.HEX,
+    Chars.SAFE32,
+    Chars.SAFE64,
+    Chars.CROCKFORD32,
+    Chars.ALPHANUM,
+    Chars.DECIMAL,
+    Chars.SAFE_ASCII,
+    'FT',
+    'abcd',
+    'dingosky',
+    'dîñgø$kyDÎÑGØßK¥',
+    'dîñgø$kyDÎÑGØßK¥1',
+]
+
+
+@pytest.mark.parametrize("chars", CHARS)
+def test_round_trip(util, chars):
+    rand_id = Puid(bits=90, chars=chars, entropy_source=util.seeded_bytes(61))
+    puids = rand_id.generate_many(1000)
+
+    packed = rand_id.pack_many(puids)
+    assert all([len(packed_puid) == rand_id.packed_len for packed_puid in packed])
+    assert [rand_id.pack(puid) for puid in puids] == packed
+    assert rand_id.unpack_many(packed) == puids
+    assert rand_id.unpack_many(b''.join(packed)) == puids
+    assert [rand_id.unpack(packed_puid) for packed_puid in packed] == puids
+    assert [rand_id.from_int(rand_id.to_int(puid)) for puid in puids] == puids
+
+
+@pytest.mark.parametrize("chars", CHARS)
+def test_order(util, chars):
+    rand_id = Puid(bits=64, chars=chars, entropy_source=util.seeded_bytes(67))
+    puids = rand_id.generate_many(500)
+
+    def char_values(puid):
+        return [rand_id.chars.value.index(char) for char in puid]
+
+    by_values = sorted(puids, key=char_values)
+    assert sorted(puids, key=rand_id.to_int) == by_values
+    assert sorted(puids, key=rand_id.pack) == by_values
+
+
+def test_packed_values():
+    hex_id = Puid(bits=64, chars=Chars.HEX)
+    assert hex_id.packed_len == 8
+    assert hex_id.pack('0123456789abcdef') == bytes.fromhex('0123456789abcdef')
+    assert hex_id.to_int('00000000000000ff') == 255
+
+    decimal_id = Puid(bits=32, chars=Chars.DECIMAL)
+    assert decimal_id.len == 10
+    assert decimal_id.to_int('0004294967') == 4294967
+    assert decimal_id.from_int(42) == '0000000042'
+
+    safe64_id = Puid()
+    assert safe64_id.packed_len == 17
+    assert safe64_id.from_int(0) == 'A' * 22
+    assert safe64_id.from_int((1 << 132) - 1) == '_' * 22
+
+    alphanum_id = Puid(bits=17, chars=Chars.ALPHANUM)
+    assert alphanum_id.to_int('pQy') == 41 * 62 * 62 + 16 * 62 + 50
+
+
+def test_ignore_case():
+    crockford_id = Puid(chars=Chars.CROCKFORD32)
+    puid = '0123456789ABCDEFGHJKMNPQRS'
+    packed = crockford_id.to_int(puid)
+
+    assert crockford_id.to_int('o123456789abcdefghjkmnpqrs', ignore_case=True) == packed
+    assert crockford_id.to_int('OL23456789abcdefGHJKmnpqrs', ignore_case=True) == packed
+    assert crockford_id.pack_many(['OI23456789abcdefghjkmnpqrs'], ignore_case=True) == [crockford_id.pack(puid)]
+
+    with pytest.raises(PackError):
+        crockford_id.to_int('o123456789abcdefghjkmnpqrs')
+
+    with pytest.raises(PackError):
+        Puid(chars=Chars.ALPHANUM).to_int('a' * 22, ignore_case=True)
+
+
+def test_pack_errors():
+    rand_id = Puid(bits=17, chars=Chars.ALPHANUM)
+
+    for puid in ['pQ', 'pQyz', 'pQ-']:
+        with pytest.raises(PackError):
+            rand_id.to_int(puid)
+
+    for packed in [-1, 62**3]:
+        with pytest.raises(PackError):
+            rand_id.from_int(packed)
+
+    with pytest.raises(PackError):
+        rand_id.unpack_many(b'\0' * (rand_id.packed_len + 1))
+
+    with pytest.raises(PackError):
+        Puid(bits=64, chars=Chars.HEX).to_int('0123456789abcdeg')
+
+
+@pytest.mark.parametrize("chars", [Chars.DECIMAL, Chars.ALPHANUM, 'dingosky', 'dîñgø$kyDÎÑGØßK¥1'])
+def test_round_trip_past_digit_limit(util, chars):
+    # More chars than the default int string conversion limit of 4300 digits
+    rand_id = Puid(bits=20_000, chars=chars, entropy_source=util.seeded_bytes(61))
+    puids = rand_id.generate_many(3)
+
+    assert [rand_id.from_int(rand_id.to_int(puid)) for puid in puids] == puids
+    assert rand_id.unpack_many(rand_id.pack_many(puids)) == puids
+    assert rand_id.to_int(puids[0]) == int.from_bytes(rand_id.pack(puids[0]), 'big')
+
+
+def test_pickle():
+    rand_id = Puid(chars=Chars.ALPHANUM)
+    puid = rand_id.generate()
+    rand_id.pack(puid)
+
+    unpickled_id = pickle.loads(pickle.dumps(rand_id))
+    assert unpickled_id.unpack(rand_id.pack(puid)) == puid
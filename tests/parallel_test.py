@@ -0,0 +1,76 @@
+import pickle
+
+import pytest
+
+from puid import Chars
+from puid import EntropyBuffer
+from puid import Puid
+from puid.puid_error import PuidError
+
+
+def test_pickle(util):
+    rand_id = Puid(bits=64, chars=Chars.ALPHANUM)
+    rand_id.generate()
+
+    unpickled_id = pickle.loads(pickle.dumps(rand_id))
+    assert repr(unpickled_id) == repr(rand_id)
+    assert len(unpickled_id.generate()) == rand_id.len
+
+    buffered_id = pickle.loads(pickle.dumps(Puid(entropy_source=EntropyBuffer(size=128))))
+    assert buffered_id.generate_many(10)
+    assert buffered_id._entropy_fn.size == 128
+
+
+@pytest.mark.parametrize("chars", [Chars.HEX, Chars.ALPHANUM, 'dîñgø$kyDÎÑGØßK¥'])
+def test_generate_parallel(chars):
+    rand_id = Puid(chars=chars)
+
+    chunks = list(rand_id.generate_parallel(2500, workers=2, chunk_size=1000))
+
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    puids = [puid for chunk in chunks for puid in chunk]
+    assert len(set(puids)) == 2500
+    assert all([len(puid) == rand_id.len and set(puid) <= set(rand_id.chars.value) for puid in puids])
+
+
+def test_generate_parallel_none():
+    assert list(Puid().generate_parallel(0)) == []
+
+
+def test_write_parallel(tmp_path):
+    rand_id = Puid(chars='dîñgø$kyDÎÑGØßK¥')
+    paths = [tmp_path / f'puids-{ndx}.txt' for ndx in range(3)]
+
+    assert rand_id.write_parallel(1000, paths, workers=2) == [334, 333, 333]
+
+    puids = []
+    for path in paths:
+        lines = path.read_text(encoding='utf-8').split('\n')
+        assert lines[-1] == ''
+        puids.extend(lines[:-1])
+
+    assert len(set(puids)) == 1000
+    assert all([len(puid) == rand_id.len for puid in puids])
+
+
+def test_write_mmap_parallel(tmp_path):
+    rand_id = Puid(chars=Chars.HEX)
+    path = tmp_path / 'puids.txt'
+
+    assert rand_id.write_mmap(path, 10001, workers=3) == 10001
+
+    lines = path.read_text().split('\n')
+    assert lines[-1] == ''
+    assert len(set(lines[:-1])) == 10001
+    assert all([len(puid) == rand_id.len for puid in lines[:-1]])
+
+
+def test_parallel_errors(tmp_path):
+    with pytest.raises(PuidError):
+        list(Puid().generate_parallel(10, workers=0))
+
+    with pytest.raises(PuidError):
+        Puid().write_parallel(10, [])
+
+    with pytest.raises(PuidError):
+        Puid(chars='dîñgø$kyDÎÑGØßK¥').write_mmap(tmp_path / 'puids.txt', 10, workers=2)
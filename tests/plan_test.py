@@ -0,0 +1,98 @@
+from math import ceil, log2
+
+import pytest
+
+from puid.bits import BitReservoir, bit_shifts
+from puid.plan import SEGMENT_CHARS, pow2_slicer, pow2_source, rejection_slicer, rejection_source
+from puid.stats import Counters
+
+
+def taken(util, reservoir, n_bits):
+    # Next n_bits of the reservoir as an int
+    data, offset = reservoir.contiguous(n_bits)
+    reservoir.advance(offset + n_bits)
+    return util.value_at(offset, n_bits, data)
+
+
+def value_shifts(n_chars):
+    n_bits_per_char = ceil(log2(n_chars))
+    shifts = bit_shifts(n_chars)
+
+    def shift(value):
+        return n_bits_per_char if value < n_chars else [bs for bs in shifts if value <= bs[0]][0][1]
+
+    return [shift(value) for value in range(1 << n_bits_per_char)]
+
+
+@pytest.mark.parametrize("n_bits_per_char", range(1, 9))
+@pytest.mark.parametrize("puid_len", [1, 5, SEGMENT_CHARS, SEGMENT_CHARS + 1, 3 * SEGMENT_CHARS + 7])
+def test_pow2_slicer(util, n_bits_per_char, puid_len):
+    entropy_bytes = util.seeded_bytes(n_bits_per_char)(2 * puid_len + 1)
+    reservoir = BitReservoir(util.static_bytes_fn(entropy_bytes))
+    slice_puid = pow2_slicer(n_bits_per_char, puid_len)
+
+    taken(util, reservoir, 3)
+    for offset in [3, 3 + n_bits_per_char * puid_len]:
+        expected = [util.value_at(offset + n_bits_per_char * ndx, n_bits_per_char, entropy_bytes) for ndx in range(puid_len)]
+        assert slice_puid(reservoir) == expected
+
+
+def test_pow2_source():
+    assert '    return [v >> 6 & 63, v & 63]\n' in pow2_source(6, 2)
+    assert '    values += [s >> 8 & 15, s >> 4 & 15, s & 15]\n' in pow2_source(4, SEGMENT_CHARS + 3)
+
+
+def test_rejection_slicer(util):
+    # shifts: [(61, 6), (63, 5)]; 0xfa sliced at bit 24 is 62, rejected with a 5 bit shift
+    reservoir = BitReservoir(util.fixed_bytes("d2 e3 e9 fa 19 00 ff 00 00"))
+    counters = Counters()
+    slice_puid = rejection_slicer(62, 6, 10, value_shifts(62), counters)
+
+    assert slice_puid(reservoir) == [52, 46, 15, 41, 16, 50, 0, 31, 56, 0]
+    assert (counters.rejections, counters.rejected_bits) == (1, 5)
+
+    # Only the bits needed by the puid are fetched
+    assert (reservoir.n_bits, len(reservoir.block) - reservoir.block_ndx) == (7, 0)
+
+
+@pytest.mark.parametrize("n_chars", [3, 10, 26, 36, 62, 90, 129, 200])
+def test_rejection_slicer_windows(util, n_chars):
+    # Long puids span many windows of reservoir bits
+    n_bits_per_char = ceil(log2(n_chars))
+    shifts = value_shifts(n_chars)
+    entropy_bytes = util.seeded_bytes(n_chars)(4096)
+
+    expected = []
+    offset = 0
+    while len(expected) < 1000:
+        value = util.value_at(offset, n_bits_per_char, entropy_bytes)
+        offset += n_bits_per_char if value < n_chars else shifts[value]
+        if value < n_chars:
+            expected.append(value)
+
+    reservoir = BitReservoir(util.static_bytes_fn(entropy_bytes))
+    slice_puid = rejection_slicer(n_chars, n_bits_per_char, 500, shifts)
+    assert slice_puid(reservoir) + slice_puid(reservoir) == expected
+
+
+def test_rejection_source_counted():
+    assert 'counters' not in rejection_source(10, 4, 5)
+    assert 'counters.rejections += 1' in rejection_source(10, 4, 5, counted=True)
+
+
+def test_bit_reservoir(util):
+    entropy_bytes = util.seeded_bytes(79)(256)
+    reservoir = BitReservoir(util.static_bytes_fn(entropy_bytes))
+
+    offset = 0
+    for n_bits in [1, 7, 8, 13, 64, 3, 200, 5]:
+        assert taken(util, reservoir, n_bits) == util.value_at(offset, n_bits, entropy_bytes)
+        offset += n_bits
+
+    reservoir.prefetch(100)
+    data, data_offset = reservoir.contiguous(50)
+    assert 100 <= 8 * len(data) - data_offset < 108
+    assert util.value_at(data_offset, 20, data) == util.value_at(offset, 20, entropy_bytes)
+
+    reservoir.advance(data_offset + 11)
+    assert taken(util, reservoir, 30) == util.value_at(offset + 11, 30, entropy_bytes)
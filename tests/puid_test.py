@@ -1,3 +1,7 @@
+import os
+import subprocess
+import sys
+
 import pytest
 
 from puid import Chars
@@ -5,6 +9,8 @@ from puid import Puid
 from puid.chars_error import InvalidChars
 from puid.chars_error import NonUniqueChars
 from puid.puid_error import BitsError
+from puid.puid_error import EngineError
+from puid.puid_error import PuidError
 from puid.puid_error import TotalRiskError
 
 
@@ -320,3 +326,376 @@ def test_256_chars():
 def test_repr():
     rand_id = Puid()
     assert isinstance(rand_id.__repr__(), str)
+
+
+@pytest.mark.parametrize("chars", [Chars.HEX, Chars.SAFE64, Chars.ALPHANUM, Chars.SAFE_ASCII, 'dingosky', 'dîñgø$kyDÎÑGØßK¥'])
+def test_generate_many(util, chars):
+    single_id = Puid(bits=90, chars=chars, entropy_source=util.seeded_bytes(17))
+    many_id = Puid(bits=90, chars=chars, entropy_source=util.seeded_bytes(17))
+
+    assert many_id.generate_many(5000) == [single_id.generate() for _ in range(5000)]
+
+
+def test_generate_many_with_carry(util):
+    alphanum_bytes = util.fixed_bytes("d2 e3 e9 fa 19 00")
+    alphanum_id = Puid(bits=17, chars=Chars.ALPHANUM, entropy_source=alphanum_bytes)
+    assert alphanum_id.generate_many(2) == ["0uP", "pQy"]
+
+    hex_bytes = util.fixed_bytes("c7 c9 00 2a bd")
+    hex_id = Puid(bits=12, chars=Chars.HEX_UPPER, entropy_source=hex_bytes)
+    assert hex_id.generate() == "C7C"
+    assert hex_id.generate_many(2) == ["900", "2AB"]
+
+
+def test_generate_many_interleaved(util):
+    single_id = Puid(chars=Chars.ALPHA_LOWER, entropy_source=util.seeded_bytes(29))
+    mixed_id = Puid(chars=Chars.ALPHA_LOWER, entropy_source=util.seeded_bytes(29))
+
+    expected = [single_id.generate() for _ in range(30)]
+    assert [mixed_id.generate()] + mixed_id.generate_many(20) + [mixed_id.generate() for _ in range(9)] == expected
+
+
+def test_iter(util):
+    from itertools import islice
+
+    single_id = Puid(chars=Chars.SAFE32, entropy_source=util.seeded_bytes(31))
+    iter_id = Puid(chars=Chars.SAFE32, entropy_source=util.seeded_bytes(31))
+
+    assert list(islice(iter_id, 10)) == [single_id.generate() for _ in range(10)]
+
+
+def test_engine():
+    assert Puid(engine='python').engine == 'python'
+    assert Puid().engine == 'codec'
+    assert Puid(chars=Chars.HEX, engine='codec').engine == 'codec'
+    assert Puid(chars=Chars.ALPHANUM).engine == 'python'
+    assert Puid(chars=Chars.BASE32).engine == 'python'
+    assert Puid(chars=Chars.BASE32, engine='codec').engine == 'codec'
+
+    with pytest.raises(EngineError):
+        Puid(engine='gpu')
+
+    with pytest.raises(EngineError):
+        Puid(chars=Chars.ALPHANUM, engine='codec')
+
+
+@pytest.mark.parametrize("chars", [Chars.HEX, Chars.SAFE32, Chars.SAFE64, 'FT', 'dingosky', 'dîñgø$kyDÎÑGØßK¥'])
+def test_codec_engine(util, chars):
+    python_id = Puid(bits=90, chars=chars, entropy_source=util.seeded_bytes(19), engine='python')
+    codec_id = Puid(bits=90, chars=chars, entropy_source=util.seeded_bytes(19), engine='codec')
+
+    expected = [python_id.generate() for _ in range(10)] + python_id.generate_many(990)
+    assert [codec_id.generate() for _ in range(10)] + codec_id.generate_many(990) == expected
+
+
+def test_numpy_engine_unavailable(monkeypatch):
+    from puid import vector
+
+    monkeypatch.setattr(vector, 'np', None)
+    assert Puid(chars=Chars.ALPHANUM).engine == 'python'
+
+    with pytest.raises(EngineError):
+        Puid(engine='numpy')
+
+
+@pytest.mark.parametrize("chars", [Chars.SAFE64, Chars.ALPHANUM, 'dingosky'])
+def test_thread_safe(util, chars):
+    from threading import Barrier, Thread, current_thread
+
+    n_threads = 8
+    thread_bytes = {f'puid-{ndx}': util.seeded_bytes(ndx, 1 << 14) for ndx in range(n_threads)}
+
+    def thread_entropy(n_bytes):
+        return thread_bytes[current_thread().name](n_bytes)
+
+    shared_id = Puid(chars=chars, entropy_source=thread_entropy, thread_safe=True)
+    assert shared_id.thread_safe
+
+    barrier = Barrier(n_threads)
+    thread_puids = {}
+
+    def generate():
+        barrier.wait()
+        puids = [shared_id.generate() for _ in range(100)] + shared_id.generate_many(100)
+        thread_puids[current_thread().name] = puids
+
+    threads = [Thread(target=generate, name=name) for name in thread_bytes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for ndx in range(n_threads):
+        rand_id = Puid(chars=chars, entropy_source=util.seeded_bytes(ndx, 1 << 14))
+        assert thread_puids[f'puid-{ndx}'] == rand_id.generate_many(200)
+
+
+@pytest.mark.parametrize(
+    "chars", [Chars.HEX, Chars.SAFE32, Chars.SAFE64, Chars.ALPHANUM, Chars.SAFE_ASCII, 'FT', 'abcd', 'dingosky', 'abcdefghij']
+)
+def test_generate_bytes(util, chars):
+    rand_id = Puid(bits=90, chars=chars, entropy_source=util.seeded_bytes(41), engine='python')
+    bytes_id = Puid(bits=90, chars=chars, entropy_source=util.seeded_bytes(41), engine='python')
+
+    expected = [puid.encode('ascii') for puid in rand_id.generate_many(3000)]
+    assert [bytes_id.generate_bytes()] + bytes_id.generate_many_bytes(2998) + [bytes_id.generate_bytes()] == expected
+
+
+def test_generate_bytes_unicode():
+    rand_id = Puid(chars='dîñgø$kyDÎÑGØßK¥')
+
+    with pytest.raises(PuidError):
+        rand_id.generate_bytes()
+
+    with pytest.raises(PuidError):
+        rand_id.generate_many_bytes(2)
+
+
+@pytest.mark.parametrize(
+    "chars",
+    [
+        'dîñgø$kyDÎÑGØßK¥',
+        'dîñgø$kyDÎÑGØßK¥1',
+        'ØĀ',
+        'dîñg',
+        'dîngøsky',
+        'αβγδεζηθικλμνξοπρστυφχψω€¥$£',
+        '😀😁😂🤣',
+        'αβγδεζηθικλμνξοπρστυφχψωΑΒΓΔΕΖΗΘ',
+        'αβγδεζηθικλμνξοπρστυφχψωΑΒΓΔΕΖΗΘΙΚΛΜΝΞΟΠΡΣΤΥΦΧΨΩdîñgø$kyDÎÑGØßK¥',
+        Chars.SAFE64,
+        'dingosky',
+    ],
+)
+@pytest.mark.parametrize("bits", [64, 90])
+def test_generate_utf8(util, chars, bits):
+    rand_id = Puid(bits=bits, chars=chars, entropy_source=util.seeded_bytes(43), engine='python')
+    utf8_id = Puid(bits=bits, chars=chars, entropy_source=util.seeded_bytes(43), engine='python')
+
+    expected = [puid.encode('utf-8') for puid in rand_id.generate_many(3000)]
+    assert [utf8_id.generate_utf8()] + utf8_id.generate_many_utf8(2998) + [utf8_id.generate_utf8()] == expected
+
+
+def test_generate_utf8_thread_safe(util):
+    rand_id = Puid(chars='dîñgø$kyDÎÑGØßK¥1', entropy_source=util.seeded_bytes(47), thread_safe=True)
+    utf8_id = Puid(chars='dîñgø$kyDÎÑGØßK¥1', entropy_source=util.seeded_bytes(47), thread_safe=True)
+
+    assert utf8_id.generate_many_utf8(10) == [puid.encode('utf-8') for puid in rand_id.generate_many(10)]
+
+
+@pytest.mark.parametrize("chars", [Chars.SAFE64, Chars.ALPHANUM, 'dingosky'])
+def test_generate_into(util, chars):
+    from array import array
+    from mmap import mmap
+
+    rand_id = Puid(chars=chars, entropy_source=util.seeded_bytes(43))
+    expected = b''.join(rand_id.generate_many_bytes(5000))
+    n_bytes = len(expected)
+
+    for buffer in [bytearray(n_bytes + 3), array('B', bytes(n_bytes)), mmap(-1, n_bytes)]:
+        into_id = Puid(chars=chars, entropy_source=util.seeded_bytes(43))
+        assert into_id.generate_into(buffer, 5000) == n_bytes
+        assert bytes(buffer[:n_bytes]) == expected
+
+    buffer = bytearray(2 * into_id.len)
+    view_id = Puid(chars=chars, entropy_source=util.seeded_bytes(43))
+    view_id.generate_into(memoryview(buffer)[into_id.len :], 1)
+    assert bytes(buffer) == bytes(into_id.len) + expected[: into_id.len]
+
+
+@pytest.mark.parametrize("sep", [b'\n', b', '])
+def test_generate_into_sep(util, sep):
+    rand_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(37, 1 << 19))
+    expected = b''.join([puid + sep for puid in rand_id.generate_many_bytes(5000)])
+
+    into_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(37, 1 << 19))
+    buffer = bytearray(len(expected))
+    assert into_id.generate_into(buffer, 5000, sep) == len(expected)
+    assert buffer == expected
+
+
+@pytest.mark.parametrize("sep", ['\n', ''])
+def test_write_mmap(util, tmp_path, sep):
+    from puid import mapped
+
+    rand_id = Puid(chars=Chars.SAFE32, entropy_source=util.seeded_bytes(59))
+    expected = ''.join([puid + sep for puid in rand_id.generate_many(3000)])
+
+    path = tmp_path / 'puids.txt'
+    path.write_text('stale')
+    mmap_id = Puid(chars=Chars.SAFE32, entropy_source=util.seeded_bytes(59))
+    assert mmap_id.write_mmap(path, 3000, sep) == 3000
+    assert path.read_text() == expected
+
+    # Windows of 1000 records, most of which start part way into a mapped page
+    window_id = Puid(chars=Chars.SAFE32, entropy_source=util.seeded_bytes(59))
+    mapped.create(path, len(expected))
+    assert mapped.fill_records(window_id, path, 0, 3000, sep.encode(), 1000 * (window_id.len + len(sep))) == 3000
+    assert path.read_text() == expected
+
+    assert mmap_id.write_mmap(path, 0) == 0
+    assert path.read_text() == ''
+
+
+def test_generate_into_invalid():
+    rand_id = Puid()
+
+    with pytest.raises(PuidError):
+        rand_id.generate_into(bytearray(rand_id.len), 2)
+
+    with pytest.raises(PuidError):
+        rand_id.generate_into(bytes(rand_id.len), 1)
+
+    with pytest.raises(PuidError):
+        Puid(chars='dîñgø$kyDÎÑGØßK¥').generate_into(bytearray(100), 1)
+
+
+def test_stream(util):
+    stream_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(47, 1 << 19))
+    rand_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(47, 1 << 19))
+
+    assert list(stream_id.stream(5000)) == rand_id.generate_many(5000)
+    assert list(stream_id.stream(0)) == []
+
+    from itertools import islice
+
+    assert list(islice(stream_id.stream(), 5000)) == rand_id.generate_many(5000)
+
+
+@pytest.mark.parametrize("chars", [Chars.SAFE64, 'dîñgø$kyDÎÑGØßK¥'])
+def test_write_to(util, chars):
+    from io import BytesIO, StringIO
+
+    rand_id = Puid(chars=chars, entropy_source=util.seeded_bytes(53))
+    expected = rand_id.generate_many(1000)
+
+    text_id = Puid(chars=chars, entropy_source=util.seeded_bytes(53))
+    text_file = StringIO()
+    assert text_id.write_to(text_file, 1000, chunk=300) == 1000
+    assert text_file.getvalue() == '\n'.join(expected) + '\n'
+
+    binary_id = Puid(chars=chars, entropy_source=util.seeded_bytes(53))
+    binary_file = BytesIO()
+    binary_id.write_to(binary_file, 1000, sep=',')
+    assert binary_file.getvalue().decode('utf-8') == ','.join(expected) + ','
+
+    empty_file = StringIO()
+    assert rand_id.write_to(empty_file, 0) == 0
+    assert empty_file.getvalue() == ''
+
+
+def test_write_to_raw(util):
+    from io import RawIOBase
+
+    class ShortWrites(RawIOBase):
+        def __init__(self):
+            self.data = bytearray()
+
+        def writable(self):
+            return True
+
+        def write(self, data):
+            self.data += bytes(data[:7])
+            return min(7, len(data))
+
+    rand_id = Puid(entropy_source=util.seeded_bytes(59))
+    raw_id = Puid(entropy_source=util.seeded_bytes(59))
+    raw_file = ShortWrites()
+
+    assert raw_id.write_to(raw_file, 100, chunk=30) == 100
+    assert raw_file.data.decode('ascii') == '\n'.join(rand_id.generate_many(100)) + '\n'
+
+    for chunk in [0, -1, 1.5]:
+        with pytest.raises(PuidError):
+            raw_id.write_to(raw_file, 10, chunk=chunk)
+
+
+def test_cached():
+    import puid
+
+    rand_id = Puid.cached(chars=Chars.HEX, bits=64)
+    assert Puid.cached(chars=Chars.HEX, bits=64) is rand_id
+    assert rand_id.thread_safe
+    assert (rand_id.len, rand_id.chars.value) == (16, Chars.HEX.value)
+
+    # Configurations of the same chars and length share a Puid
+    assert Puid.cached(chars=Chars.HEX, bits=61) is rand_id
+    assert Puid.cached(chars=Chars.HEX, total=1e6, risk=1e7) is rand_id
+
+    assert Puid.cached(chars=Chars.HEX, bits=68) is not rand_id
+    assert Puid.cached(chars=Chars.HEX_UPPER, bits=64) is not rand_id
+    assert Puid.cached(chars=Chars.HEX, bits=64, thread_safe=False) is not rand_id
+    assert Puid.cached(chars='dingosky') is Puid.cached(chars='dingosky', bits=128)
+
+    assert len(puid.generate(chars=Chars.HEX, bits=64)) == 16
+    assert len(puid.generate()) == 22
+
+    with pytest.raises(NonUniqueChars):
+        Puid.cached(chars='unique')
+    with pytest.raises(BitsError):
+        Puid.cached(bits=-1)
+
+
+def test_cached_recency(monkeypatch):
+    from collections import OrderedDict
+
+    import puid.puid
+
+    monkeypatch.setattr(puid.puid, 'CACHE_SIZE', 2)
+    monkeypatch.setattr(puid.puid, '_cache', OrderedDict())
+
+    rand_id = Puid.cached(chars=Chars.HEX, bits=64)
+    assert Puid.cached(chars=Chars.HEX, bits=63) is rand_id
+    alphanum_id = Puid.cached(chars=Chars.ALPHANUM)
+
+    # Hits keep a Puid recently used, so the least recently used is evicted
+    assert Puid.cached(chars=Chars.HEX, bits=64) is rand_id
+    Puid.cached(chars=Chars.SAFE32)
+    assert len(puid.puid._cache) == 2
+    assert Puid.cached(chars=Chars.HEX, bits=63) is rand_id
+    assert Puid.cached(chars=Chars.ALPHANUM) is not alphanum_id
+
+
+def test_lazy_imports():
+    # Modules of optional features are not imported by import puid; Puid().generate()
+    lazy_modules = [
+        'numpy',
+        'asyncio',
+        'concurrent.futures',
+        'multiprocessing',
+        'secrets',
+        'inspect',
+        'threading',
+        'queue',
+        'mmap',
+        'fcntl',
+        'puid.aio',
+        'puid.budget',
+        'puid.entropy_buffer',
+        'puid.mapped',
+        'puid.parallel',
+        'puid.stats',
+        'puid.timing',
+        'puid.encoders.safe64',
+    ]
+    script = f'import sys; import puid; puid.Puid().generate(); print(" ".join([name for name in {lazy_modules!r} if name in sys.modules]))'
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    imported = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True).stdout.split()
+    assert imported == []
+
+    import puid
+
+    assert puid.EntropyBuffer(size=64)(16) != bytes(16)
+
+
+def test_compact():
+    rand_id = Puid(chars='dingosky')
+    assert not hasattr(rand_id, '__dict__')
+    assert not hasattr(rand_id.chars, '__dict__')
+
+    # Munchers are built on first use
+    calls = []
+    lazy_id = Puid(entropy_source=lambda n_bytes: calls.append(n_bytes) or bytes(n_bytes))
+    assert lazy_id._puid_muncher is None
+    assert lazy_id.generate() == 'A' * 22
+    assert calls
@@ -0,0 +1,116 @@
+import pickle
+from threading import Thread
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+from puid import vector
+from puid.puid_error import PuidError
+from puid.stats import prometheus
+
+
+def test_stats_rejection(util):
+    # shifts: [(61, 6), (63, 5)]; the fourth slice, 63, is rejected with a 5 bit shift
+    alphanum_id = Puid(bits=41, chars=Chars.ALPHANUM, entropy_source=util.fixed_bytes("d2 e3 e9 fa 19 00 00 00"), stats=True)
+
+    assert alphanum_id.generate() == '0uPpQyA'
+    assert alphanum_id.stats() == {
+        'ids': 1,
+        'entropy_calls': 1,
+        'entropy_bytes': 6,
+        'rejections': 1,
+        'rejected_bits': 5,
+        'bits_sliced': 47,
+        'bits_per_rejection': 5.0,
+    }
+
+
+@pytest.mark.parametrize("chars", [Chars.SAFE64, Chars.HEX, Chars.ALPHANUM_LOWER, 'dîñgø$kyDÎÑGØßK¥'])
+def test_stats_bits(util, chars):
+    rand_id = Puid(chars=chars, entropy_source=util.seeded_bytes(61), stats=True)
+
+    rand_id.generate()
+    rand_id.generate_many(1000)
+    rand_id.generate()
+
+    stats = rand_id.stats()
+    assert stats['ids'] == 1002
+    assert stats['bits_sliced'] <= 8 * stats['entropy_bytes']
+    assert stats['rejected_bits'] <= stats['rejections'] * rand_id.bits_per_char
+
+
+@pytest.mark.skipif(not vector.available(), reason='requires NumPy')
+@pytest.mark.parametrize("chars", [Chars.ALPHANUM, Chars.ALPHANUM_LOWER, Chars.SYMBOL])
+def test_stats_engines(util, chars):
+    python_id = Puid(chars=chars, entropy_source=util.seeded_bytes(67), engine='python', stats=True)
+    numpy_id = Puid(chars=chars, entropy_source=util.seeded_bytes(67), engine='numpy', stats=True)
+
+    assert numpy_id.generate_many(1000) == python_id.generate_many(1000)
+
+    # Engines top up entropy differently, but slice and reject the same bits
+    numpy_stats, python_stats = numpy_id.stats(), python_id.stats()
+    for name in ['ids', 'bits_sliced', 'rejections', 'rejected_bits']:
+        assert numpy_stats[name] == python_stats[name]
+
+
+def test_stats_thread_safe():
+    shared_id = Puid(chars=Chars.ALPHANUM, thread_safe=True, stats=True)
+
+    threads = [Thread(target=shared_id.generate_many, args=(500,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert shared_id.stats()['ids'] == 2000
+
+
+def test_stats_finished_threads():
+    shared_id = Puid(chars=Chars.ALPHANUM, thread_safe=True, stats=True)
+
+    def generate():
+        shared_id.generate()
+        shared_id.generate_many(9)
+
+    for _ in range(50):
+        thread = Thread(target=generate)
+        thread.start()
+        thread.join()
+
+    # Counters of finished threads are folded into the retired counters
+    assert len(shared_id._counters) <= 2
+    assert shared_id.stats()['ids'] == 500
+
+
+def test_stats_pickle():
+    rand_id = Puid(stats=True)
+    rand_id.generate_many(10)
+
+    unpickled_id = pickle.loads(pickle.dumps(rand_id))
+    assert unpickled_id.stats()['ids'] == 0
+    unpickled_id.generate()
+    assert unpickled_id.stats()['ids'] == 1
+
+
+def test_stats_disabled():
+    with pytest.raises(PuidError):
+        Puid().stats()
+
+
+def test_prometheus():
+    rand_id = Puid(chars=Chars.ALPHANUM_LOWER, stats=True)
+    rand_id.generate_many(10)
+
+    text = prometheus(rand_id.stats(), {'name': 'order "id"'})
+    lines = text.split('\n')
+
+    assert lines[-1] == ''
+    assert '# TYPE puid_ids_total counter' in lines
+    assert 'puid_ids_total{name="order \\"id\\""} 10' in lines
+    assert len([line for line in lines if line.startswith('puid_')]) == 6
+    assert 'puid_bits_per_rejection' not in text
+
+    assert prometheus({'ids': 1}, prefix='session') == (
+        '# HELP session_ids_total Number of puids generated\n# TYPE session_ids_total counter\nsession_ids_total 1\n'
+    )
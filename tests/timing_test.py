@@ -0,0 +1,96 @@
+import pickle
+
+import pytest
+
+from puid import Chars
+from puid import Puid
+from puid.puid_error import PuidError
+from puid.timing import LatencyHistogram, Timings, Tracer
+
+
+class Recorder(Tracer):
+    def __init__(self, sample_every=1):
+        super().__init__(sample_every)
+        self.calls = []
+
+    def entropy(self, n_bytes, ns):
+        self.calls.append(('entropy', n_bytes))
+
+    def generate(self, ns):
+        self.calls.append(('generate', None))
+
+    def batch(self, n_puids, ns):
+        self.calls.append(('batch', n_puids))
+
+
+def test_tracer(util):
+    recorder = Recorder()
+    rand_id = Puid(bits=24, chars=Chars.HEX, entropy_source=util.fixed_bytes("c7 c9 00 2a bd"), tracer=recorder)
+
+    assert rand_id.generate() == 'c7c900'
+    assert recorder.calls == [('entropy', 3), ('generate', None)]
+
+    recorder.calls = []
+    rand_id = Puid(chars=Chars.HEX, entropy_source=util.seeded_bytes(73), tracer=recorder)
+    assert len(rand_id.generate_many(5000)) == 5000
+    assert [call for call in recorder.calls if call[0] == 'batch'] == [('batch', 4096), ('batch', 904)]
+
+
+def test_tracer_sampling(util):
+    recorder = Recorder(sample_every=3)
+    rand_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(71), tracer=recorder)
+    traced_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(71))
+
+    assert [rand_id.generate() for _ in range(10)] == [traced_id.generate() for _ in range(10)]
+    assert len([call for call in recorder.calls if call[0] == 'generate']) == 4
+
+
+def test_tracer_errors():
+    with pytest.raises(PuidError):
+        Tracer(sample_every=0)
+
+    with pytest.raises(PuidError):
+        Timings(sample_every=1.5)
+
+
+def test_timings():
+    timings = Timings(sample_every=1)
+    rand_id = Puid(chars=Chars.ALPHANUM_LOWER, tracer=timings)
+
+    for _ in range(100):
+        rand_id.generate()
+    rand_id.generate_many(1000)
+
+    summary = timings.summary()
+    assert summary['generate']['count'] == 100
+    assert summary['batch_per_puid']['count'] == 1
+    assert 0 < summary['entropy']['count']
+
+    generate = summary['generate']
+    assert 0 < generate['p50_ns'] <= generate['p90_ns'] <= generate['p99_ns'] <= generate['p999_ns'] <= generate['max_ns']
+
+
+def test_timings_pickle():
+    rand_id = Puid(tracer=Timings())
+
+    unpickled_id = pickle.loads(pickle.dumps(rand_id))
+    assert unpickled_id.tracer is None
+    assert len(unpickled_id.generate()) == rand_id.len
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0
+    assert histogram.summary()['count'] == 0
+
+    for ns in range(1, 1001):
+        histogram.record(1000 * ns)
+
+    assert histogram.count == 1000
+    assert histogram.max_ns == 1_000_000
+    assert 500_000 <= histogram.percentile(50) < 1.19 * 500_000
+    assert 990_000 <= histogram.percentile(99) <= 1_000_000
+    assert histogram.percentile(100) == 1_000_000
+
+    histogram.record(10**12)
+    assert histogram.percentile(100) == 10**12
@@ -0,0 +1,199 @@
+import pytest
+
+from puid import Chars
+from puid import Puid
+
+np = pytest.importorskip('numpy')
+
+from puid import bits  # noqa: E402
+from puid import vector  # noqa: E402
+from puid.bits import value_shifts  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def vector_batches(monkeypatch):
+    # Slice batches of any size with NumPy
+    monkeypatch.setattr(bits, 'VECTOR_MIN_VALUES', 0)
+
+
+@pytest.mark.parametrize("n_bits_per_char", [1, 2, 3, 4, 5, 6, 7, 8])
+@pytest.mark.parametrize("entropy_offset", [0, 3, 8, 13])
+def test_pow2_values(util, n_bits_per_char, entropy_offset):
+    entropy_bytes = util.seeded_bytes(n_bits_per_char)(64)
+    n_values = (8 * 64 - entropy_offset) // n_bits_per_char - 1
+
+    values = vector.pow2_values(entropy_bytes, entropy_offset, n_values, n_bits_per_char)
+
+    offsets = range(entropy_offset, entropy_offset + n_values * n_bits_per_char, n_bits_per_char)
+    assert values.tolist() == [util.value_at(offset, n_bits_per_char, entropy_bytes) for offset in offsets]
+
+
+@pytest.mark.parametrize(
+    "chars",
+    [
+        Chars.HEX,
+        Chars.BASE32,
+        Chars.SAFE32,
+        Chars.SAFE64,
+        Chars.CROCKFORD32,
+        'dingosky',
+        'FT',
+        Chars.ALPHA,
+        Chars.ALPHA_LOWER,
+        Chars.ALPHANUM,
+        Chars.ALPHANUM_LOWER,
+        Chars.DECIMAL,
+        Chars.SAFE_ASCII,
+        Chars.SYMBOL,
+        'abcdefghij',
+        'dîñgø$kyDÎÑGØßK¥1',
+    ],
+)
+@pytest.mark.parametrize("bits", [64, 128, 256, 1024])
+def test_numpy_engine(util, chars, bits):
+    python_id = Puid(bits=bits, chars=chars, entropy_source=util.seeded_bytes(bits), engine='python')
+    numpy_id = Puid(bits=bits, chars=chars, entropy_source=util.seeded_bytes(bits), engine='numpy')
+    assert numpy_id.engine == 'numpy'
+
+    expected = [python_id.generate() for _ in range(500)]
+    assert numpy_id.generate_many(499) + [numpy_id.generate()] == expected
+
+
+@pytest.mark.parametrize("chars", [Chars.HEX, Chars.SAFE32, Chars.SAFE64])
+def test_numpy_engine_pow2(util, chars, monkeypatch):
+    # A numpy engine Puid of chars the codec can encode still slices batches with pow2_values
+    n_calls = []
+    pow2_values = vector.pow2_values
+
+    def counted_pow2_values(*args):
+        n_calls.append(1)
+        return pow2_values(*args)
+
+    monkeypatch.setattr(vector, 'pow2_values', counted_pow2_values)
+    codec_id = Puid(chars=chars, entropy_source=util.seeded_bytes(3), engine='codec')
+    numpy_id = Puid(chars=chars, entropy_source=util.seeded_bytes(3), engine='numpy')
+
+    assert numpy_id.generate_many(1000) == codec_id.generate_many(1000)
+    assert n_calls
+
+
+@pytest.mark.parametrize("chars", [Chars.ALPHANUM, Chars.SAFE_ASCII, 'dingoskyz'])
+def test_numpy_engine_bytes(util, chars):
+    python_id = Puid(chars=chars, entropy_source=util.seeded_bytes(5), engine='python')
+    numpy_id = Puid(chars=chars, entropy_source=util.seeded_bytes(5), engine='numpy')
+
+    assert numpy_id.generate_many_bytes(999) + [numpy_id.generate_bytes()] == python_id.generate_many_bytes(1000)
+
+
+@pytest.mark.parametrize("chars", ['dîñgø$kyDÎÑGØßK¥1', 'αβγδεζηθικλμνξοπρστυφχψω€¥$£', '😀😁😂🤣x', Chars.ALPHANUM])
+def test_numpy_engine_utf8(util, chars):
+    python_id = Puid(chars=chars, entropy_source=util.seeded_bytes(7), engine='python')
+    numpy_id = Puid(chars=chars, entropy_source=util.seeded_bytes(7), engine='numpy')
+
+    assert numpy_id.generate_many_utf8(999) + [numpy_id.generate_utf8()] == python_id.generate_many_utf8(1000)
+
+
+def test_generate_into_numpy_array(util):
+    rand_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(9))
+    puids = np.zeros(1000, dtype=f'S{rand_id.len}')
+
+    into_id = Puid(chars=Chars.ALPHANUM, entropy_source=util.seeded_bytes(9))
+    into_id.generate_into(puids, 1000)
+    assert puids.tolist() == rand_id.generate_many_bytes(1000)
+
+
+def test_numpy_engine_unicode(util):
+    chars = 'dîñgø$kyDÎÑGØßK¥'
+    python_id = Puid(chars=chars, entropy_source=util.seeded_bytes(7), engine='python')
+    numpy_id = Puid(chars=chars, entropy_source=util.seeded_bytes(7), engine='numpy')
+
+    assert numpy_id.generate_many(1000) == python_id.generate_many(1000)
+
+
+def test_numpy_engine_high_rejection(util):
+    # 129 chars: nearly half of all 8-bit slices are rejected
+    chars = Chars.SAFE64.value + "".join([chr(n + 256) for n in range(65)])
+    python_id = Puid(chars=chars, entropy_source=util.seeded_bytes(11), engine='python')
+    numpy_id = Puid(chars=chars, entropy_source=util.seeded_bytes(11), engine='numpy')
+
+    assert numpy_id.generate_many(1000) == python_id.generate_many(1000)
+
+
+@pytest.mark.parametrize("n_chars", [3, 10, 36, 62, 90, 129, 255])
+@pytest.mark.parametrize("entropy_offset", [0, 5])
+def test_rejection_values(util, n_chars, entropy_offset):
+    # Enough entropy for many walks, some of which only meet the next after being continued
+    n_bits_per_char = (n_chars - 1).bit_length()
+    shifts = value_shifts(n_chars)
+    entropy_bytes = util.seeded_bytes(n_chars)(1 << 14)
+    n_bits = 8 * len(entropy_bytes)
+
+    expected = []
+    n_rejects = 0
+    offset = entropy_offset
+    while len(expected) < 10000 and offset + n_bits_per_char <= n_bits:
+        value = util.value_at(offset, n_bits_per_char, entropy_bytes)
+        if value < n_chars:
+            expected.append(value)
+        else:
+            n_rejects += 1
+        offset += shifts[value]
+
+    values, n_sliced_bits, n_sliced_rejects = vector.rejection_values(
+        entropy_bytes, entropy_offset, 10000, n_bits_per_char, n_chars, shifts
+    )
+    assert values.tolist() == expected
+    assert n_sliced_bits == offset - entropy_offset
+    assert n_sliced_rejects == n_rejects
+
+
+def test_numpy_engine_small_batches(util, monkeypatch):
+    monkeypatch.setattr(bits, 'VECTOR_MIN_VALUES', 1 << 14)
+    n_calls = []
+    rejection_values = vector.rejection_values
+
+    def counted_rejection_values(*args):
+        n_calls.append(1)
+        return rejection_values(*args)
+
+    monkeypatch.setattr(vector, 'rejection_values', counted_rejection_values)
+    python_id = Puid(chars=Chars.ALPHANUM_LOWER, entropy_source=util.seeded_bytes(13), engine='python')
+    numpy_id = Puid(chars=Chars.ALPHANUM_LOWER, entropy_source=util.seeded_bytes(13), engine='numpy')
+
+    # Batches of fewer values are sliced by the Python slicer
+    assert numpy_id.generate_many(100) == python_id.generate_many(100)
+    assert not n_calls
+    assert numpy_id.generate_many(1000) == python_id.generate_many(1000)
+    assert n_calls
+
+
+def test_rejection_values_exhausted(util):
+    # shifts: [(61, 6), (63, 5)]
+    alphanum_bytes = util.fixed_bytes("d2 e3 e9 fa 19 00")(6)
+    values, n_bits, n_rejects = vector.rejection_values(alphanum_bytes, 0, 10, 6, 62, [6] * 62 + [5, 5])
+    assert values.tolist() == [52, 46, 15, 41, 16, 50, 0]
+    assert n_bits == 47
+    assert n_rejects == 1
+
+
+def test_numpy_engine_with_carry(util):
+    alphanum_bytes = util.fixed_bytes("d2 e3 e9 fa 19 00")
+    alphanum_id = Puid(bits=17, chars=Chars.ALPHANUM, entropy_source=alphanum_bytes, engine='numpy')
+    assert alphanum_id.generate_many(2) == ["0uP", "pQy"]
+
+    hex_bytes = util.fixed_bytes("c7 c9 00 2a bd")
+    hex_id = Puid(bits=12, chars=Chars.HEX_UPPER, entropy_source=hex_bytes, engine='numpy')
+    assert hex_id.generate() == "C7C"
+    assert hex_id.generate_many(2) == ["900", "2AB"]
+
+
+def test_digest_words():
+    rows = [bytes([ndx]) * 13 for ndx in range(64)] + [bytes(12) + b'\x01']
+    digests = vector.digest_words(b''.join(rows), len(rows))
+    assert digests.shape == (len(rows), 2)
+    assert len({tuple(digest) for digest in digests.tolist()}) == len(rows)
+
+    # A row has the same digest in any batch
+    assert (vector.digest_words(rows[5], 1) == digests[5]).all()
+    assert (vector.digest_words(b''.join(rows[3:9]), 6) == digests[3:9]).all()
+    assert vector.digest_words(b'', 0).shape == (0, 2)